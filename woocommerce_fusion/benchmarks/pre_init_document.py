@@ -0,0 +1,137 @@
+"""
+Measures how many WooCommerce records per second pass through pre_init_document, with every available
+JSON codec. Run it against a site that has woocommerce_fusion installed:
+
+	bench --site <site> execute woocommerce_fusion.benchmarks.pre_init_document.run
+	bench --site <site> execute woocommerce_fusion.benchmarks.pre_init_document.run --kwargs "{'records': 5000}"
+"""
+import time
+from copy import deepcopy
+from typing import Dict, List
+
+from woocommerce_fusion.woocommerce import json_codec
+from woocommerce_fusion.woocommerce.doctype.woocommerce_order.woocommerce_order import (
+	WooCommerceOrder,
+)
+from woocommerce_fusion.woocommerce.doctype.woocommerce_product.woocommerce_product import (
+	WooCommerceProduct,
+)
+
+SERVER_URL = "https://site1.example.com"
+
+
+def get_order(order_id: int, line_items: int = 10) -> Dict:
+	"""A WooCommerce Order of a realistic size"""
+	address = {
+		"first_name": "John",
+		"last_name": "Doe",
+		"company": "Acme",
+		"address_1": "969 Market",
+		"address_2": "",
+		"city": "San Francisco",
+		"state": "CA",
+		"postcode": "94103",
+		"country": "US",
+		"email": "john.doe@example.com",
+		"phone": "(555) 555-5555",
+	}
+	return {
+		"id": order_id,
+		"parent_id": 0,
+		"number": str(order_id),
+		"status": "processing",
+		"currency": "USD",
+		"date_created": "2024-01-01T10:00:00",
+		"date_created_gmt": "2024-01-01T10:00:00",
+		"date_modified": "2024-01-02T10:00:00",
+		"date_modified_gmt": "2024-01-02T10:00:00",
+		"total": "120.00",
+		"customer_id": 1,
+		"billing": address,
+		"shipping": {k: v for k, v in address.items() if k not in ("email", "phone")},
+		"payment_method": "bacs",
+		"payment_method_title": "Direct Bank Transfer",
+		"meta_data": [{"id": i, "key": f"_meta_{i}", "value": f"value {i}"} for i in range(10)],
+		"line_items": [
+			{
+				"id": i,
+				"name": f"Product {i}",
+				"product_id": 100 + i,
+				"variation_id": 0,
+				"quantity": 2,
+				"subtotal": "10.00",
+				"total": "10.00",
+				"taxes": [{"id": 1, "total": "1.50", "subtotal": "1.50"}],
+				"meta_data": [{"id": i, "key": "pa_size", "value": "M"}],
+				"sku": f"SKU-{i}",
+				"price": 5,
+			}
+			for i in range(line_items)
+		],
+		"tax_lines": [{"id": 1, "rate_code": "US-CA-TAX-1", "tax_total": "15.00"}],
+		"shipping_lines": [
+			{"id": 1, "method_title": "Flat Rate", "method_id": "flat_rate", "total": "10.00"}
+		],
+		"fee_lines": [],
+		"coupon_lines": [],
+		"refunds": [],
+		"_links": {"self": [{"href": f"{SERVER_URL}/wp-json/wc/v3/orders/{order_id}"}]},
+	}
+
+
+def get_product(product_id: int) -> Dict:
+	"""A WooCommerce Product of a realistic size"""
+	return {
+		"id": product_id,
+		"name": f"Product {product_id}",
+		"slug": f"product-{product_id}",
+		"type": "variable",
+		"status": "publish",
+		"date_created": "2024-01-01T10:00:00",
+		"date_created_gmt": "2024-01-01T10:00:00",
+		"date_modified": "2024-01-02T10:00:00",
+		"date_modified_gmt": "2024-01-02T10:00:00",
+		"description": "<p>A product description</p>" * 5,
+		"sku": f"SKU-{product_id}",
+		"price": "10.00",
+		"regular_price": "10.00",
+		"categories": [{"id": 9, "name": "Clothing", "slug": "clothing"}],
+		"tags": [],
+		"images": [
+			{"id": i, "src": f"{SERVER_URL}/wp-content/uploads/{product_id}-{i}.jpg", "name": "", "alt": ""}
+			for i in range(3)
+		],
+		"attributes": [
+			{"id": 1, "name": "Size", "position": 0, "visible": True, "options": ["S", "M", "L", "XL"]},
+			{"id": 2, "name": "Color", "position": 1, "visible": True, "options": ["Red", "Blue"]},
+		],
+		"variations": list(range(product_id * 10, product_id * 10 + 8)),
+		"meta_data": [{"id": i, "key": f"_meta_{i}", "value": f"value {i}"} for i in range(5)],
+		"_links": {"self": [{"href": f"{SERVER_URL}/wp-json/wc/v3/products/{product_id}"}]},
+	}
+
+
+def measure(resource_class, records: List[Dict]) -> float:
+	"""Returns the number of records per second that pass through pre_init_document"""
+	# Warm the doctype metadata cache, and copy the records outside of the timed section
+	resource_class.pre_init_document(deepcopy(records[0]), woocommerce_server_url=SERVER_URL)
+	records = deepcopy(records)
+
+	start = time.perf_counter()
+	for record in records:
+		resource_class.pre_init_document(record, woocommerce_server_url=SERVER_URL)
+	return len(records) / (time.perf_counter() - start)
+
+
+def run(records: int = 1000):
+	orders = [get_order(i) for i in range(records)]
+	products = [get_product(i) for i in range(records)]
+
+	original_codec = json_codec.get_codec()
+	try:
+		for codec_name in json_codec.codecs:
+			json_codec.set_codec(codec_name)
+			print(f"{codec_name}: {measure(WooCommerceOrder, orders):,.0f} orders/s")
+			print(f"{codec_name}: {measure(WooCommerceProduct, products):,.0f} products/s")
+	finally:
+		json_codec.set_codec(original_codec.name)
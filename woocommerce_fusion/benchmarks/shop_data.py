@@ -0,0 +1,130 @@
+import random
+from typing import Dict, List
+
+from woocommerce_fusion.testing.fake_woocommerce_server import FakeWooCommerceServer
+
+FIRST_NAMES = ["John", "Jane", "Thabo", "Anika", "Pieter", "Lerato", "Maria", "Sipho"]
+LAST_NAMES = ["Doe", "Smith", "Nkosi", "van der Merwe", "Botha", "Naidoo", "Dlamini"]
+CITIES = [("Cape Town", "WC", "8001"), ("Johannesburg", "GP", "2000"), ("Durban", "KZN", "4001")]
+SIZES = ["S", "M", "L", "XL", "XXL"]
+COLOURS = ["Red", "Green", "Blue", "Black", "White"]
+
+
+def generate_shop_data(
+	wc_server: FakeWooCommerceServer,
+	products: int = 100,
+	variations_per_product: int = 0,
+	orders: int = 100,
+	registered_customers: int = 20,
+	guest_order_ratio: float = 0.3,
+	max_line_items: int = 5,
+	seed: int = 0,
+) -> Dict[str, int]:
+	"""
+	Fill a FakeWooCommerceServer with a synthetic shop: products (variable products with variations if
+	variations_per_product is set) and orders with realistic line items, from registered customers and
+	guests. Returns the number of records of every type.
+	"""
+	rng = random.Random(seed)
+
+	sellable: List[Dict] = []
+	for i in range(products):
+		price = f"{rng.randint(5, 500)}.00"
+		product = wc_server.add_product(
+			name=f"Product {i}",
+			slug=f"product-{i}",
+			sku=f"BENCH-{i}",
+			type="variable" if variations_per_product else "simple",
+			regular_price=price,
+			price=price,
+			description=f"<p>Description of product {i}</p>",
+			categories=[{"id": 1 + i % 5, "name": f"Category {i % 5}", "slug": f"category-{i % 5}"}],
+			attributes=[
+				{"id": 0, "name": "Size", "variation": True, "visible": True, "options": SIZES},
+				{"id": 0, "name": "Colour", "variation": True, "visible": True, "options": COLOURS},
+			]
+			if variations_per_product
+			else [],
+			meta_data=[{"key": "_benchmark", "value": str(i)}],
+		)
+		if not variations_per_product:
+			sellable.append({"product_id": product["id"], "variation_id": 0, "price": price})
+
+		for j in range(variations_per_product):
+			variation = wc_server.add_variation(
+				product["id"],
+				sku=f"BENCH-{i}-{j}",
+				regular_price=price,
+				price=price,
+				attributes=[
+					{"id": 0, "name": "Size", "option": SIZES[j % len(SIZES)]},
+					{"id": 0, "name": "Colour", "option": COLOURS[(j // len(SIZES)) % len(COLOURS)]},
+				],
+			)
+			sellable.append({"product_id": product["id"], "variation_id": variation["id"], "price": price})
+
+	customers = [get_customer(rng, customer_id) for customer_id in range(1, registered_customers + 1)]
+	guest_orders = 0
+	for i in range(orders if sellable else 0):
+		is_guest = not customers or rng.random() < guest_order_ratio
+		customer = get_customer(rng, 0) if is_guest else rng.choice(customers)
+		guest_orders += is_guest
+
+		line_items = []
+		for sellable_item in rng.sample(sellable, min(len(sellable), rng.randint(1, max_line_items))):
+			quantity = rng.randint(1, 3)
+			total = f"{float(sellable_item['price']) * quantity:.2f}"
+			line_items.append(
+				{
+					"product_id": sellable_item["product_id"],
+					"variation_id": sellable_item["variation_id"],
+					"quantity": quantity,
+					"price": float(sellable_item["price"]),
+					"subtotal": total,
+					"total": total,
+				}
+			)
+
+		wc_server.add_order(
+			status=rng.choice(["processing", "processing", "on-hold", "completed"]),
+			customer_id=customer["id"],
+			billing=customer["billing"],
+			shipping=customer["shipping"],
+			payment_method="bacs",
+			payment_method_title="Direct Bank Transfer",
+			line_items=line_items,
+			shipping_lines=[{"method_id": "flat_rate", "method_title": "Flat Rate", "total": "50.00"}],
+			shipping_total="50.00",
+			total=f"{sum(float(li['total']) for li in line_items) + 50:.2f}",
+			meta_data=[{"key": "_benchmark_order", "value": str(i)}],
+		)
+
+	return {
+		"products": products,
+		"variations": products * variations_per_product,
+		"orders": orders,
+		"guest_orders": guest_orders,
+		"registered_customers": registered_customers,
+	}
+
+
+def get_customer(rng: random.Random, customer_id: int) -> Dict:
+	first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+	city, state, postcode = rng.choice(CITIES)
+	email = f"{first_name}.{last_name}.{customer_id or rng.randint(1000, 9999999)}@example.com"
+	address = {
+		"first_name": first_name,
+		"last_name": last_name,
+		"company": "",
+		"address_1": f"{rng.randint(1, 999)} Main Road",
+		"address_2": "",
+		"city": city,
+		"state": state,
+		"postcode": postcode,
+		"country": "ZA",
+	}
+	return {
+		"id": customer_id,
+		"billing": {**address, "email": email.lower().replace(" ", ""), "phone": "021 555 0100"},
+		"shipping": address,
+	}
@@ -0,0 +1,241 @@
+"""
+Measures the synchronisation entry points against a FakeWooCommerceServer with synthetic shop data, and
+reports the wall time, HTTP calls, database queries and peak memory of every run. Run it on a dedicated
+site with ERPNext set up, as it creates a WooCommerce Server, Items, Customers and Sales Orders:
+
+	bench --site <site> execute woocommerce_fusion.benchmarks.sync_throughput.run
+	bench --site <site> execute woocommerce_fusion.benchmarks.sync_throughput.run \\
+		--kwargs "{'products': 500, 'variations_per_product': 3, 'orders': 1000, 'label': 'my-branch'}"
+
+Results are appended to a JSON Lines file in the site folder, and compared with the previous run with the
+same parameters.
+"""
+import json
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+import frappe
+from frappe.utils import now
+
+from woocommerce_fusion.benchmarks.shop_data import generate_shop_data
+from woocommerce_fusion.tasks.stock_update import (
+	update_stock_levels_for_all_enabled_items_in_background,
+)
+from woocommerce_fusion.tasks.sync_item_prices import run_item_price_sync
+from woocommerce_fusion.tasks.sync_items import sync_woocommerce_products_modified_since
+from woocommerce_fusion.tasks.sync_sales_orders import sync_woocommerce_orders_modified_since
+from woocommerce_fusion.testing.fake_woocommerce_server import FakeWooCommerceServer
+
+RESULTS_FILE = "woocommerce_fusion_benchmarks.jsonl"
+SYNC_FROM = "2000-01-01 00:00:00"
+SCENARIOS = ("products", "orders", "stock", "prices")
+
+
+def run(
+	products: int = 100,
+	variations_per_product: int = 0,
+	orders: int = 100,
+	latency: float = 0,
+	scenarios: Optional[List[str]] = None,
+	label: Optional[str] = None,
+	results_file: Optional[str] = None,
+) -> List[Dict]:
+	"""
+	Run the given scenarios (all by default, in the order products, orders, stock, prices) and return
+	their results
+	"""
+	parameters = {
+		"products": products,
+		"variations_per_product": variations_per_product,
+		"orders": orders,
+		"latency": latency,
+	}
+	results_file = results_file or frappe.get_site_path(RESULTS_FILE)
+	results = []
+
+	with FakeWooCommerceServer(latency=latency, seed=0) as fake_server:
+		generate_shop_data(
+			fake_server, products=products, variations_per_product=variations_per_product, orders=orders
+		)
+		wc_server = create_woocommerce_server(fake_server)
+		try:
+			for scenario in scenarios or SCENARIOS:
+				before_scenario(scenario, wc_server)
+				result = measure(get_entry_point(scenario), fake_server)
+				result.update(scenario=scenario, label=label, parameters=parameters, timestamp=now())
+				results.append(result)
+				print_result(result, get_previous_result(results_file, result))
+				save_result(results_file, result)
+		finally:
+			wc_server.reload()
+			wc_server.enable_sync = 0
+			wc_server.save()
+			frappe.db.commit()
+
+	return results
+
+
+def get_entry_point(scenario: str) -> Callable:
+	return {
+		"products": lambda: sync_woocommerce_products_modified_since(date_time_from=SYNC_FROM),
+		"orders": lambda: sync_woocommerce_orders_modified_since(date_time_from=SYNC_FROM),
+		"stock": update_stock_levels_for_all_enabled_items_in_background,
+		"prices": run_item_price_sync,
+	}[scenario]
+
+
+def before_scenario(scenario: str, wc_server):
+	"""
+	Prepare ERPNext data that a scenario needs, outside of the measurement
+	"""
+	if scenario == "prices":
+		# Change the price of every synchronised Item, so that every price has to be updated
+		for item_code in frappe.get_all(
+			"Item WooCommerce Server",
+			filters={"woocommerce_server": wc_server.name},
+			pluck="parent",
+		):
+			item_price = frappe.get_doc(
+				{
+					"doctype": "Item Price",
+					"item_code": item_code,
+					"price_list": wc_server.price_list,
+					"price_list_rate": 1234,
+				}
+			)
+			item_price.flags.ignore_permissions = True
+			item_price.insert()
+		frappe.db.commit()
+
+
+def measure(entry_point: Callable, fake_server: FakeWooCommerceServer) -> Dict:
+	"""
+	Run an entry point with background jobs executed immediately, and measure it
+	"""
+	fake_server.reset_request_counts()
+	with count_queries() as queries:
+		tracemalloc.start()
+		started_at = time.perf_counter()
+		try:
+			with patch("frappe.enqueue", side_effect=run_job_now):
+				entry_point()
+			frappe.db.commit()
+		finally:
+			wall_time = time.perf_counter() - started_at
+			peak_memory = tracemalloc.get_traced_memory()[1]
+			tracemalloc.stop()
+
+	return {
+		"wall_time": round(wall_time, 3),
+		"http_calls": sum(fake_server.request_counts.values()),
+		"http_calls_by_endpoint": {
+			f"{method} {route}": count for (method, route), count in fake_server.request_counts.items()
+		},
+		"db_queries": queries["total"],
+		"peak_memory_mb": round(peak_memory / 1024 / 1024, 2),
+	}
+
+
+@contextmanager
+def count_queries():
+	queries = Counter()
+	sql = frappe.db.sql
+
+	def counting_sql(*args, **kwargs):
+		queries["total"] += 1
+		return sql(*args, **kwargs)
+
+	with patch.object(frappe.db, "sql", counting_sql):
+		yield queries
+
+
+def run_job_now(method, **kwargs):
+	"""
+	Stand-in for frappe.enqueue, which runs the job in the current process
+	"""
+	for enqueue_argument in (
+		"queue",
+		"timeout",
+		"event",
+		"is_async",
+		"job_name",
+		"now",
+		"enqueue_after_commit",
+		"at_front",
+		"job_id",
+		"deduplicate",
+	):
+		kwargs.pop(enqueue_argument, None)
+	method = frappe.get_attr(method) if isinstance(method, str) else method
+	return method(**kwargs)
+
+
+def create_woocommerce_server(fake_server: FakeWooCommerceServer):
+	company = (
+		frappe.defaults.get_global_default("company") or frappe.get_all("Company", pluck="name")[0]
+	)
+	warehouse = frappe.db.get_value("Warehouse", {"company": company, "is_group": 0})
+
+	wc_server = frappe.new_doc("WooCommerce Server")
+	wc_server.update(
+		{
+			"woocommerce_server_url": fake_server.url,
+			"api_consumer_key": fake_server.consumer_key,
+			"api_consumer_secret": fake_server.consumer_secret,
+			"enable_sync": 1,
+			"company": company,
+			"creation_user": frappe.session.user,
+			"item_group": frappe.db.get_value("Item Group", {"is_group": 0}),
+			"warehouse": warehouse,
+			"tax_account": frappe.db.get_value(
+				"Account", {"company": company, "account_type": "Tax", "is_group": 0}
+			),
+			"f_n_f_account": frappe.db.get_value(
+				"Account", {"company": company, "account_type": "Chargeable", "is_group": 0}
+			),
+			"enable_stock_level_synchronisation": 1,
+			"enable_price_list_sync": 1,
+			"price_list": frappe.db.get_value("Price List", {"selling": 1, "enabled": 1}),
+		}
+	)
+	wc_server.append("warehouses", {"warehouse": warehouse})
+	wc_server.flags.ignore_mandatory = True
+	wc_server.insert(ignore_permissions=True)
+	frappe.db.commit()
+	return wc_server
+
+
+def get_previous_result(results_file: str, result: Dict) -> Optional[Dict]:
+	try:
+		with open(results_file) as f:
+			previous_results = [json.loads(line) for line in f if line.strip()]
+	except FileNotFoundError:
+		return None
+	return next(
+		(
+			previous
+			for previous in reversed(previous_results)
+			if previous["scenario"] == result["scenario"]
+			and previous["parameters"] == result["parameters"]
+		),
+		None,
+	)
+
+
+def save_result(results_file: str, result: Dict):
+	with open(results_file, "a") as f:
+		f.write(json.dumps(result) + "\n")
+
+
+def print_result(result: Dict, previous: Optional[Dict] = None):
+	print(f"{result['scenario']}:")
+	for metric in ("wall_time", "http_calls", "db_queries", "peak_memory_mb"):
+		line = f"  {metric}: {result[metric]}"
+		if previous and previous.get(metric):
+			change = (result[metric] - previous[metric]) / previous[metric] * 100
+			line += f" ({change:+.1f}% compared to {previous.get('label') or previous['timestamp']})"
+		print(line)
@@ -7,3 +7,7 @@ class SyncDisabledError(ValidationError):
 
 class WooCommerceOrderNotFoundError(ValidationError):
 	pass
+
+
+class CircuitOpenError(ValidationError):
+	pass
@@ -191,12 +191,13 @@ ignore_links_on_delete = [
 # Request Events
 # ----------------
 # before_request = ["woocommerce_fusion.utils.before_request"]
-# after_request = ["woocommerce_fusion.utils.after_request"]
+after_request = ["woocommerce_fusion.tasks.utils.flush_woocommerce_request_logs"]
 
 # Job Events
 # ----------
 # before_job = ["woocommerce_fusion.utils.before_job"]
-# after_job = ["woocommerce_fusion.utils.after_job"]
+# Only available from v15 onwards; sync and stock update jobs also flush themselves
+after_job = ["woocommerce_fusion.tasks.utils.flush_woocommerce_request_logs"]
 
 # User Data Protection
 # --------------------
@@ -5,7 +5,11 @@ from erpnext.selling.doctype.sales_order.sales_order import SalesOrder
 from frappe import _
 from frappe.model.naming import get_default_naming_series, make_autoname
 
-from woocommerce_fusion.tasks.sync_sales_orders import run_sales_order_sync
+from woocommerce_fusion.tasks.sync_sales_orders import (
+	SYNCHRONISED_SALES_ORDER_FIELDS,
+	get_synchronised_items,
+	run_sales_order_sync,
+)
 from woocommerce_fusion.woocommerce.woocommerce_api import (
 	generate_woocommerce_record_name_from_domain_and_id,
 )
@@ -47,6 +51,11 @@ class CustomSalesOrder(SalesOrder):
 		"""
 		This is called when a document's values has been changed (including db_set).
 		"""
+		# Changes to synchronised fields made in ERPNext should be compared with the WooCommerce Order
+		# again during the next sync
+		if not self.flags.created_by_sync and self.has_synchronised_field_changed():
+			self.clear_woocommerce_sync_hash()
+
 		# If Sales Order Status Sync is enabled, update the WooCommerce status of the Sales Order
 		if self.woocommerce_id and self.woocommerce_server:
 			wc_server = frappe.get_cached_doc("WooCommerce Server", self.woocommerce_server)
@@ -64,8 +73,32 @@ class CustomSalesOrder(SalesOrder):
 						frappe.db.set_value(
 							"Sales Order", self.name, "woocommerce_status", mapping.woocommerce_sales_order_status
 						)
+						self.clear_woocommerce_sync_hash()
 						frappe.enqueue(run_sales_order_sync, queue="long", sales_order_name=self.name)
 
+	def has_synchronised_field_changed(self) -> bool:
+		"""
+		Returns True if a field that is synchronised with the WooCommerce Order was changed. Changes made
+		by ERPNext itself, e.g. to the status or billing fields, are ignored
+		"""
+		doc_before_save = self.get_doc_before_save()
+		if not doc_before_save:
+			return False
+		if any(self.has_value_changed(fieldname) for fieldname in SYNCHRONISED_SALES_ORDER_FIELDS):
+			return True
+		return get_synchronised_items(doc_before_save) != get_synchronised_items(self)
+
+	def clear_woocommerce_sync_hash(self):
+		if self.custom_woocommerce_last_sync_hash:
+			frappe.db.set_value(
+				"Sales Order",
+				self.name,
+				"custom_woocommerce_last_sync_hash",
+				None,
+				update_modified=False,
+			)
+			self.custom_woocommerce_last_sync_hash = None
+
 
 @frappe.whitelist()
 def get_woocommerce_order_shipment_trackings(doc):
@@ -102,6 +102,35 @@ class TestCustomSalesOrder(FrappeTestCase):
 		# Expect WEB[x]-[yyyyyy] where x = 1 because it's the first item servers list, and yyy = 000123 because the woocommerce id = 123
 		self.assertEqual(sales_order.name, "WEB1-000123")
 
+	def test_sync_hash_is_only_cleared_when_synchronised_fields_change(
+		self, mock_get_woocommerce_order
+	):
+		"""
+		Test that the last sync hash is kept when other fields are changed or the sync saves the
+		Sales Order, and cleared when a field that is synchronised with WooCommerce is changed
+		"""
+		sales_order = create_so()
+
+		def save_and_get_sync_hash(created_by_sync=False, **values):
+			sales_order.db_set("custom_woocommerce_last_sync_hash", "2024-01-01T00:00:00")
+			doc = frappe.get_doc("Sales Order", sales_order.name)
+			doc.update(values)
+			doc.flags.created_by_sync = created_by_sync
+			doc.save()
+			return frappe.db.get_value("Sales Order", sales_order.name, "custom_woocommerce_last_sync_hash")
+
+		# A field that is not synchronised with WooCommerce
+		self.assertEqual(save_and_get_sync_hash(po_no="PO-0001"), "2024-01-01T00:00:00")
+
+		# A field in SYNCHRONISED_SALES_ORDER_FIELDS
+		self.assertIsNone(save_and_get_sync_hash(custom_woocommerce_customer_note="Leave at the door"))
+
+		# A synchronised field changed by the sync itself
+		self.assertEqual(
+			save_and_get_sync_hash(created_by_sync=True, custom_woocommerce_customer_note="Ring the bell"),
+			"2024-01-01T00:00:00",
+		)
+
 
 def create_so(woocommerce_id: str = None, woocommerce_server_url: str = None):
 	so = frappe.new_doc("Sales Order")
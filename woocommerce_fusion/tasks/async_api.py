@@ -0,0 +1,169 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from woocommerce_fusion.exceptions import CircuitOpenError
+from woocommerce_fusion.tasks.utils import (
+	DEFAULT_HTTP_POOL_SIZE,
+	RETRYABLE_STATUS_CODES,
+	APIWithRequestLogging,
+	get_api_kwargs,
+)
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 5
+
+
+class AsyncAPIWithRequestLogging(APIWithRequestLogging):
+	"""
+	WooCommerce API with Request Logging that sends its requests with an asyncio HTTP client (httpx).
+
+	get, post, put, delete and options are coroutines with the same arguments as those of
+	APIWithRequestLogging, and share its request logging, retries, rate limiting and circuit breaker.
+	Use it as an async context manager, so that its connections are closed afterwards.
+
+	Request logging and the circuit breaker use Redis through blocking calls, so they are run in a
+	thread to keep the event loop free for the other requests.
+	"""
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._client: Optional[httpx.AsyncClient] = None
+
+	async def __aenter__(self) -> "AsyncAPIWithRequestLogging":
+		self.get_client()
+		return self
+
+	async def __aexit__(self, *exc_info):
+		await self.aclose()
+
+	def get_client(self) -> httpx.AsyncClient:
+		if self._client is None:
+			pool_size = self.pool_size or DEFAULT_HTTP_POOL_SIZE
+			self._client = httpx.AsyncClient(
+				verify=self.verify_ssl,
+				timeout=self.timeout,
+				limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+			)
+		return self._client
+
+	async def aclose(self):
+		if self._client is not None:
+			await self._client.aclose()
+			self._client = None
+
+	async def get(self, endpoint, **kwargs):
+		return await self._request("GET", endpoint, None, **kwargs)
+
+	async def post(self, endpoint, data, **kwargs):
+		return await self._request("POST", endpoint, data, **kwargs)
+
+	async def put(self, endpoint, data, **kwargs):
+		return await self._request("PUT", endpoint, data, **kwargs)
+
+	async def delete(self, endpoint, **kwargs):
+		return await self._request("DELETE", endpoint, None, **kwargs)
+
+	async def options(self, endpoint, **kwargs):
+		return await self._request("OPTIONS", endpoint, None, **kwargs)
+
+	async def _request(self, method, endpoint, data, params=None, **kwargs):
+		"""Send a request, and retry idempotent requests that failed temporarily"""
+		attempt = 0
+		while True:
+			try:
+				result = await self._send_and_log_request_async(method, endpoint, data, params, **kwargs)
+			except httpx.TransportError:
+				if not self.should_retry(method, attempt):
+					raise
+				retry_after = None
+			else:
+				if result.status_code not in RETRYABLE_STATUS_CODES or not self.should_retry(method, attempt):
+					return result
+				retry_after = result.headers.get("retry-after")
+
+			await asyncio.sleep(self.get_retry_delay(attempt, retry_after))
+			attempt += 1
+
+	async def _send_and_log_request_async(self, method, endpoint, data, params=None, **kwargs):
+		"""Send a request, and also create a 'WooCommerce Request Log'"""
+		result = None
+		try:
+			result = await self._send_request_async(method, endpoint, data, params, **kwargs)
+			await asyncio.to_thread(self.log_response, method, endpoint, data, params, result)
+			return result
+		except CircuitOpenError:
+			# No request was sent
+			raise
+		except Exception as e:
+			await asyncio.to_thread(self.log_error, method, endpoint, data, params, result)
+			raise e
+
+	async def _send_request_async(self, method, endpoint, data, params=None, **kwargs):
+		extra_headers = kwargs.pop("headers", None)
+		url, auth, params, data, headers = self._prepare_request(
+			method, endpoint, data, params, extra_headers, **kwargs
+		)
+
+		circuit_breaker = self.circuit_breaker
+		is_probe = (
+			await asyncio.to_thread(circuit_breaker.before_request) if circuit_breaker else False
+		)
+
+		# Wait without blocking the other requests of this event loop
+		rate_limiter = self.rate_limiter
+		if rate_limiter and (wait := rate_limiter.reserve()) > 0:
+			await asyncio.sleep(wait)
+
+		started_at = time.monotonic()
+		try:
+			response = await self.get_client().request(
+				method=method,
+				url=url,
+				auth=auth,
+				params=params,
+				content=data,
+				headers=headers,
+				**kwargs,
+			)
+		except httpx.TransportError:
+			await asyncio.to_thread(
+				self._record_outcome, circuit_breaker, is_probe, rate_limiter, started_at
+			)
+			raise
+
+		await asyncio.to_thread(
+			self._record_outcome, circuit_breaker, is_probe, rate_limiter, started_at, response
+		)
+		return response
+
+
+def send_requests(
+	server,
+	requests: Iterable[Tuple[str, str, Dict]],
+	max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+) -> List:
+	"""
+	Send (method, endpoint, kwargs) requests to a WooCommerce Server, with at most
+	max_concurrent_requests requests in flight at a time.
+
+	Returns the responses in the order of the requests, or the exception that was raised for a request.
+	This blocks until all requests are done, so that the caller can keep using the Frappe ORM as usual.
+	"""
+
+	async def send_all():
+		semaphore = asyncio.Semaphore(max_concurrent_requests)
+		async with AsyncAPIWithRequestLogging(**get_api_kwargs(server)) as wc_api:
+
+			async def send(method, endpoint, kwargs):
+				kwargs = dict(kwargs)
+				async with semaphore:
+					return await wc_api._request(method, endpoint, kwargs.pop("data", None), **kwargs)
+
+			return await asyncio.gather(
+				*(send(method, endpoint, kwargs) for method, endpoint, kwargs in requests),
+				return_exceptions=True,
+			)
+
+	return asyncio.run(send_all())
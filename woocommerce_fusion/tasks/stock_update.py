@@ -1,8 +1,18 @@
 import math
+from traceback import format_exception
+from typing import Dict, List, Tuple
 
 import frappe
+from frappe.model.document import Document
 
-from woocommerce_fusion.tasks.utils import APIWithRequestLogging
+from woocommerce_fusion.tasks.async_api import send_requests
+from woocommerce_fusion.tasks.utils import (
+	APIWithRequestLogging,
+	flush_request_logs_afterwards,
+	get_api_kwargs,
+)
+
+STOCK_SYNC_BATCH_SIZE = 100
 
 
 def update_stock_levels_for_woocommerce_item(doc, method):
@@ -31,7 +41,8 @@ def update_stock_levels_for_woocommerce_item(doc, method):
 
 def update_stock_levels_for_all_enabled_items_in_background():
 	"""
-	Get all enabled ERPNext Items and post stock updates to WooCommerce
+	Get all enabled ERPNext Items and post stock updates to WooCommerce, in batches of
+	STOCK_SYNC_BATCH_SIZE Items per background job
 	"""
 	erpnext_items = []
 	current_page_length = 500
@@ -50,14 +61,16 @@ def update_stock_levels_for_all_enabled_items_in_background():
 		current_page_length = len(items)
 		start += current_page_length
 
-	for item in erpnext_items:
+	for i in range(0, len(erpnext_items), STOCK_SYNC_BATCH_SIZE):
 		frappe.enqueue(
-			"woocommerce_fusion.tasks.stock_update.update_stock_levels_on_woocommerce_site",
-			item_code=item.name,
+			"woocommerce_fusion.tasks.stock_update.update_stock_levels_on_woocommerce_sites",
+			queue="long",
+			item_codes=[item.name for item in erpnext_items[i : i + STOCK_SYNC_BATCH_SIZE]],
 		)
 
 
 @frappe.whitelist()
+@flush_request_logs_afterwards
 def update_stock_levels_on_woocommerce_site(item_code):
 	"""
 	Updates stock levels of an item on all its associated WooCommerce sites.
@@ -71,72 +84,128 @@ def update_stock_levels_on_woocommerce_site(item_code):
 	if len(item.woocommerce_servers) == 0 or not item.is_stock_item or item.disabled:
 		return False
 	else:
-		bins = frappe.get_list(
-			"Bin", {"item_code": item_code}, ["name", "warehouse", "reserved_qty", "actual_qty"]
-		)
+		for wc_server, endpoint, data_to_post in get_stock_level_updates(item):
+			wc_api = APIWithRequestLogging(**get_api_kwargs(wc_server))
+			try:
+				response = wc_api.put(endpoint=endpoint, data=data_to_post)
+			except Exception as err:
+				log_stock_level_update_error(data_to_post)
+				raise err
+			if response.status_code != 200:
+				error_message = log_stock_level_update_error(data_to_post, response)
+				raise ValueError(error_message)
 
-		for wc_site in item.woocommerce_servers:
-			if wc_site.woocommerce_id:
-				woocommerce_id = wc_site.woocommerce_id
-				woocommerce_server = wc_site.woocommerce_server
-				wc_server = frappe.get_cached_doc("WooCommerce Server", woocommerce_server)
-
-				if (
-					not wc_server
-					or not wc_server.enable_sync
-					or not wc_site.enabled
-					or not wc_server.enable_stock_level_synchronisation
-				):
-					continue
+		return True
 
-				wc_api = APIWithRequestLogging(
-					url=wc_server.woocommerce_server_url,
-					consumer_key=wc_server.api_consumer_key,
-					consumer_secret=wc_server.api_consumer_secret,
-					version="wc/v3",
-					timeout=40,
+
+@flush_request_logs_afterwards
+def update_stock_levels_on_woocommerce_sites(item_codes: List[str]):
+	"""
+	Updates stock levels of a batch of items on all their associated WooCommerce sites.
+
+	The stock levels are calculated first, after which the requests to each WooCommerce site are sent
+	concurrently. Failed updates are logged, without stopping the updates of the other items.
+	"""
+	updates_per_server: Dict[str, Tuple[Document, List[Tuple[str, Dict]]]] = {}
+	for item_code in item_codes:
+		item = frappe.get_doc("Item", item_code)
+		if len(item.woocommerce_servers) == 0 or not item.is_stock_item or item.disabled:
+			continue
+		try:
+			for wc_server, endpoint, data_to_post in get_stock_level_updates(item):
+				updates_per_server.setdefault(wc_server.name, (wc_server, []))[1].append(
+					(endpoint, data_to_post)
 				)
+		except Exception:
+			frappe.log_error("WooCommerce Error", frappe.get_traceback())
 
-				# Sum all quantities from select warehouses and round the total down (WooCommerce API doesn't accept float values)
-				data_to_post = {
-					"stock_quantity": math.floor(
-						sum(
-							bin.actual_qty
-							if not wc_server.subtract_reserved_stock
-							else bin.actual_qty - bin.reserved_qty
-							for bin in bins
-							if bin.warehouse in [row.warehouse for row in wc_server.warehouses]
-						)
-					)
-				}
-
-				try:
-					parent_item_id = item.variant_of
-					if parent_item_id:
-						parent_item = frappe.get_doc("Item", parent_item_id)
-						# Get the parent item's woocommerce_id
-						for parent_wc_site in parent_item.woocommerce_servers:
-							if parent_wc_site.woocommerce_server == woocommerce_server:
-								parent_woocommerce_id = parent_wc_site.woocommerce_id
-								break
-						if not parent_woocommerce_id:
-							continue
-						endpoint = f"products/{parent_woocommerce_id}/variations/{woocommerce_id}"
-					else:
-						endpoint = f"products/{woocommerce_id}"
-					response = wc_api.put(endpoint=endpoint, data=data_to_post)
-				except Exception as err:
-					error_message = f"{frappe.get_traceback()}\n\nData in PUT request: \n{str(data_to_post)}"
-					frappe.log_error("WooCommerce Error", error_message)
-					raise err
-				if response.status_code != 200:
-					error_message = f"Status Code not 200\n\nData in PUT request: \n{str(data_to_post)}"
-					error_message += (
-						f"\n\nResponse: \n{response.status_code}\nResponse Text: {response.text}\nRequest URL: {response.request.url}\nRequest Body: {response.request.body}"
-						if response is not None
-						else ""
+	for wc_server, updates in updates_per_server.values():
+		responses = send_requests(
+			wc_server, [("PUT", endpoint, {"data": data_to_post}) for endpoint, data_to_post in updates]
+		)
+		for (_endpoint, data_to_post), response in zip(updates, responses):
+			if isinstance(response, Exception):
+				log_stock_level_update_error(data_to_post, exception=response)
+			elif response.status_code != 200:
+				log_stock_level_update_error(data_to_post, response)
+
+
+def get_stock_level_updates(item: Document) -> List[Tuple[Document, str, Dict]]:
+	"""
+	Returns the WooCommerce Server, endpoint and data of the stock level update for each of an item's
+	WooCommerce sites that has stock level synchronisation enabled
+	"""
+	bins = frappe.get_list(
+		"Bin", {"item_code": item.name}, ["name", "warehouse", "reserved_qty", "actual_qty"]
+	)
+
+	updates = []
+	for wc_site in item.woocommerce_servers:
+		if wc_site.woocommerce_id:
+			woocommerce_id = wc_site.woocommerce_id
+			woocommerce_server = wc_site.woocommerce_server
+			wc_server = frappe.get_cached_doc("WooCommerce Server", woocommerce_server)
+
+			if (
+				not wc_server
+				or not wc_server.enable_sync
+				or not wc_site.enabled
+				or not wc_server.enable_stock_level_synchronisation
+			):
+				continue
+
+			# Sum all quantities from select warehouses and round the total down (WooCommerce API doesn't accept float values)
+			data_to_post = {
+				"stock_quantity": math.floor(
+					sum(
+						bin.actual_qty
+						if not wc_server.subtract_reserved_stock
+						else bin.actual_qty - bin.reserved_qty
+						for bin in bins
+						if bin.warehouse in [row.warehouse for row in wc_server.warehouses]
 					)
-					frappe.log_error("WooCommerce Error", error_message)
-					raise ValueError(error_message)
+				)
+			}
+
+			parent_item_id = item.variant_of
+			if parent_item_id:
+				parent_woocommerce_id = None
+				parent_item = frappe.get_doc("Item", parent_item_id)
+				# Get the parent item's woocommerce_id
+				for parent_wc_site in parent_item.woocommerce_servers:
+					if parent_wc_site.woocommerce_server == woocommerce_server:
+						parent_woocommerce_id = parent_wc_site.woocommerce_id
+						break
+				if not parent_woocommerce_id:
+					continue
+				endpoint = f"products/{parent_woocommerce_id}/variations/{woocommerce_id}"
+			else:
+				endpoint = f"products/{woocommerce_id}"
 
-		return True
+			updates.append((wc_server, endpoint, data_to_post))
+
+	return updates
+
+
+def log_stock_level_update_error(data_to_post: Dict, response=None, exception=None) -> str:
+	"""
+	Create an "Error Log" for a failed stock level update, and return its message
+	"""
+	if response is not None:
+		error_message = f"Status Code not 200\n\nData in PUT request: \n{str(data_to_post)}"
+		# requests' PreparedRequest has a 'body', httpx's Request has 'content' instead
+		request_body = getattr(response.request, "body", None) or getattr(
+			response.request, "content", None
+		)
+		if isinstance(request_body, bytes):
+			request_body = request_body.decode("utf-8", errors="replace")
+		error_message += f"\n\nResponse: \n{response.status_code}\nResponse Text: {response.text}\nRequest URL: {response.request.url}\nRequest Body: {request_body}"
+	else:
+		traceback = (
+			"".join(format_exception(type(exception), exception, exception.__traceback__))
+			if exception
+			else frappe.get_traceback()
+		)
+		error_message = f"{traceback}\n\nData in PUT request: \n{str(data_to_post)}"
+	frappe.log_error("WooCommerce Error", error_message)
+	return error_message
@@ -1,10 +1,11 @@
 import base64
 import hashlib
 import hmac
-from typing import List
+from typing import Dict, List
 
 import frappe
 from frappe import _, _dict
+from frappe.utils import add_to_date, cstr, now
 
 from woocommerce_fusion.woocommerce.doctype.woocommerce_server.woocommerce_server import (
 	WooCommerceServer,
@@ -27,6 +28,61 @@ class SynchroniseWooCommerce:
 		return [frappe.get_doc("WooCommerce Server", server.name) for server in wc_servers]
 
 
+# Number of seconds that the progress of a failed scheduled synchronisation is kept for
+SYNC_CHECKPOINT_TTL = 7 * 24 * 60 * 60
+
+
+class SyncCheckpoint:
+	"""
+	Progress of a scheduled synchronisation of records modified since date_time_from, kept in the
+	cache so that a run that failed resumes where it stopped, instead of starting from scratch.
+
+	Records are listed in order of modification per stream, e.g. per WooCommerce Server and order
+	status. The modification date of the last handled record of each stream is saved, and streams that
+	were completed are skipped. The progress only applies to later runs from the same date_time_from.
+
+	'started' is the time at which the first of these runs started, from which the next
+	synchronisation should list records once all streams are completed
+	"""
+
+	def __init__(self, sync_name: str, date_time_from) -> None:
+		self.cache_key = f"woocommerce_sync_checkpoint|{sync_name}"
+		self.date_time_from = cstr(date_time_from)
+		checkpoint = frappe.cache().get_value(self.cache_key)
+		if checkpoint and checkpoint.get("date_time_from") == self.date_time_from:
+			self.started: str = checkpoint["started"]
+			self.streams: Dict[str, Dict] = checkpoint["streams"]
+		else:
+			self.started = now()
+			self.streams = {}
+
+	def is_done(self, stream: str) -> bool:
+		return bool(self.streams.get(stream, {}).get("done"))
+
+	def get_date_time_from(self, stream: str) -> str:
+		"""
+		Returns the modification date from which a stream's records should be listed
+		"""
+		if modified := self.streams.get(stream, {}).get("modified"):
+			# Records with the same modification date as the last handled record may not have been listed
+			return cstr(add_to_date(modified, seconds=-1))
+		return self.date_time_from
+
+	def save(self, stream: str, modified=None, done: bool = False):
+		"""
+		Save the modification date of the last handled record of a stream, or that it was completed
+		"""
+		self.streams[stream] = {"modified": cstr(modified) if modified else None, "done": done}
+		frappe.cache().set_value(
+			self.cache_key,
+			{"date_time_from": self.date_time_from, "started": self.started, "streams": self.streams},
+			expires_in_sec=SYNC_CHECKPOINT_TTL,
+		)
+
+	def clear(self):
+		frappe.cache().delete_value(self.cache_key)
+
+
 def log_and_raise_error(err):
 	"""
 	Create an "Error Log" and raise error
@@ -1,4 +1,3 @@
-from time import sleep
 from typing import List, Optional
 
 import frappe
@@ -7,6 +6,10 @@ from frappe import qb
 from frappe.query_builder import Criterion
 
 from woocommerce_fusion.tasks.sync import SynchroniseWooCommerce
+from woocommerce_fusion.tasks.utils import flush_request_logs_afterwards
+from woocommerce_fusion.woocommerce.doctype.woocommerce_product.woocommerce_product import (
+	WooCommerceProduct,
+)
 from woocommerce_fusion.woocommerce.doctype.woocommerce_server.woocommerce_server import (
 	WooCommerceServer,
 )
@@ -32,6 +35,7 @@ def run_item_price_sync_in_background():
 
 
 @frappe.whitelist()
+@flush_request_logs_afterwards
 def run_item_price_sync(
 	item_code: Optional[str] = None, item_price_doc: Optional[ItemPrice] = None
 ):
@@ -105,6 +109,7 @@ class SynchroniseItemPrice(SynchroniseWooCommerce):
 		"""
 		Synchronise Item Prices with WooCommerce Products
 		"""
+		wc_products_to_update = []
 		for item_price in self.item_price_list:
 			# Get the WooCommerce Product doc
 			wc_product_name = generate_woocommerce_record_name_from_domain_and_id(
@@ -131,10 +136,15 @@ class SynchroniseItemPrice(SynchroniseWooCommerce):
 					else wc_product.regular_price
 				)
 				if wc_product_regular_price != price_list_rate:
+					wc_product.set_doc_before_save()
 					wc_product.regular_price = price_list_rate
-					wc_product.save()
+					wc_products_to_update.append(wc_product)
 			except Exception:
 				error_message = f"{frappe.get_traceback()}\n\n Product Data: \n{str(wc_product.as_dict())}"
 				frappe.log_error("WooCommerce Error: Price List Sync", error_message)
 
-			sleep(self.wc_server.price_list_delay_per_item)
+		# Update the changed prices using WooCommerce's batch endpoints
+		for result in WooCommerceProduct.bulk_save(wc_products_to_update):
+			if not result.success:
+				error_message = f"{result.error}\n\n Product Data: \n{str(result.record.as_dict())}"
+				frappe.log_error("WooCommerce Error: Price List Sync", error_message)
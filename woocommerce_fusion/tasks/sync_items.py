@@ -1,7 +1,7 @@
 import json
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 
 import frappe
 from erpnext.stock.doctype.item.item import Item
@@ -11,7 +11,8 @@ from frappe.utils import get_datetime, now
 from jsonpath_ng.ext import parse
 
 from woocommerce_fusion.exceptions import SyncDisabledError
-from woocommerce_fusion.tasks.sync import SynchroniseWooCommerce
+from woocommerce_fusion.tasks.sync import SyncCheckpoint, SynchroniseWooCommerce
+from woocommerce_fusion.tasks.utils import flush_request_logs_afterwards
 from woocommerce_fusion.woocommerce.doctype.woocommerce_product.woocommerce_product import (
 	WooCommerceProduct,
 )
@@ -95,6 +96,7 @@ def run_item_sync(
 	)
 
 
+@flush_request_logs_afterwards
 def sync_woocommerce_products_modified_since(date_time_from=None):
 	"""
 	Get list of WooCommerce products modified since date_time_from
@@ -115,18 +117,37 @@ def sync_woocommerce_products_modified_since(date_time_from=None):
 		)
 		raise ValueError(error_text)
 
-	wc_products = get_list_of_wc_products(date_time_from=date_time_from)
-	for wc_product in wc_products:
-		try:
-			run_item_sync(woocommerce_product=wc_product, enqueue=True)
-		# Skip items with errors, as these exceptions will be logged
-		except Exception:
-			pass
+	# Products are listed from the least recently modified, so that a run that failed resumes after
+	# the last product that was handled
+	checkpoint = SyncCheckpoint("products", date_time_from)
+	for server in frappe.get_all("WooCommerce Server", filters={"enable_sync": 1}, pluck="name"):
+		if checkpoint.is_done(server):
+			continue
+
+		last_product = None
+		for wc_product in iter_wc_products(
+			date_time_from=checkpoint.get_date_time_from(server),
+			servers=[server],
+			order_by="date_modified asc",
+		):
+			# A product and its variations were handled once the next product is listed
+			if not wc_product.parent_id:
+				if last_product:
+					checkpoint.save(server, modified=last_product.modified)
+				last_product = wc_product
+
+			try:
+				run_item_sync(woocommerce_product=wc_product, enqueue=True)
+			# Skip items with errors, as these exceptions will be logged
+			except Exception:
+				pass
+		checkpoint.save(server, done=True)
 
 	wc_settings.reload()
-	wc_settings.wc_last_sync_date_items = now()
+	wc_settings.wc_last_sync_date_items = checkpoint.started
 	wc_settings.flags.ignore_mandatory = True
 	wc_settings.save()
+	checkpoint.clear()
 
 
 @dataclass
@@ -157,6 +178,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
 		self.woocommerce_product = woocommerce_product
 		self.settings = frappe.get_cached_doc("WooCommerce Integration Settings")
 
+	@flush_request_logs_afterwards
 	def run(self):
 		"""
 		Run synchronisation
@@ -275,7 +297,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
 
 		wc_server = frappe.get_cached_doc("WooCommerce Server", woocommerce_product.woocommerce_server)
 		if wc_server.enable_image_sync:
-			wc_product_images = json.loads(woocommerce_product.images)
+			wc_product_images = woocommerce_product.get_json("images")
 			if len(wc_product_images) > 0:
 				if item.item.image != wc_product_images[0]["src"]:
 					item.item.image = wc_product_images[0]["src"]
@@ -393,7 +415,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
 		# Handle variants' attributes
 		if wc_product.type in ["variable", "variation"]:
 			self.create_or_update_item_attributes(wc_product)
-			wc_attributes = json.loads(wc_product.attributes)
+			wc_attributes = wc_product.get_json("attributes")
 			for wc_attribute in wc_attributes:
 				row = item.append("attributes")
 				row.attribute = wc_attribute["name"]
@@ -429,7 +451,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
 		item.flags.created_by_sync = True
 
 		if wc_server.enable_image_sync:
-			wc_product_images = json.loads(wc_product.images)
+			wc_product_images = wc_product.get_json("images")
 			if len(wc_product_images) > 0:
 				item.image = wc_product_images[0]["src"]
 
@@ -454,7 +476,7 @@ class SynchroniseItem(SynchroniseWooCommerce):
 		Create or update an Item Attribute
 		"""
 		if wc_product.attributes:
-			wc_attributes = json.loads(wc_product.attributes)
+			wc_attributes = wc_product.get_json("attributes")
 			for wc_attribute in wc_attributes:
 				if frappe.db.exists("Item Attribute", wc_attribute["name"]):
 					# Get existing Item Attribute
@@ -601,18 +623,29 @@ def get_list_of_wc_products(
 	"""
 	Fetches a list of WooCommerce Products within a specified date range or linked with an Item, using pagination.
 
+	At least one of date_time_from, item parameters are required
+	"""
+	return list(iter_wc_products(item=item, date_time_from=date_time_from))
+
+
+def iter_wc_products(
+	item: Optional[ERPNextItemToSync] = None,
+	date_time_from: Optional[datetime] = None,
+	servers: Optional[List[str]] = None,
+	order_by: Optional[str] = None,
+) -> Iterator[WooCommerceProduct]:
+	"""
+	Returns a generator of WooCommerce Products within a specified date range or linked with an Item.
+	Every page is requested once, and only when the previous page has been consumed.
+
+	If servers are specified, only the products of those WooCommerce Servers are listed.
+
 	At least one of date_time_from, item parameters are required
 	"""
 	if not any([date_time_from, item]):
 		raise ValueError("At least one of date_time_from or item parameters are required")
 
-	wc_records_per_page_limit = 100
-	page_length = wc_records_per_page_limit
-	new_results = True
-	start = 0
 	filters = []
-	wc_products = []
-	servers = None
 
 	# Build filters
 	if date_time_from:
@@ -621,24 +654,14 @@ def get_list_of_wc_products(
 		filters.append(["WooCommerce Product", "id", "=", item.item_woocommerce_server.woocommerce_id])
 		servers = [item.item_woocommerce_server.woocommerce_server]
 
-	while new_results:
-		woocommerce_product = frappe.get_doc({"doctype": "WooCommerce Product"})
-		new_results = woocommerce_product.get_list(
-			args={
-				"filters": filters,
-				"page_lenth": page_length,
-				"start": start,
-				"servers": servers,
-				"as_doc": True,
-			}
-		)
-		for wc_product in new_results:
-			wc_products.append(wc_product)
-		start += page_length
-		if len(new_results) < page_length:
-			new_results = []
-
-	return wc_products
+	# Products that are listed again by consecutive syncs are only retrieved if they were modified
+	return WooCommerceProduct.iter_records(
+		filters=filters,
+		servers=servers,
+		as_doc=True,
+		revalidate=bool(date_time_from),
+		order_by=order_by,
+	)
 
 
 def get_item_price_rate(item: ERPNextItemToSync):
@@ -665,6 +688,7 @@ def get_item_price_rate(item: ERPNextItemToSync):
 		)
 
 
+@flush_request_logs_afterwards
 def clear_sync_hash_and_run_item_sync(item_code: str):
 	"""
 	Clear the last sync hash value using db.set_value, as it does not call the ORM triggers
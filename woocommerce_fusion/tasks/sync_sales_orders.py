@@ -1,23 +1,43 @@
 import json
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Optional
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import frappe
 from erpnext.selling.doctype.sales_order.sales_order import SalesOrder
 from frappe import _
-from frappe.utils import get_datetime
-from frappe.utils.data import cstr, now
+from frappe.utils import cint, flt, get_datetime
+from frappe.utils.data import cstr
 
 from woocommerce_fusion.exceptions import SyncDisabledError, WooCommerceOrderNotFoundError
-from woocommerce_fusion.tasks.sync import SynchroniseWooCommerce
+from woocommerce_fusion.tasks.sync import SyncCheckpoint, SynchroniseWooCommerce
 from woocommerce_fusion.tasks.sync_items import run_item_sync
+from woocommerce_fusion.tasks.utils import flush_request_logs_afterwards
 from woocommerce_fusion.woocommerce.doctype.woocommerce_order.woocommerce_order import (
 	WC_ORDER_STATUS_MAPPING,
 	WC_ORDER_STATUS_MAPPING_REVERSE,
 	WooCommerceOrder,
 )
+from woocommerce_fusion.woocommerce.doctype.woocommerce_product.woocommerce_product import (
+	WooCommerceProduct,
+)
 from woocommerce_fusion.woocommerce.woocommerce_api import (
+	WC_RECORDS_PER_PAGE_LIMIT,
 	generate_woocommerce_record_name_from_domain_and_id,
+	get_domain_and_id_from_woocommerce_record_name,
+)
+
+# Number of WooCommerce Orders per background job, if not set in WooCommerce Integration Settings
+ORDER_SYNC_BATCH_SIZE = 50
+ORDER_SYNC_SAVEPOINT = "woocommerce_order_sync"
+
+# Sales Order fields that are compared with the WooCommerce Order, apart from the items
+SYNCHRONISED_SALES_ORDER_FIELDS = (
+	"woocommerce_status",
+	"custom_woocommerce_customer_note",
+	"woocommerce_payment_method",
 )
 
 
@@ -31,6 +51,7 @@ def run_sales_order_sync_from_hook(doc, method):
 
 
 @frappe.whitelist()
+@flush_request_logs_afterwards
 def run_sales_order_sync(
 	sales_order_name: Optional[str] = None,
 	sales_order: Optional[SalesOrder] = None,
@@ -53,7 +74,9 @@ def run_sales_order_sync(
 			woocommerce_order = frappe.get_doc(
 				{"doctype": "WooCommerce Order", "name": woocommerce_order_name}
 			)
-			woocommerce_order.load_from_db()
+			# Orders received through the "Order Created" webhook are only retrieved again if necessary
+			if not woocommerce_order.load_from_webhook_payload():
+				woocommerce_order.load_from_db()
 
 		# Trigger sync
 		sync = SynchroniseSalesOrder(woocommerce_order=woocommerce_order)
@@ -80,6 +103,7 @@ def run_sales_order_sync(
 	)
 
 
+@flush_request_logs_afterwards
 def sync_woocommerce_orders_modified_since(date_time_from=None):
 	"""
 	Get list of WooCommerce orders modified since date_time_from
@@ -100,19 +124,237 @@ def sync_woocommerce_orders_modified_since(date_time_from=None):
 		)
 		raise ValueError(error_text)
 
-	wc_orders = get_list_of_wc_orders(date_time_from=date_time_from)
-	wc_orders += get_list_of_wc_orders(date_time_from=date_time_from, status="trash")
-	for wc_order in wc_orders:
-		try:
-			run_sales_order_sync(woocommerce_order=wc_order, enqueue=True)
-		# Skip orders with errors, as these exceptions will be logged
-		except Exception:
-			pass
+	# Only list the names of modified orders, and hand the ones that were not synchronised yet to
+	# background jobs in batches. Trashed orders are listed separately, as WooCommerce only returns them
+	# when asked for explicitly.
+	# Orders are listed from the least recently modified, so that a run that failed resumes after the
+	# last batch that was handed to a background job
+	checkpoint = SyncCheckpoint("orders", date_time_from)
+	batch_size = cint(wc_settings.order_sync_batch_size) or ORDER_SYNC_BATCH_SIZE
+	for server in frappe.get_all("WooCommerce Server", filters={"enable_sync": 1}, pluck="name"):
+		for status in (None, "trash"):
+			stream = f"{server}|{status or 'any'}"
+			if checkpoint.is_done(stream):
+				continue
+
+			wc_orders = skip_synchronised_orders(
+				iter_wc_orders(
+					date_time_from=checkpoint.get_date_time_from(stream),
+					status=status,
+					fields=["id", "modified"],
+					servers=[server],
+					order_by="date_modified asc",
+				)
+			)
+			while batch := list(islice(wc_orders, batch_size)):
+				frappe.enqueue(
+					run_sales_order_sync_batch,
+					queue="long",
+					woocommerce_order_names=[wc_order.name for wc_order in batch],
+					status=status,
+				)
+				checkpoint.save(stream, modified=batch[-1].modified)
+			checkpoint.save(stream, done=True)
 
 	wc_settings.reload()
-	wc_settings.wc_last_sync_date = now()
+	wc_settings.wc_last_sync_date = checkpoint.started
 	wc_settings.flags.ignore_mandatory = True
 	wc_settings.save()
+	checkpoint.clear()
+
+
+def skip_synchronised_orders(wc_orders: Iterable[WooCommerceOrder]) -> Iterator[WooCommerceOrder]:
+	"""
+	Yields the WooCommerce Orders that need to be synchronised, skipping orders whose Sales Order was
+	already synchronised with their current modification date and doesn't need a Payment Entry anymore.
+
+	The Sales Orders are retrieved with a single query per page of WooCommerce Orders
+	"""
+	wc_orders = iter(wc_orders)
+	while page := list(islice(wc_orders, WC_RECORDS_PER_PAGE_LIMIT)):
+		so = frappe.qb.DocType("Sales Order")
+		sales_orders = (
+			frappe.qb.from_(so)
+			.select(
+				so.woocommerce_server,
+				so.woocommerce_id,
+				so.custom_woocommerce_last_sync_hash,
+				so.docstatus,
+				so.woocommerce_payment_entry,
+				so.custom_attempted_woocommerce_auto_payment_entry,
+			)
+			.where(so.woocommerce_server.isin(list({wc_order.woocommerce_server for wc_order in page})))
+			.where(so.woocommerce_id.isin([cstr(wc_order.id) for wc_order in page]))
+		).run(as_dict=True)
+
+		sales_orders_by_wc_order = defaultdict(list)
+		for sales_order in sales_orders:
+			key = (sales_order.woocommerce_server, cstr(sales_order.woocommerce_id))
+			sales_orders_by_wc_order[key].append(sales_order)
+
+		for wc_order in page:
+			linked_sales_orders = sales_orders_by_wc_order[(wc_order.woocommerce_server, cstr(wc_order.id))]
+			if not linked_sales_orders or any(
+				not is_synchronised(sales_order, wc_order) or needs_payment_entry(sales_order)
+				for sales_order in linked_sales_orders
+			):
+				yield wc_order
+
+
+def is_synchronised(sales_order: SalesOrder, wc_order: WooCommerceOrder) -> bool:
+	"""
+	Returns True if the Sales Order was last synchronised with this version of the WooCommerce Order
+	"""
+	return bool(sales_order.custom_woocommerce_last_sync_hash) and get_datetime(
+		sales_order.custom_woocommerce_last_sync_hash
+	) == get_datetime(wc_order.woocommerce_date_modified)
+
+
+def get_synchronised_items(sales_order: SalesOrder) -> List[Tuple[str, float, float]]:
+	"""
+	Returns the item code, quantity and rate of the Sales Order's items, as compared with the line
+	items of the WooCommerce Order
+	"""
+	return [(item.item_code, flt(item.qty), flt(item.rate)) for item in sales_order.items]
+
+
+def needs_payment_entry(sales_order: SalesOrder) -> bool:
+	"""
+	Returns True if a Payment Entry may still have to be created for a submitted Sales Order
+	"""
+	return (
+		sales_order.docstatus == 1
+		and not sales_order.woocommerce_payment_entry
+		and not sales_order.custom_attempted_woocommerce_auto_payment_entry
+	)
+
+
+@flush_request_logs_afterwards
+def run_sales_order_sync_batch(
+	woocommerce_order_names: List[str], status: Optional[str] = None
+) -> List["SalesOrderSyncResult"]:
+	"""
+	Synchronise a batch of WooCommerce Orders in one background job, and return the outcome per order.
+
+	The orders are retrieved with a single request per WooCommerce Server, and synchronised one after
+	the other with the same SynchroniseSalesOrder instance. Orders that failed are listed in a single
+	Error Log for the whole batch
+	"""
+	order_ids_by_server = defaultdict(list)
+	for woocommerce_order_name in woocommerce_order_names:
+		server_domain, order_id = get_domain_and_id_from_woocommerce_record_name(woocommerce_order_name)
+		order_ids_by_server[server_domain].append(str(order_id))
+
+	wc_orders = {}
+	for server_domain, order_ids in order_ids_by_server.items():
+		filters = [["WooCommerce Order", "id", "in", order_ids]]
+		if status:
+			filters.append(["WooCommerce Order", "status", "=", status])
+		for wc_order in WooCommerceOrder.iter_records(
+			filters=filters, servers=[server_domain], as_doc=True, revalidate=True
+		):
+			wc_orders[wc_order.name] = wc_order
+
+	sync = SynchroniseSalesOrder()
+	results = sync.run_for_woocommerce_orders(
+		wc_orders[name] for name in woocommerce_order_names if name in wc_orders
+	)
+	# Orders may have been deleted since they were listed
+	results.extend(
+		SalesOrderSyncResult(woocommerce_order=name, error=_("WooCommerce Order not found"))
+		for name in woocommerce_order_names
+		if name not in wc_orders
+	)
+
+	failed_results = [result for result in results if not result.success]
+	if failed_results:
+		error_message = _("{0} of {1} WooCommerce Orders failed to synchronise:").format(
+			len(failed_results), len(results)
+		)
+		error_message += "".join(
+			f"\n{result.woocommerce_order}: {result.error}" for result in failed_results
+		)
+		frappe.log_error("WooCommerce Error: Order Sync Batch", error_message)
+
+	return results
+
+
+@dataclass
+class SalesOrderSyncResult:
+	"""Outcome of synchronising a single WooCommerce Order with run_sales_order_sync_batch"""
+
+	woocommerce_order: str
+	sales_order: Optional[str] = None
+	success: bool = False
+	error: Optional[str] = None
+
+
+class ItemMappingIndex:
+	"""
+	Resolves (WooCommerce Server, WooCommerce product or variation ID) pairs to enabled ERPNext Items.
+
+	The pairs of an order, or of a whole batch of orders, are resolved with a single query and kept for
+	the rest of the sync run. Pairs without an Item are not kept, as their Item may still be created
+	"""
+
+	def __init__(self) -> None:
+		self.items: Dict[Tuple[str, str], frappe._dict] = {}
+
+	def load(self, pairs: Iterable[Tuple[str, str | int]]) -> Set[Tuple[str, str]]:
+		"""
+		Retrieve the Items of pairs that are not in the index yet, and return the pairs without an Item
+		"""
+		pairs = {(server, cstr(woocommerce_id)) for server, woocommerce_id in pairs}
+		pairs = {pair for pair in pairs if pair[1] not in ("", "0")}
+		missing_pairs = pairs - set(self.items)
+		if missing_pairs:
+			servers = list({server for server, _woocommerce_id in missing_pairs})
+			woocommerce_ids = list({woocommerce_id for _server, woocommerce_id in missing_pairs})
+
+			iws = frappe.qb.DocType("Item WooCommerce Server")
+			itm = frappe.qb.DocType("Item")
+			items = (
+				frappe.qb.from_(iws)
+				.join(itm)
+				.on(iws.parent == itm.name)
+				.where(
+					(iws.woocommerce_server.isin(servers))
+					& (iws.woocommerce_id.isin(woocommerce_ids))
+					& (itm.disabled == 0)
+				)
+				.select(
+					iws.woocommerce_server,
+					iws.woocommerce_id,
+					iws.woocommerce_last_sync_hash,
+					itm.name,
+					itm.item_name,
+					itm.disabled,
+				)
+			).run(as_dict=True)
+
+			for item in items:
+				pair = (item.pop("woocommerce_server"), cstr(item.pop("woocommerce_id")))
+				if pair in missing_pairs and pair not in self.items:
+					self.items[pair] = item
+
+		return pairs - set(self.items)
+
+	def forget(self, pairs: Iterable[Tuple[str, str | int]]):
+		"""
+		Remove pairs from the index, e.g. after their Items were synchronised
+		"""
+		for server, woocommerce_id in pairs:
+			self.items.pop((server, cstr(woocommerce_id)), None)
+
+	def get(self, server: str, woocommerce_id: str | int) -> Optional[frappe._dict]:
+		"""
+		Returns the name, item_name and disabled fields of the Item linked to a WooCommerce product or
+		variation, and the last sync hash of the link. Returns None if there is no such Item
+		"""
+		pair = (server, cstr(woocommerce_id))
+		if pair not in self.items:
+			self.load([pair])
+		return self.items.get(pair)
 
 
 class SynchroniseSalesOrder(SynchroniseWooCommerce):
@@ -129,7 +371,9 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 		self.sales_order = sales_order
 		self.woocommerce_order = woocommerce_order
 		self.settings = frappe.get_cached_doc("WooCommerce Integration Settings")
+		self.item_mapping = ItemMappingIndex()
 
+	@flush_request_logs_afterwards
 	def run(self):
 		"""
 		Run synchronisation
@@ -138,10 +382,51 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 			self.get_corresponding_sales_order_or_woocommerce_order()
 			self.sync_wc_order_with_erpnext_order()
 		except Exception as err:
-			error_message = f"{frappe.get_traceback()}\n\nSales Order Data: \n{str(self.sales_order.as_dict()) if self.sales_order else ''}\n\nWC Product Data \n{str(self.woocommerce_order.as_dict()) if self.woocommerce_order else ''})"
-			frappe.log_error("WooCommerce Error", error_message)
+			self.log_error()
 			raise err
 
+	def run_for_woocommerce_orders(
+		self, woocommerce_orders: Iterable[WooCommerceOrder]
+	) -> List[SalesOrderSyncResult]:
+		"""
+		Run synchronisation for several WooCommerce Orders, reusing this instance's servers and settings.
+
+		Every order is committed separately. If an order fails, its changes are rolled back to a savepoint
+		and the error is logged, so that the remaining orders are still synchronised
+		"""
+		woocommerce_orders = list(woocommerce_orders)
+		self.item_mapping.load(
+			(woocommerce_order.woocommerce_server, get_woocommerce_item_id(line_item))
+			for woocommerce_order in woocommerce_orders
+			for line_item in woocommerce_order.get_json("line_items")
+		)
+
+		results = []
+		for woocommerce_order in woocommerce_orders:
+			self.sales_order = None
+			self.woocommerce_order = woocommerce_order
+			result = SalesOrderSyncResult(woocommerce_order=woocommerce_order.name)
+
+			frappe.db.savepoint(ORDER_SYNC_SAVEPOINT)
+			try:
+				self.get_corresponding_sales_order_or_woocommerce_order()
+				self.sync_wc_order_with_erpnext_order()
+			except Exception as err:
+				frappe.db.rollback(save_point=ORDER_SYNC_SAVEPOINT)
+				self.log_error()
+				result.error = str(err)
+			else:
+				result.success = True
+				result.sales_order = self.sales_order.name if self.sales_order else None
+			frappe.db.commit()
+			results.append(result)
+
+		return results
+
+	def log_error(self):
+		error_message = f"{frappe.get_traceback()}\n\nSales Order Data: \n{str(self.sales_order.as_dict()) if self.sales_order else ''}\n\nWC Product Data \n{str(self.woocommerce_order.as_dict()) if self.woocommerce_order else ''})"
+		frappe.log_error("WooCommerce Error", error_message)
+
 	def get_corresponding_sales_order_or_woocommerce_order(self):
 		"""
 		If we have an ERPNext Sales Order, get the corresponding WooCommerce Order
@@ -202,12 +487,10 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 		elif self.woocommerce_order and not self.sales_order:
 			# create missing order in ERPNext
 			self.create_sales_order(self.woocommerce_order)
+			self.set_sync_hash()
 		elif self.sales_order and self.woocommerce_order:
 			# both exist, check sync hash
-			if (
-				self.woocommerce_order.woocommerce_date_modified
-				!= self.sales_order.custom_woocommerce_last_sync_hash
-			):
+			if not is_synchronised(self.sales_order, self.woocommerce_order):
 				if get_datetime(self.woocommerce_order.woocommerce_date_modified) > get_datetime(
 					self.sales_order.modified
 				):
@@ -218,15 +501,31 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 					self.update_woocommerce_order(self.woocommerce_order, self.sales_order)
 
 			# If the Sales Order exists and has been submitted in the mean time, sync Payment Entries
-			if (
-				self.sales_order.docstatus == 1
-				and not self.sales_order.woocommerce_payment_entry
-				and not self.sales_order.custom_attempted_woocommerce_auto_payment_entry
-			):
+			if needs_payment_entry(self.sales_order):
 				self.sales_order.reload()
 				if self.create_and_link_payment_entry(self.woocommerce_order, self.sales_order):
 					self.sales_order.save(ignore_permissions=True)
 
+			if not is_synchronised(self.sales_order, self.woocommerce_order):
+				self.set_sync_hash()
+
+	def set_sync_hash(self):
+		"""
+		Set the last sync hash value using db.set_value, as it does not call the ORM triggers
+		and it does not update the modified timestamp (by using the update_modified parameter)
+		"""
+		if not self.sales_order:
+			return
+		sync_hash = get_datetime(self.woocommerce_order.woocommerce_date_modified)
+		frappe.db.set_value(
+			"Sales Order",
+			self.sales_order.name,
+			"custom_woocommerce_last_sync_hash",
+			sync_hash,
+			update_modified=False,
+		)
+		self.sales_order.custom_woocommerce_last_sync_hash = sync_hash
+
 	def update_sales_order(self, woocommerce_order: WooCommerceOrder, sales_order: SalesOrder):
 		"""
 		Update the ERPNext Sales Order with fields from it's corresponding WooCommerce Order
@@ -387,7 +686,7 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 		wc_server = frappe.get_cached_doc("WooCommerce Server", wc_order.woocommerce_server)
 		if wc_server.sync_so_items_to_wc:
 			sales_order_items_changed = False
-			line_items = json.loads(wc_order.line_items)
+			line_items = wc_order.get_json("line_items")
 			# Check if count of line items are different
 			if len(line_items) != len(sales_order.items):
 				sales_order_items_changed = True
@@ -407,7 +706,7 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 			if sales_order_items_changed:
 				# Set the product_id for existing lines to null, to clear the line items for the WooCommerce order
 				replacement_line_items = [
-					{"id": line_item["id"], "product_id": None} for line_item in json.loads(wc_order.line_items)
+					{"id": line_item["id"], "product_id": None} for line_item in wc_order.get_json("line_items")
 				]
 				# Add the correct lines
 				replacement_line_items.extend(
@@ -416,7 +715,7 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 						for so_item in sales_order.items
 					]
 				)
-				wc_order.line_items = json.dumps(replacement_line_items)
+				wc_order.set_json("line_items", replacement_line_items)
 				wc_order_dirty = True
 
 		if wc_order_dirty:
@@ -427,7 +726,7 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 		Create an ERPNext Sales Order from the given WooCommerce Order
 		"""
 		customer_docname = self.create_or_link_customer_and_address(wc_order)
-		self.create_missing_items(wc_order, json.loads(wc_order.line_items), wc_order.woocommerce_server)
+		self.create_missing_items(wc_order, wc_order.get_json("line_items"), wc_order.woocommerce_server)
 
 		new_sales_order = frappe.new_doc("Sales Order")
 		new_sales_order.customer = customer_docname
@@ -462,7 +761,7 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 		# Handling COD fee from fee_lines
 		if hasattr(wc_order, 'fee_lines') and wc_order.fee_lines:
 			try:
-				fee_lines = json.loads(wc_order.fee_lines) if isinstance(wc_order.fee_lines, str) else wc_order.fee_lines
+				fee_lines = wc_order.get_json("fee_lines")
 				for fee in fee_lines:
 					# You can add specific check for COD Fee name if needed
 					if fee.get("name") == "COD Fee" or "COD" in fee.get("name", "").upper():
@@ -474,7 +773,7 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 
 		if (
 			(wc_server.enable_shipping_methods_sync)
-			and (shipping_lines := json.loads(wc_order.shipping_lines))
+			and (shipping_lines := wc_order.get_json("shipping_lines"))
 			and len(wc_server.shipping_rule_map) > 0
 		):
 			if len(wc_order.shipping_lines) > 0:
@@ -511,13 +810,14 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 
 		self.create_and_link_payment_entry(wc_order, new_sales_order)
 		new_sales_order.save(ignore_permissions=True)
+		self.sales_order = new_sales_order
 
 	def create_or_link_customer_and_address(self, wc_order: WooCommerceOrder) -> str:
 		"""
 		Create or update Customer and Address records, with special handling for guest orders using order ID.
 		"""
-		raw_billing_data = json.loads(wc_order.billing)
-		raw_shipping_data = json.loads(wc_order.shipping)
+		raw_billing_data = wc_order.get_json("billing")
+		raw_shipping_data = wc_order.get_json("shipping")
 		first_name = raw_billing_data.get("first_name", "").strip()
 		last_name = raw_billing_data.get("last_name", "").strip()
 		email = raw_billing_data.get("email", "").strip()
@@ -579,7 +879,7 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 		if meta_data:
 			try:
 				if isinstance(meta_data, str):
-					meta_data_list = json.loads(meta_data)
+					meta_data_list = wc_order.get_json("meta_data")
 				else:
 					meta_data_list = meta_data
 				
@@ -631,16 +931,47 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 	def create_missing_items(self, wc_order, items_list, woocommerce_site):
 		"""
 		Searching for items linked to multiple WooCommerce sites
-		"""
-		for item_data in items_list:
-			item_woo_com_id = cstr(item_data.get("variation_id") or item_data.get("product_id"))
 
-			# Deleted items will have a "0" for variation_id/product_id
-			if item_woo_com_id != "0":
-				woocommerce_product_name = generate_woocommerce_record_name_from_domain_and_id(
-					woocommerce_site, item_woo_com_id
-				)
+		Products that are already linked to an Item that was synchronised since it was last changed are
+		skipped. The other products are retrieved with a single request and synced. Variations are
+		retrieved one by one, like before
+		"""
+		# Deleted items will have a "0" for variation_id/product_id
+		line_items = [
+			item_data for item_data in items_list if cstr(get_woocommerce_item_id(item_data)) != "0"
+		]
+		unknown_pairs = self.item_mapping.load(
+			(woocommerce_site, get_woocommerce_item_id(item_data)) for item_data in line_items
+		)
+		line_items_to_sync = [
+			item_data
+			for item_data in line_items
+			if (woocommerce_site, cstr(get_woocommerce_item_id(item_data))) in unknown_pairs
+			or not self.item_mapping.get(
+				woocommerce_site, get_woocommerce_item_id(item_data)
+			).woocommerce_last_sync_hash
+		]
+		if not line_items_to_sync:
+			return
+
+		wc_products = get_wc_products_for_line_items(woocommerce_site, line_items_to_sync)
+		synced_pairs = set()
+		for item_data in line_items_to_sync:
+			item_woo_com_id = cstr(get_woocommerce_item_id(item_data))
+			if (woocommerce_site, item_woo_com_id) in synced_pairs:
+				continue
+
+			woocommerce_product_name = generate_woocommerce_record_name_from_domain_and_id(
+				woocommerce_site, item_woo_com_id
+			)
+			if woocommerce_product := wc_products.get(woocommerce_product_name):
+				run_item_sync(woocommerce_product=woocommerce_product)
+			else:
+				# Variations and products that were not listed, e.g. trashed products, are retrieved one by one
 				run_item_sync(woocommerce_product_name=woocommerce_product_name)
+			synced_pairs.add((woocommerce_site, item_woo_com_id))
+
+		self.item_mapping.forget(synced_pairs)
 
 	def set_items_in_sales_order(self, new_sales_order, wc_order):
 		"""
@@ -698,29 +1029,19 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 		if not wc_server.warehouse:
 			frappe.throw(_("Please set Warehouse in WooCommerce Server"))
 
-		for item in json.loads(wc_order.line_items):
-			woocomm_item_id = item.get("variation_id") or item.get("product_id")
+		line_items = wc_order.get_json("line_items")
+		self.item_mapping.load(
+			(new_sales_order.woocommerce_server, get_woocommerce_item_id(item)) for item in line_items
+		)
+
+		for item in line_items:
+			woocomm_item_id = get_woocommerce_item_id(item)
 
 			# Deleted items will have a "0" for variation_id/product_id
 			if woocomm_item_id == 0:
 				found_item = create_placeholder_item(new_sales_order)
 			else:
-				iws = frappe.qb.DocType("Item WooCommerce Server")
-				itm = frappe.qb.DocType("Item")
-				item_codes = (
-					frappe.qb.from_(iws)
-					.join(itm)
-					.on(iws.parent == itm.name)
-					.where(
-						(iws.woocommerce_id == cstr(woocomm_item_id))
-						& (iws.woocommerce_server == new_sales_order.woocommerce_server)
-						& (itm.disabled == 0)
-					)
-					.select(iws.parent)
-					.limit(1)
-				).run(as_dict=True)
-
-				found_item = frappe.get_doc("Item", item_codes[0].parent) if item_codes else None
+				found_item = self.item_mapping.get(new_sales_order.woocommerce_server, woocomm_item_id)
 
 			# # If we are applying a Sales Taxes and Charges Template (as opposed to Actual Tax), then we need to
 			# # determine if the item price should include tax or not
@@ -788,8 +1109,8 @@ class SynchroniseSalesOrder(SynchroniseWooCommerce):
 			(addr for addr in addresses if addr.is_shipping_address == 1), None
 		)
 
-		raw_billing_data = json.loads(wc_order.billing)
-		raw_shipping_data = json.loads(wc_order.shipping)
+		raw_billing_data = wc_order.get_json("billing")
+		raw_shipping_data = wc_order.get_json("shipping")
 
 		address_keys_to_compare = [
 			"first_name",
@@ -1004,17 +1325,32 @@ def get_list_of_wc_orders(
 	"""
 	Fetches a list of WooCommerce Orders within a specified date range or linked with a Sales Order, using pagination.
 
+	At least one of date_time_from, or sales_order parameters are required
+	"""
+	return list(iter_wc_orders(date_time_from=date_time_from, sales_order=sales_order, status=status))
+
+
+def iter_wc_orders(
+	date_time_from: Optional[datetime] = None,
+	sales_order: Optional[SalesOrder] = None,
+	status: Optional[str] = None,
+	fields: Optional[List[str]] = None,
+	servers: Optional[List[str]] = None,
+	order_by: Optional[str] = None,
+) -> Iterator[WooCommerceOrder]:
+	"""
+	Returns a generator of WooCommerce Orders within a specified date range or linked with a Sales Order.
+	Every page is requested once, and only when the previous page has been consumed.
+
+	If fields are specified, only those fields are retrieved from WooCommerce. If servers are
+	specified, only the orders of those WooCommerce Servers are listed.
+
 	At least one of date_time_from, or sales_order parameters are required
 	"""
 	if not any([date_time_from, sales_order]):
 		raise ValueError("At least one of date_time_from or sales_order parameters are required")
 
-	wc_records_per_page_limit = 100
-	page_length = wc_records_per_page_limit
-	new_results = True
-	start = 0
 	filters = []
-	wc_orders = []
 
 	wc_settings = frappe.get_cached_doc("WooCommerce Integration Settings")
 	minimum_creation_date = wc_settings.minimum_creation_date
@@ -1029,18 +1365,15 @@ def get_list_of_wc_orders(
 	if status:
 		filters.append(["WooCommerce Order", "status", "=", status])
 
-	while new_results:
-		woocommerce_order = frappe.get_doc({"doctype": "WooCommerce Order"})
-		new_results = woocommerce_order.get_list(
-			args={"filters": filters, "page_lenth": page_length, "start": start, "as_doc": True}
-		)
-		for wc_order in new_results:
-			wc_orders.append(wc_order)
-		start += page_length
-		if len(new_results) < page_length:
-			new_results = []
-
-	return wc_orders
+	# Orders that are listed again by consecutive syncs are only retrieved if they were modified
+	return WooCommerceOrder.iter_records(
+		filters=filters,
+		servers=servers,
+		as_doc=True,
+		fields=fields,
+		revalidate=bool(date_time_from),
+		order_by=order_by,
+	)
 
 
 def rename_address(address, customer):
@@ -1091,6 +1424,40 @@ def add_tax_details(sales_order, price, desc, tax_account_head):
 	)
 
 
+def get_wc_products_for_line_items(
+	woocommerce_site: str, line_items: List[Dict]
+) -> Dict[str, WooCommerceProduct]:
+	"""
+	Retrieve the WooCommerce Products of line items with one 'include' request. Variations are not
+	retrieved, as WooCommerce only lists them per variable product and without their product's name
+
+	Returns the WooCommerce Products by name
+	"""
+	product_ids = {
+		cstr(line_item["product_id"]) for line_item in line_items if not line_item.get("variation_id")
+	}
+	if not product_ids:
+		return {}
+
+	return {
+		wc_product.name: wc_product
+		for wc_product in WooCommerceProduct.iter_records(
+			filters=[["WooCommerce Product", "id", "in", sorted(product_ids)]],
+			servers=[woocommerce_site],
+			endpoint="products",
+			as_doc=True,
+		)
+	}
+
+
+def get_woocommerce_item_id(line_item: Dict) -> int:
+	"""
+	Returns the WooCommerce ID of a line item's variation or product. Line items of deleted products have
+	an ID of 0
+	"""
+	return line_item.get("variation_id") or line_item.get("product_id")
+
+
 def get_tax_inc_price_for_woocommerce_line_item(line_item: Dict):
 	"""
 	WooCommerce's Line Item "price" field will always show the tax excluding amount.
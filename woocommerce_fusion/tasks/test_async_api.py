@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+import httpx
+from frappe.tests.utils import FrappeTestCase
+
+from woocommerce_fusion.tasks.async_api import AsyncAPIWithRequestLogging
+
+
+class TestAsyncAPIWithRequestLogging(FrappeTestCase):
+	def test_requests_are_sent_and_retried_like_the_synchronous_api(self):
+		requests = []
+
+		def handle(request):
+			requests.append(request)
+			if len(requests) == 1:
+				return httpx.Response(503)
+			return httpx.Response(200, json={"id": 1})
+
+		async def send():
+			wc_api = AsyncAPIWithRequestLogging(
+				url="https://site1.example.com",
+				consumer_key="ck",
+				consumer_secret="cs",
+				retry_backoff=0,
+			)
+			wc_api._client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+			async with wc_api:
+				get_response = await wc_api.get("products/1", params={"_fields": "id"})
+				put_response = await wc_api.put("products/1", data={"name": "Test"})
+			return get_response, put_response
+
+		get_response, put_response = asyncio.run(send())
+
+		# Check that the GET was retried after the 503 response
+		self.assertEqual(get_response.json(), {"id": 1})
+		self.assertEqual(len(requests), 3)
+		self.assertEqual(
+			str(requests[0].url), "https://site1.example.com/wp-json/wc/v3/products/1?_fields=id"
+		)
+		self.assertTrue(requests[0].headers["authorization"].startswith("Basic "))
+
+		# Check that the PUT body is sent as JSON
+		self.assertEqual(put_response.status_code, 200)
+		self.assertEqual(requests[2].method, "PUT")
+		self.assertEqual(json.loads(requests[2].content), {"name": "Test"})
@@ -1,12 +1,14 @@
 from unittest.mock import MagicMock, Mock, call, patch
 
 import frappe
+import httpx
 from frappe import _dict
 from frappe.tests.utils import FrappeTestCase
 
 from woocommerce_fusion.tasks.stock_update import (
 	update_stock_levels_for_all_enabled_items_in_background,
 	update_stock_levels_on_woocommerce_site,
+	update_stock_levels_on_woocommerce_sites,
 )
 
 
@@ -157,9 +159,62 @@ class TestWooCommerceStockSync(FrappeTestCase):
 		mock_get_all.assert_has_calls(expected_calls, any_order=True)
 
 		# Assertions to check if enqueue was called correctly
-		# This assumes we have 1000 items, based on the pagination logic above.
-		self.assertEqual(mock_enqueue.call_count, 1000)
+		# This assumes we have 1000 items, based on the pagination logic above, in batches of 100.
+		self.assertEqual(mock_enqueue.call_count, 10)
 		mock_enqueue.assert_called_with(
-			"woocommerce_fusion.tasks.stock_update.update_stock_levels_on_woocommerce_site",
-			item_code="Item-2-499",  # Here we'd check for the last `item_code` being passed.
+			"woocommerce_fusion.tasks.stock_update.update_stock_levels_on_woocommerce_sites",
+			queue="long",
+			item_codes=[f"Item-2-{x}" for x in range(400, 500)],  # The last batch of item codes
 		)
+
+	@patch("woocommerce_fusion.tasks.stock_update.send_requests")
+	@patch("woocommerce_fusion.tasks.stock_update.frappe")
+	def test_update_stock_levels_on_woocommerce_sites(self, mock_frappe, mock_send_requests):
+		# Set up two dummy items that are synchronised to the same WC site
+		mock_frappe.get_doc.side_effect = [
+			frappe._dict(
+				name=f"ITEM-{x}",
+				woocommerce_servers=[
+					frappe._dict(woocommerce_id=x, woocommerce_server="woo1.example.com", enabled=1)
+				],
+				is_stock_item=1,
+				disabled=0,
+			)
+			for x in range(1, 3)
+		]
+		mock_frappe.get_list.return_value = [frappe._dict(warehouse="Warehouse A", actual_qty=5)]
+		wc_server = frappe._dict(
+			name="woo1.example.com",
+			enable_sync=1,
+			enable_stock_level_synchronisation=1,
+			warehouses=[frappe._dict(warehouse="Warehouse A")],
+		)
+		mock_frappe.get_cached_doc.return_value = wc_server
+
+		# The first update fails
+		mock_send_requests.return_value = [
+			httpx.Response(
+				400,
+				text="Invalid stock quantity",
+				request=httpx.Request(
+					"PUT", "https://woo1.example.com/wp-json/wc/v3/products/1", json={"stock_quantity": 5}
+				),
+			),
+			httpx.Response(200, request=httpx.Request("PUT", "https://woo1.example.com/products/2")),
+		]
+
+		# Call function under test
+		update_stock_levels_on_woocommerce_sites(["ITEM-1", "ITEM-2"])
+
+		# Assert that the stock levels of both items were sent together, and the failure was logged
+		mock_send_requests.assert_called_once_with(
+			wc_server,
+			[
+				("PUT", "products/1", {"data": {"stock_quantity": 5}}),
+				("PUT", "products/2", {"data": {"stock_quantity": 5}}),
+			],
+		)
+		mock_frappe.log_error.assert_called_once()
+		error_message = mock_frappe.log_error.call_args.args[1]
+		self.assertIn("Invalid stock quantity", error_message)
+		self.assertIn("Request Body: {", error_message)
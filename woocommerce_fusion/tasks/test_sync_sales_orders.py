@@ -5,7 +5,16 @@ import frappe
 from erpnext import get_default_company
 from frappe.tests.utils import FrappeTestCase
 
-from woocommerce_fusion.tasks.sync_sales_orders import SynchroniseSalesOrder
+from woocommerce_fusion.tasks.sync import SyncCheckpoint
+from woocommerce_fusion.tasks.sync_sales_orders import (
+	ORDER_SYNC_SAVEPOINT,
+	ItemMappingIndex,
+	SynchroniseSalesOrder,
+	run_sales_order_sync_batch,
+	skip_synchronised_orders,
+	sync_woocommerce_orders_modified_since,
+)
+from woocommerce_fusion.testing.fake_woocommerce_server import FakeWooCommerceServer
 from woocommerce_fusion.woocommerce.woocommerce_api import (
 	generate_woocommerce_record_name_from_domain_and_id,
 )
@@ -131,6 +140,293 @@ class TestWooCommerceSync(FrappeTestCase):
 		mock_create_sales_order.assert_called_once()
 		self.assertEqual(mock_create_sales_order.call_args.args[0], wc_order)
 
+	@patch.object(SynchroniseSalesOrder, "log_error")
+	@patch.object(SynchroniseSalesOrder, "sync_wc_order_with_erpnext_order")
+	@patch.object(SynchroniseSalesOrder, "get_erpnext_sales_order")
+	def test_batch_sync_rolls_back_failed_orders_and_continues(
+		self, mock_get_erpnext_sales_order, mock_sync, mock_log_error, mock_get_wc_servers
+	):
+		"""
+		Test that a failing order in a batch is rolled back to a savepoint and reported, and that the
+		other orders of the batch are still synchronised and committed
+		"""
+		# Initialise class
+		sync = SynchroniseSalesOrder()
+
+		wc_orders = [
+			frappe._dict(
+				name=generate_woocommerce_record_name_from_domain_and_id("site1.example.com", i),
+				woocommerce_server="site1.example.com",
+				get_json=lambda fieldname: [],
+			)
+			for i in range(1, 4)
+		]
+		mock_sync.side_effect = [None, ValueError("Broken order"), None]
+
+		# Call the method under test
+		with patch("woocommerce_fusion.tasks.sync_sales_orders.frappe.db") as mock_db:
+			results = sync.run_for_woocommerce_orders(wc_orders)
+
+		# Assert that only the failed order was rolled back, and that every order was committed
+		self.assertEqual([result.success for result in results], [True, False, True])
+		self.assertEqual(results[1].woocommerce_order, "site1.example.com~2")
+		self.assertEqual(results[1].error, "Broken order")
+		self.assertEqual(mock_db.savepoint.call_count, 3)
+		mock_db.rollback.assert_called_once_with(save_point=ORDER_SYNC_SAVEPOINT)
+		self.assertEqual(mock_db.commit.call_count, 3)
+		mock_log_error.assert_called_once()
+
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.frappe.log_error")
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.WooCommerceOrder.iter_records")
+	@patch.object(SynchroniseSalesOrder, "log_error")
+	@patch.object(SynchroniseSalesOrder, "sync_wc_order_with_erpnext_order")
+	@patch.object(SynchroniseSalesOrder, "get_erpnext_sales_order")
+	def test_batch_job_reports_failed_orders_in_a_single_error_log(
+		self,
+		mock_get_erpnext_sales_order,
+		mock_sync,
+		mock_log_error,
+		mock_iter_records,
+		mock_frappe_log_error,
+		mock_get_wc_servers,
+	):
+		"""
+		Test that run_sales_order_sync_batch returns the outcome per order, commits the orders that
+		succeeded and lists the failed and missing orders in one Error Log for the batch
+		"""
+		names = [
+			generate_woocommerce_record_name_from_domain_and_id("site1.example.com", i) for i in range(1, 5)
+		]
+		# The last order was deleted since it was listed
+		mock_iter_records.return_value = [
+			frappe._dict(name=name, woocommerce_server="site1.example.com", get_json=lambda fieldname: [])
+			for name in names[:3]
+		]
+		mock_sync.side_effect = [None, ValueError("Broken order"), None]
+
+		# Call the method under test
+		with patch("woocommerce_fusion.tasks.sync_sales_orders.frappe.db") as mock_db:
+			results = run_sales_order_sync_batch(names)
+
+		# Assert that the other orders were committed, and the failed ones reported together
+		self.assertEqual([result.woocommerce_order for result in results], names)
+		self.assertEqual([result.success for result in results], [True, False, True, False])
+		self.assertEqual(mock_db.commit.call_count, 3)
+		mock_frappe_log_error.assert_called_once()
+		error_message = mock_frappe_log_error.call_args.args[1]
+		self.assertIn("2 of 4", error_message)
+		self.assertIn(f"{names[1]}: Broken order", error_message)
+		self.assertIn(names[3], error_message)
+		self.assertNotIn(names[0], error_message)
+
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.frappe.qb")
+	def test_skip_synchronised_orders(self, mock_qb, mock_get_wc_servers):
+		"""
+		Test that WooCommerce Orders are only handed over for synchronisation if they don't have a Sales
+		Order yet, were modified since the last sync, or still need a Payment Entry
+		"""
+		woocommerce_server = "site1.example.com"
+		wc_orders = [
+			frappe._dict(
+				id=i, woocommerce_server=woocommerce_server, woocommerce_date_modified="2024-01-01T10:00:00"
+			)
+			for i in range(1, 5)
+		]
+		sales_order = frappe._dict(
+			woocommerce_server=woocommerce_server,
+			custom_woocommerce_last_sync_hash="2024-01-01 10:00:00",
+			docstatus=1,
+			woocommerce_payment_entry="PE-0001",
+			custom_attempted_woocommerce_auto_payment_entry=1,
+		)
+		mock_query = mock_qb.from_.return_value.select.return_value
+		mock_run = mock_query.where.return_value.where.return_value.run
+		mock_run.return_value = [
+			# Synchronised
+			frappe._dict(sales_order, woocommerce_id="2"),
+			# Modified since the last sync
+			frappe._dict(
+				sales_order, woocommerce_id="3", custom_woocommerce_last_sync_hash="2023-12-31 09:00:00"
+			),
+			# Still needs a Payment Entry
+			frappe._dict(
+				sales_order,
+				woocommerce_id="4",
+				woocommerce_payment_entry=None,
+				custom_attempted_woocommerce_auto_payment_entry=0,
+			),
+		]
+
+		# Call the method under test
+		orders_to_sync = list(skip_synchronised_orders(wc_orders))
+
+		# Assert that only the synchronised order was skipped, with a single query
+		self.assertEqual([wc_order.id for wc_order in orders_to_sync], [1, 3, 4])
+		mock_run.assert_called_once()
+
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.frappe.enqueue")
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.skip_synchronised_orders")
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.iter_wc_orders")
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.frappe.get_all")
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.frappe.get_doc")
+	def test_failed_order_sync_resumes_after_last_enqueued_batch(
+		self,
+		mock_get_doc,
+		mock_get_all,
+		mock_iter_wc_orders,
+		mock_skip_synchronised_orders,
+		mock_enqueue,
+		mock_get_wc_servers,
+	):
+		"""
+		Test that a scheduled order sync that failed lists orders again from the last batch that was
+		handed to a background job, instead of from the start
+		"""
+		date_time_from = "2024-01-01 00:00:00"
+		SyncCheckpoint("orders", date_time_from).clear()
+		wc_settings = Mock(wc_last_sync_date=date_time_from, order_sync_batch_size=2)
+		mock_get_doc.return_value = wc_settings
+		mock_get_all.return_value = ["site1.example.com"]
+		mock_skip_synchronised_orders.side_effect = lambda wc_orders: wc_orders
+		wc_orders = [
+			frappe._dict(name=f"site1.example.com~{i}", modified=f"2024-01-0{i} 00:00:00")
+			for i in range(1, 4)
+		]
+
+		# The first run fails after listing the third order
+		def iter_wc_orders_and_fail(**kwargs):
+			yield from wc_orders
+			raise ValueError("Connection lost")
+
+		mock_iter_wc_orders.side_effect = iter_wc_orders_and_fail
+		with self.assertRaises(ValueError):
+			sync_woocommerce_orders_modified_since()
+		mock_enqueue.assert_called_once()
+		wc_settings.save.assert_not_called()
+		started = SyncCheckpoint("orders", date_time_from).started
+
+		# The second run resumes after the enqueued batch, and then lists the trashed orders
+		mock_iter_wc_orders.reset_mock()
+		mock_iter_wc_orders.side_effect = lambda **kwargs: iter(
+			wc_orders[2:] if kwargs["status"] is None else []
+		)
+		sync_woocommerce_orders_modified_since()
+
+		self.assertEqual(
+			[
+				(mock_call.kwargs["date_time_from"], mock_call.kwargs["status"])
+				for mock_call in mock_iter_wc_orders.call_args_list
+			],
+			[("2024-01-01 23:59:59", None), (date_time_from, "trash")],
+		)
+		self.assertEqual(
+			mock_enqueue.call_args.kwargs["woocommerce_order_names"], ["site1.example.com~3"]
+		)
+		self.assertEqual(wc_settings.wc_last_sync_date, started)
+		self.assertEqual(SyncCheckpoint("orders", date_time_from).streams, {})
+
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.frappe.qb")
+	def test_item_mapping_index_resolves_pairs_with_one_query(self, mock_qb, mock_get_wc_servers):
+		"""
+		Test that the Items of several line items are resolved with a single query, and that pairs
+		without an Item are looked up again
+		"""
+		mock_query = mock_qb.from_.return_value.join.return_value.on.return_value
+		mock_run = mock_query.where.return_value.select.return_value.run
+		mock_run.return_value = [
+			frappe._dict(
+				woocommerce_server="site1.example.com",
+				woocommerce_id="11",
+				name="ITEM-11",
+				item_name="T-Shirt",
+				disabled=0,
+			),
+			frappe._dict(
+				woocommerce_server="site1.example.com",
+				woocommerce_id="12",
+				name="ITEM-12",
+				item_name="Hoodie",
+				disabled=0,
+			),
+		]
+
+		# Call the methods under test
+		item_mapping = ItemMappingIndex()
+		item_mapping.load([("site1.example.com", i) for i in (11, 12, 13)])
+		t_shirt = item_mapping.get("site1.example.com", 11)
+		hoodie = item_mapping.get("site1.example.com", "12")
+
+		# Assert that both Items were resolved by the first query
+		self.assertEqual(t_shirt.name, "ITEM-11")
+		self.assertEqual(hoodie.item_name, "Hoodie")
+		mock_run.assert_called_once()
+
+		# Assert that a pair without an Item is queried again, as its Item may have been created since
+		mock_run.return_value = []
+		self.assertIsNone(item_mapping.get("site1.example.com", 13))
+		self.assertEqual(mock_run.call_count, 2)
+
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.run_item_sync")
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.WooCommerceProduct.iter_records")
+	@patch("woocommerce_fusion.tasks.sync_sales_orders.frappe.qb")
+	def test_create_missing_items_only_retrieves_unknown_products(
+		self, mock_qb, mock_iter_records, mock_run_item_sync, mock_get_wc_servers
+	):
+		"""
+		Test that products that are already linked to a synchronised Item are not retrieved again, and
+		that unknown products are retrieved in bulk
+		"""
+		woocommerce_server = "site1.example.com"
+		sync = SynchroniseSalesOrder()
+		sync.item_mapping.items[(woocommerce_server, "10")] = frappe._dict(
+			name="ITEM-10", woocommerce_last_sync_hash="2024-01-01T00:00:00"
+		)
+		sync.item_mapping.items[(woocommerce_server, "13")] = frappe._dict(
+			name="ITEM-13", woocommerce_last_sync_hash=None
+		)
+		mock_query = mock_qb.from_.return_value.join.return_value.on.return_value
+		mock_query.where.return_value.select.return_value.run.return_value = []
+
+		def iter_records(filters, servers, endpoint, as_doc):
+			for woocommerce_id in filters[0][3]:
+				yield frappe._dict(
+					name=generate_woocommerce_record_name_from_domain_and_id(servers[0], woocommerce_id)
+				)
+
+		mock_iter_records.side_effect = iter_records
+		line_items = [
+			# Known product
+			{"product_id": 10, "variation_id": 0},
+			# Unknown products and variations, and a product that was changed since it was synchronised
+			{"product_id": 11, "variation_id": 0},
+			{"product_id": 12, "variation_id": 0},
+			{"product_id": 20, "variation_id": 21},
+			{"product_id": 13, "variation_id": 0},
+			# Deleted product
+			{"product_id": 0, "variation_id": 0},
+		]
+
+		# Call the method under test
+		sync.create_missing_items(None, line_items, woocommerce_server)
+
+		# Assert that the products were retrieved with a single request, and the variation one by one
+		mock_iter_records.assert_called_once()
+		self.assertEqual(mock_iter_records.call_args.kwargs["filters"][0][3], ["11", "12", "13"])
+		synced_products = [
+			mock_call.kwargs.get("woocommerce_product", {}).get("name")
+			or mock_call.kwargs["woocommerce_product_name"]
+			for mock_call in mock_run_item_sync.call_args_list
+		]
+		self.assertEqual(
+			synced_products,
+			[
+				"site1.example.com~11",
+				"site1.example.com~12",
+				"site1.example.com~21",
+				"site1.example.com~13",
+			],
+		)
+
 	@patch("woocommerce_fusion.tasks.sync_sales_orders.frappe.new_doc")
 	def test_successful_payment_entry_creation(self, mock_frappe_new_doc, mock_get_wc_servers):
 		# Initialise class
@@ -375,6 +671,63 @@ class TestWooCommerceSync(FrappeTestCase):
 		mock_create_address.assert_has_calls(expected_calls)
 
 
+class TestCreateMissingItems(FrappeTestCase):
+	def setUp(self):
+		self.fake_server = FakeWooCommerceServer().start()
+		wc_server = frappe.new_doc("WooCommerce Server")
+		wc_server.update(
+			{
+				"woocommerce_server_url": self.fake_server.url,
+				"api_consumer_key": self.fake_server.consumer_key,
+				"api_consumer_secret": self.fake_server.consumer_secret,
+				"enable_sync": 1,
+				"company": "_Test Company",
+				"item_group": "_Test Item Group",
+				"warehouse": "_Test Warehouse - _TC",
+				"uom": "_Test UOM",
+			}
+		)
+		wc_server.flags.ignore_mandatory = True
+		wc_server.insert()
+		self.wc_server = wc_server
+
+	def tearDown(self):
+		self.wc_server.delete()
+		self.fake_server.stop()
+
+	def test_create_missing_items_names_variations_like_woocommerce(self):
+		"""
+		Test that an Item created for an ordered variation gets the variation's name, and that it isn't
+		retrieved again for the next order
+		"""
+		product = self.fake_server.add_product(
+			name="Fake T-Shirt",
+			type="variable",
+			attributes=[
+				{"id": 0, "name": "Fake Size", "variation": True, "options": ["Small", "Large"]}
+			],
+		)
+		variation = self.fake_server.add_variation(
+			product["id"],
+			name="Fake T-Shirt - Small",
+			attributes=[{"id": 0, "name": "Fake Size", "option": "Small"}],
+		)
+		line_items = [{"product_id": product["id"], "variation_id": variation["id"]}]
+
+		# Call the method under test
+		SynchroniseSalesOrder().create_missing_items(None, line_items, self.wc_server.name)
+
+		# Assert that the variant Item was named after the variation
+		item = frappe.get_doc("Item", str(variation["id"]))
+		self.assertEqual(item.item_name, "Fake T-Shirt - Small")
+		self.assertEqual(item.variant_of, str(product["id"]))
+
+		# Assert that the next order doesn't retrieve the product again
+		self.fake_server.reset_request_counts()
+		SynchroniseSalesOrder().create_missing_items(None, line_items, self.wc_server.name)
+		self.assertEqual(sum(self.fake_server.request_counts.values()), 0)
+
+
 def create_bank_account(
 	bank_name=default_bank, account_name="_Test Bank", company=default_company
 ):
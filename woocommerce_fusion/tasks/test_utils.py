@@ -1,9 +1,22 @@
 import unittest
 from unittest.mock import Mock, patch
 
+import frappe
+import requests
 from frappe.tests.utils import FrappeTestCase
 
+from woocommerce_fusion.exceptions import CircuitOpenError
 from woocommerce_fusion.tasks.utils import (  # Adjust the import according to your project structure
+	APIWithRequestLogging,
+	CircuitBreaker,
+	RequestLogPolicy,
+	RequestRateLimiter,
+	buffer_woocommerce_request_log,
+	evict_pooled_session,
+	flush_request_logs_afterwards,
+	flush_woocommerce_request_logs,
+	get_pooled_session,
+	get_rate_limiter,
 	log_woocommerce_request,
 )
 
@@ -37,3 +50,250 @@ class TestLogWooCommerceRequest(FrappeTestCase):
 	# @patch('woocommerce_fusion.tasks.utils.frappe')
 	# def test_no_response(self, mock_frappe):
 	# 	# Test the function when res is None
+
+
+class TestRequestLogBuffer(FrappeTestCase):
+	def tearDown(self):
+		with patch("woocommerce_fusion.tasks.utils.frappe.enqueue"):
+			flush_woocommerce_request_logs()
+
+	@patch("woocommerce_fusion.tasks.utils.REQUEST_LOG_FLUSH_SIZE", 2)
+	@patch("woocommerce_fusion.tasks.utils.frappe.enqueue")
+	def test_buffered_logs_are_flushed_in_a_single_job(self, mock_enqueue):
+		mock_response = Mock()
+		mock_response.status_code = 200
+		mock_response.text = "Success response text"
+		mock_response.elapsed.total_seconds.return_value = 0.1
+
+		# The first log is only buffered
+		buffer_woocommerce_request_log(
+			url="http://example.com", endpoint="products", request_method="GET", params=None, data=None
+		)
+		mock_enqueue.assert_not_called()
+
+		# The second log fills the buffer, so both logs are enqueued for insertion together
+		buffer_woocommerce_request_log(
+			url="http://example.com",
+			endpoint="products",
+			request_method="GET",
+			params=None,
+			data=None,
+			res=mock_response,
+		)
+		mock_enqueue.assert_called_once()
+		logs = mock_enqueue.call_args.kwargs["logs"]
+		self.assertEqual([log["status"] for log in logs], ["Error", "Success"])
+
+	@patch("woocommerce_fusion.tasks.utils.frappe.enqueue")
+	def test_decorated_jobs_flush_buffered_logs_once_at_the_end(self, mock_enqueue):
+		def log_request():
+			buffer_woocommerce_request_log(
+				url="http://example.com", endpoint="products", request_method="GET", params=None, data=None
+			)
+
+		@flush_request_logs_afterwards
+		def nested_job():
+			log_request()
+
+		@flush_request_logs_afterwards
+		def job():
+			log_request()
+			nested_job()
+			mock_enqueue.assert_not_called()
+			raise ValueError()
+
+		# Logs are flushed when the outermost job ends, even if it fails
+		with self.assertRaises(ValueError):
+			job()
+		mock_enqueue.assert_called_once()
+		self.assertEqual(len(mock_enqueue.call_args.kwargs["logs"]), 2)
+
+
+class TestRequestLogPolicy(FrappeTestCase):
+	def test_bodies_are_truncated_to_max_body_size(self):
+		policy = RequestLogPolicy(max_body_size=5)
+		self.assertEqual(policy.truncate("abc"), "abc")
+		self.assertEqual(policy.truncate("abcdefgh"), "abcde\n... (3 characters truncated)")
+		self.assertEqual(RequestLogPolicy().truncate("abcdefgh"), "abcdefgh")
+
+	@patch("woocommerce_fusion.tasks.utils.buffer_woocommerce_request_log")
+	@patch("woocommerce_fusion.tasks.utils.frappe.flags")
+	def test_successful_requests_are_sampled_and_failures_always_logged(
+		self, mock_flags, mock_buffer
+	):
+		mock_flags.in_test = False
+		api = APIWithRequestLogging(
+			url="https://site1.example.com",
+			consumer_key="ck",
+			consumer_secret="cs",
+			log_policy=RequestLogPolicy(success_sample_rate=0, stack_on_failure_only=True),
+		)
+		with patch.object(APIWithRequestLogging, "_send_request") as mock_send_request:
+			mock_send_request.return_value = Mock(status_code=200)
+			api.get("products")
+			mock_buffer.assert_not_called()
+
+			mock_send_request.return_value = Mock(status_code=400)
+			api.get("products")
+			mock_buffer.assert_called_once()
+			self.assertIsNotNone(mock_buffer.call_args.kwargs["traceback"])
+
+
+class TestRequestRateLimiter(FrappeTestCase):
+	def test_requests_are_spaced_at_the_configured_rate(self):
+		rate_limiter = RequestRateLimiter(max_rate=2, slow_response_time=5)
+		self.assertEqual(rate_limiter.reserve(), 0)
+		self.assertAlmostEqual(rate_limiter.reserve(), 0.5, places=1)
+
+	def test_rate_is_lowered_by_429_and_slow_responses_and_recovers(self):
+		rate_limiter = RequestRateLimiter(max_rate=10, slow_response_time=5)
+
+		rate_limiter.record_response(status_code=429, elapsed=0.1)
+		self.assertEqual(rate_limiter.rate, 5)
+		rate_limiter.record_response(status_code=200, elapsed=6)
+		self.assertEqual(rate_limiter.rate, 2.5)
+		rate_limiter.record_response(status_code=200, elapsed=0.1)
+		self.assertEqual(rate_limiter.rate, 3.5)
+
+	def test_retry_after_blocks_requests(self):
+		rate_limiter = RequestRateLimiter(max_rate=10, slow_response_time=5)
+		rate_limiter.record_response(status_code=429, elapsed=0.1, retry_after="30")
+		self.assertGreater(rate_limiter.reserve(), 29)
+
+	def test_rate_limiter_is_shared_per_site_and_server(self):
+		rate_limiter = get_rate_limiter("site1.example.com", max_rate=10)
+		self.assertIs(get_rate_limiter("site1.example.com", max_rate=10), rate_limiter)
+		self.assertIsNot(get_rate_limiter("site2.example.com", max_rate=10), rate_limiter)
+
+		# A WooCommerce Server with the same name on another site gets its own rate limiter
+		site = frappe.local.site
+		frappe.local.site = "other-site"
+		try:
+			other_site_rate_limiter = get_rate_limiter("site1.example.com", max_rate=10)
+		finally:
+			frappe.local.site = site
+		self.assertIsNot(other_site_rate_limiter, rate_limiter)
+
+
+@patch("woocommerce_fusion.tasks.utils.time.sleep")
+class TestRetries(FrappeTestCase):
+	def setUp(self):
+		self.api = APIWithRequestLogging(
+			url="https://site1.example.com", consumer_key="ck", consumer_secret="cs", max_retries=2
+		)
+
+	@patch.object(APIWithRequestLogging, "_send_and_log_request")
+	def test_get_is_retried_after_temporary_errors(self, mock_send, mock_sleep):
+		mock_send.side_effect = [
+			requests.Timeout(),
+			Mock(status_code=502, headers={}),
+			Mock(status_code=200, headers={}),
+		]
+
+		response = self.api.get("products")
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(mock_send.call_count, 3)
+		self.assertEqual(mock_sleep.call_count, 2)
+
+	@patch.object(APIWithRequestLogging, "_send_and_log_request")
+	def test_retries_are_limited_and_post_is_not_retried(self, mock_send, mock_sleep):
+		mock_send.return_value = Mock(status_code=503, headers={"retry-after": "2"})
+
+		self.assertEqual(self.api.get("products").status_code, 503)
+		self.assertEqual(mock_send.call_count, 3)
+		self.assertGreaterEqual(mock_sleep.call_args.args[0], 2)
+
+		mock_send.reset_mock()
+		self.assertEqual(self.api.post("products", data={}).status_code, 503)
+		mock_send.assert_called_once()
+
+
+class TestCircuitBreaker(FrappeTestCase):
+	def setUp(self):
+		self.circuit_breaker = CircuitBreaker("site1.example.com", threshold=2, cooldown=60)
+		self.circuit_breaker.reset()
+
+	def tearDown(self):
+		self.circuit_breaker.reset()
+
+	def test_circuit_opens_after_consecutive_failures(self):
+		self.circuit_breaker.record_failure()
+		self.assertFalse(self.circuit_breaker.before_request())
+
+		self.circuit_breaker.record_failure()
+		self.assertEqual(self.circuit_breaker.get_status()["state"], "Open")
+		with self.assertRaises(CircuitOpenError):
+			self.circuit_breaker.before_request()
+
+	def test_single_probe_closes_circuit_when_half_open(self):
+		self.circuit_breaker.record_failure()
+		self.circuit_breaker.record_failure()
+
+		# Let the cool-down period pass
+		frappe.cache().delete(self.circuit_breaker.open_key)
+		self.assertEqual(self.circuit_breaker.get_status()["state"], "Half-Open")
+
+		# Only one probe request is allowed
+		self.assertTrue(self.circuit_breaker.before_request())
+		with self.assertRaises(CircuitOpenError):
+			self.circuit_breaker.before_request()
+
+		self.circuit_breaker.record_success(is_probe=True)
+		self.assertEqual(self.circuit_breaker.get_status()["state"], "Closed")
+		self.assertFalse(self.circuit_breaker.before_request())
+
+
+class TestPooledSessions(FrappeTestCase):
+	def tearDown(self):
+		evict_pooled_session("site1.example.com")
+
+	def test_pooled_session_is_reused_until_evicted(self):
+		session = get_pooled_session("site1.example.com")
+		self.assertIs(get_pooled_session("site1.example.com"), session)
+
+		evict_pooled_session("site1.example.com")
+		self.assertIsNot(get_pooled_session("site1.example.com"), session)
+
+	def test_pooled_session_is_not_reused_with_other_settings_or_site(self):
+		session = get_pooled_session("site1.example.com", connection_settings={"verify_ssl": True})
+
+		# Changed connection settings get a new session, and the stale one is closed
+		with patch.object(session, "close") as mock_close:
+			new_session = get_pooled_session(
+				"site1.example.com", connection_settings={"verify_ssl": False}
+			)
+		self.assertIsNot(new_session, session)
+		mock_close.assert_called_once()
+
+		# A WooCommerce Server with the same name on another site gets its own session
+		site = frappe.local.site
+		frappe.local.site = "other-site"
+		try:
+			other_site_session = get_pooled_session(
+				"site1.example.com", connection_settings={"verify_ssl": False}
+			)
+			evict_pooled_session("site1.example.com")
+		finally:
+			frappe.local.site = site
+		self.assertIsNot(other_site_session, new_session)
+		self.assertIs(
+			get_pooled_session("site1.example.com", connection_settings={"verify_ssl": False}),
+			new_session,
+		)
+
+	@patch.object(requests.Session, "request")
+	def test_api_linked_to_a_server_uses_the_pooled_session(self, mock_request):
+		api = APIWithRequestLogging(
+			url="https://site1.example.com",
+			consumer_key="foo",
+			consumer_secret="bar",
+			woocommerce_server="site1.example.com",
+		)
+		api.get("orders", params={"per_page": 1})
+
+		mock_request.assert_called_once()
+		self.assertEqual(
+			mock_request.call_args.kwargs["url"], "https://site1.example.com/wp-json/wc/v3/orders"
+		)
+		self.assertEqual(mock_request.call_args.kwargs["params"], {"per_page": 1})
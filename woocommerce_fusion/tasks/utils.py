@@ -1,44 +1,581 @@
+import functools
+import hashlib
+import random
+import threading
+import time
 import traceback
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from json import dumps as jsonencode
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
 
 import frappe
 import requests
+from frappe.utils import now
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
 from woocommerce import API
 
+from woocommerce_fusion.exceptions import CircuitOpenError
+
+DEFAULT_HTTP_POOL_SIZE = 10
+DEFAULT_MAX_REQUESTS_PER_SECOND = 10
+DEFAULT_SLOW_RESPONSE_TIME = 5
+MIN_REQUESTS_PER_SECOND = 0.2
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 1
+MAX_RETRY_DELAY = 60
+RETRYABLE_METHODS = ("GET", "PUT")
+RETRYABLE_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+DEFAULT_CIRCUIT_BREAKER_THRESHOLD = 5
+DEFAULT_CIRCUIT_BREAKER_COOLDOWN = 60
+CIRCUIT_BREAKER_FAILURE_STATUS_CODES = (500, 502, 503, 504)
+REQUEST_LOG_FLUSH_SIZE = 50
+REQUEST_LOG_FIELDS = (
+	"user",
+	"url",
+	"endpoint",
+	"method",
+	"params",
+	"data",
+	"response",
+	"error",
+	"status",
+	"traceback",
+	"time_elapsed",
+)
+
+
+@dataclass
+class RequestLogPolicy:
+	"""Which requests to a WooCommerce Server are logged, and how much of them is stored"""
+
+	success_sample_rate: float = 100
+	max_body_size: int = 0
+	stack_on_failure_only: bool = False
+
+	@classmethod
+	def from_server(cls, server) -> "RequestLogPolicy":
+		success_sample_rate = server.request_log_success_sample_rate
+		return cls(
+			success_sample_rate=100 if success_sample_rate is None else success_sample_rate,
+			max_body_size=server.request_log_max_body_size or 0,
+			stack_on_failure_only=bool(server.request_log_stack_on_failure_only),
+		)
+
+	def should_log_success(self) -> bool:
+		return random.random() * 100 < self.success_sample_rate
+
+	def truncate(self, body: Optional[str]) -> Optional[str]:
+		if not body or not self.max_body_size or len(body) <= self.max_body_size:
+			return body
+		return f"{body[: self.max_body_size]}\n... ({len(body) - self.max_body_size} characters truncated)"
+
+
+# Keep-alive sessions per site, WooCommerce Server and hash of the connection settings
+_session_pool: Dict[Tuple[str, str, str], requests.Session] = {}
+_session_pool_lock = threading.Lock()
+
+# Request rate limiters per site and WooCommerce Server
+_rate_limiters: Dict[Tuple[str, str], "RequestRateLimiter"] = {}
+_rate_limiters_lock = threading.Lock()
+
+# Buffered 'WooCommerce Request Log' records per site
+_request_log_buffer: Dict[str, List[Dict]] = {}
+_request_log_buffer_lock = threading.Lock()
+
+
+def get_pooled_session(
+	woocommerce_server: str,
+	pool_size: Optional[int] = None,
+	connection_settings: Optional[Dict] = None,
+) -> requests.Session:
+	"""
+	Return the keep-alive requests.Session for a WooCommerce Server, creating it on first use.
+
+	Sessions are kept for the lifetime of the worker process, so that TCP and TLS connections
+	are reused across API calls and background jobs. Sessions are pooled per site, and changed
+	connection settings get a new session, so that no worker reuses a session with stale settings.
+	"""
+	pool_size = pool_size or DEFAULT_HTTP_POOL_SIZE
+	connection_settings = {**(connection_settings or {}), "pool_size": pool_size}
+	key = get_session_pool_key(woocommerce_server, connection_settings)
+	session = _session_pool.get(key)
+	if session is None:
+		stale_sessions = []
+		with _session_pool_lock:
+			session = _session_pool.get(key)
+			if session is None:
+				# Sessions with previous connection settings of this server will not be used again
+				stale_sessions = pop_pooled_sessions(woocommerce_server)
+				adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+				session = requests.Session()
+				session.mount("https://", adapter)
+				session.mount("http://", adapter)
+				_session_pool[key] = session
+		for stale_session in stale_sessions:
+			stale_session.close()
+	return session
+
+
+def get_session_pool_key(
+	woocommerce_server: str, connection_settings: Dict
+) -> Tuple[str, str, str]:
+	settings_hash = hashlib.sha256(
+		jsonencode(connection_settings, sort_keys=True, default=str).encode()
+	).hexdigest()
+	return (frappe.local.site, woocommerce_server, settings_hash)
+
+
+def pop_pooled_sessions(woocommerce_server: str) -> List[requests.Session]:
+	"""
+	Forget the pooled sessions of a WooCommerce Server on the current site. Call with
+	_session_pool_lock held
+	"""
+	keys = [key for key in _session_pool if key[:2] == (frappe.local.site, woocommerce_server)]
+	return [_session_pool.pop(key) for key in keys]
+
+
+def evict_pooled_session(woocommerce_server: str):
+	"""
+	Close and forget the pooled requests.Sessions of a WooCommerce Server
+	"""
+	with _session_pool_lock:
+		sessions = pop_pooled_sessions(woocommerce_server)
+	for session in sessions:
+		session.close()
+
+
+class RequestRateLimiter:
+	"""
+	Token bucket that limits the rate of requests to a WooCommerce Server.
+
+	The rate starts at max_rate. It is halved whenever the server responds with 429 Too Many
+	Requests or takes longer than slow_response_time to respond, and recovers gradually with every
+	fast response. A Retry-After header blocks all requests to the server until the given time.
+	"""
+
+	def __init__(self, max_rate: float, slow_response_time: float):
+		self.max_rate = max_rate
+		self.slow_response_time = slow_response_time
+		self.rate = max_rate
+		self.tokens = 1.0
+		self.updated_at = time.monotonic()
+		self.blocked_until = 0.0
+		self.lock = threading.Lock()
+
+	def reserve(self) -> float:
+		"""
+		Take a token from the bucket and return the number of seconds to wait before sending the request
+		"""
+		with self.lock:
+			now = time.monotonic()
+			self.tokens = min(1.0, self.tokens + (now - self.updated_at) * self.rate)
+			self.updated_at = now
+			self.tokens -= 1
+			wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+			return max(wait, self.blocked_until - now)
+
+	def acquire(self):
+		"""
+		Wait until a request may be sent
+		"""
+		wait = self.reserve()
+		if wait > 0:
+			time.sleep(wait)
+
+	def record_response(self, status_code: int, elapsed: float, retry_after: Optional[str] = None):
+		"""
+		Adapt the rate to the response of the WooCommerce Server
+		"""
+		with self.lock:
+			if retry_after and (delay := parse_retry_after(retry_after)):
+				self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+			if status_code == 429 or elapsed > self.slow_response_time:
+				self.rate = max(MIN_REQUESTS_PER_SECOND, self.rate / 2)
+			else:
+				self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+def parse_retry_after(retry_after: str) -> Optional[float]:
+	"""
+	Returns the number of seconds in a Retry-After header, which is either a number or an HTTP date
+	"""
+	try:
+		return float(retry_after)
+	except (TypeError, ValueError):
+		pass
+	try:
+		return parsedate_to_datetime(retry_after).timestamp() - time.time()
+	except (TypeError, ValueError):
+		return None
+
+
+def get_rate_limiter(
+	woocommerce_server: str,
+	max_rate: Optional[float] = None,
+	slow_response_time: Optional[float] = None,
+) -> RequestRateLimiter:
+	"""
+	Return the request rate limiter of a WooCommerce Server, which is shared by all its APIs in this process
+	"""
+	max_rate = max_rate or DEFAULT_MAX_REQUESTS_PER_SECOND
+	slow_response_time = slow_response_time or DEFAULT_SLOW_RESPONSE_TIME
+	key = (frappe.local.site, woocommerce_server)
+	with _rate_limiters_lock:
+		rate_limiter = _rate_limiters.get(key)
+		if rate_limiter is None:
+			rate_limiter = RequestRateLimiter(max_rate, slow_response_time)
+			_rate_limiters[key] = rate_limiter
+		elif (rate_limiter.max_rate, rate_limiter.slow_response_time) != (max_rate, slow_response_time):
+			rate_limiter.max_rate = max_rate
+			rate_limiter.rate = min(rate_limiter.rate, max_rate)
+			rate_limiter.slow_response_time = slow_response_time
+	return rate_limiter
+
+
+class CircuitBreaker:
+	"""
+	Circuit breaker for a WooCommerce Server, with its state shared between workers through Redis.
+
+	After 'threshold' consecutive failed requests the circuit opens, and requests fail immediately
+	with CircuitOpenError for 'cooldown' seconds. After that, a single worker may send a probe request
+	(half-open): if it succeeds, the circuit closes, otherwise it opens again.
+	"""
+
+	def __init__(
+		self, woocommerce_server: str, threshold: Optional[int] = None, cooldown: Optional[int] = None
+	):
+		self.woocommerce_server = woocommerce_server
+		self.threshold = DEFAULT_CIRCUIT_BREAKER_THRESHOLD if threshold is None else threshold
+		self.cooldown = cooldown or DEFAULT_CIRCUIT_BREAKER_COOLDOWN
+		cache = frappe.cache()
+		self.failures_key = cache.make_key(f"woocommerce_circuit_breaker|{woocommerce_server}|failures")
+		self.open_key = cache.make_key(f"woocommerce_circuit_breaker|{woocommerce_server}|open")
+		self.probe_key = cache.make_key(f"woocommerce_circuit_breaker|{woocommerce_server}|probe")
+
+	@property
+	def enabled(self) -> bool:
+		return self.threshold > 0
+
+	def get_status(self) -> Dict:
+		"""
+		Returns the state ("Closed", "Open" or "Half-Open") and the number of consecutive failures
+		"""
+		is_open, failures = frappe.cache().mget([self.open_key, self.failures_key])
+		failures = int(failures or 0)
+		if is_open:
+			state = "Open"
+		elif self.enabled and failures >= self.threshold:
+			state = "Half-Open"
+		else:
+			state = "Closed"
+		return {
+			"state": state,
+			"failures": failures,
+			"retry_in": frappe.cache().ttl(self.open_key) if is_open else None,
+		}
+
+	def before_request(self) -> bool:
+		"""
+		Raise CircuitOpenError if no request may be sent. Returns True if this request is a probe
+		"""
+		if not self.enabled:
+			return False
+
+		is_open, failures = frappe.cache().mget([self.open_key, self.failures_key])
+		if not is_open and int(failures or 0) < self.threshold:
+			return False
+
+		# Half-open: only one worker at a time may send a probe request
+		if not is_open and frappe.cache().set(self.probe_key, 1, nx=True, ex=self.cooldown):
+			return True
+
+		raise CircuitOpenError(
+			frappe._(
+				"WooCommerce Server {0} is unavailable after {1} consecutive failed requests. Retrying later"
+			).format(self.woocommerce_server, int(failures or 0))
+		)
+
+	def record_success(self, is_probe: bool = False):
+		if not self.enabled:
+			return
+		frappe.cache().delete(self.failures_key, *([self.probe_key] if is_probe else []))
+
+	def record_failure(self, is_probe: bool = False):
+		if not self.enabled:
+			return
+		cache = frappe.cache()
+		failures = cache.incr(self.failures_key)
+		if is_probe or failures >= self.threshold:
+			cache.set(self.open_key, 1, ex=self.cooldown)
+		if is_probe:
+			cache.delete(self.probe_key)
+
+	def reset(self):
+		frappe.cache().delete(self.failures_key, self.open_key, self.probe_key)
+
 
 class APIWithRequestLogging(API):
 	"""WooCommerce API with Request Logging."""
 
+	def __init__(
+		self,
+		url,
+		consumer_key,
+		consumer_secret,
+		woocommerce_server: Optional[str] = None,
+		pool_size: Optional[int] = None,
+		log_policy: Optional[RequestLogPolicy] = None,
+		max_requests_per_second: Optional[float] = None,
+		slow_response_time: Optional[float] = None,
+		max_retries: Optional[int] = None,
+		retry_backoff: Optional[float] = None,
+		circuit_breaker_threshold: Optional[int] = None,
+		circuit_breaker_cooldown: Optional[int] = None,
+		**kwargs,
+	):
+		super().__init__(url, consumer_key, consumer_secret, **kwargs)
+		self.woocommerce_server = woocommerce_server
+		self.pool_size = pool_size
+		self.log_policy = log_policy or RequestLogPolicy()
+		self.max_requests_per_second = max_requests_per_second
+		self.slow_response_time = slow_response_time
+		self.max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+		self.retry_backoff = DEFAULT_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+		self.circuit_breaker_threshold = circuit_breaker_threshold
+		self.circuit_breaker_cooldown = circuit_breaker_cooldown
+
+	@property
+	def circuit_breaker(self) -> Optional[CircuitBreaker]:
+		if not self.woocommerce_server:
+			return None
+		return CircuitBreaker(
+			self.woocommerce_server, self.circuit_breaker_threshold, self.circuit_breaker_cooldown
+		)
+
+	@property
+	def rate_limiter(self) -> Optional[RequestRateLimiter]:
+		if not self.woocommerce_server:
+			return None
+		return get_rate_limiter(
+			self.woocommerce_server, self.max_requests_per_second, self.slow_response_time
+		)
+
 	def _API__request(self, method, endpoint, data, params=None, **kwargs):
-		"""Override _request method to also create a 'WooCommerce Request Log'"""
+		"""Override _request method to retry idempotent requests that failed temporarily"""
+		attempt = 0
+		while True:
+			try:
+				result = self._send_and_log_request(method, endpoint, data, params, **kwargs)
+			except (requests.ConnectionError, requests.Timeout):
+				if not self.should_retry(method, attempt):
+					raise
+				retry_after = None
+			else:
+				if result.status_code not in RETRYABLE_STATUS_CODES or not self.should_retry(
+					method, attempt
+				):
+					return result
+				retry_after = result.headers.get("retry-after")
+
+			time.sleep(self.get_retry_delay(attempt, retry_after))
+			attempt += 1
+
+	def should_retry(self, method: str, attempt: int) -> bool:
+		return method.upper() in RETRYABLE_METHODS and attempt < self.max_retries
+
+	def get_retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+		"""
+		Exponential backoff with full jitter, or the delay requested by the server if that is longer
+		"""
+		delay = random.uniform(0, self.retry_backoff * 2**attempt)
+		if retry_after and (requested_delay := parse_retry_after(retry_after)):
+			delay = max(delay, requested_delay)
+		return min(delay, MAX_RETRY_DELAY)
+
+	def _send_and_log_request(self, method, endpoint, data, params=None, **kwargs):
+		"""Send a request, and also create a 'WooCommerce Request Log'"""
 		result = None
 		try:
-			result = super()._API__request(method, endpoint, data, params, **kwargs)
-			if not frappe.flags.in_test:
-				frappe.enqueue(
-					"woocommerce_fusion.tasks.utils.log_woocommerce_request",
-					url=self.url,
-					endpoint=endpoint,
-					request_method=method,
-					params=params,
-					data=data,
-					res=result,
-					traceback="".join(traceback.format_stack(limit=8)),
-				)
+			result = self._send_request(method, endpoint, data, params, **kwargs)
+			self.log_response(method, endpoint, data, params, result)
 			return result
+		except CircuitOpenError:
+			# No request was sent
+			raise
 		except Exception as e:
-			if not frappe.flags.in_test:
-				frappe.enqueue(
-					"woocommerce_fusion.tasks.utils.log_woocommerce_request",
-					url=self.url,
-					endpoint=endpoint,
-					request_method=method,
-					params=params,
-					data=data,
-					res=result,
-					traceback="".join(traceback.format_stack(limit=8)),
-				)
+			self.log_error(method, endpoint, data, params, result)
 			raise e
 
+	def log_response(self, method, endpoint, data, params, result):
+		if frappe.flags.in_test:
+			return
+
+		is_success = result.status_code in [200, 201]
+		if not is_success or self.log_policy.should_log_success():
+			buffer_woocommerce_request_log(
+				url=self.url,
+				endpoint=endpoint,
+				request_method=method,
+				params=params,
+				data=data,
+				res=result,
+				traceback=(
+					"".join(traceback.format_stack(limit=8))
+					if not (is_success and self.log_policy.stack_on_failure_only)
+					else None
+				),
+				log_policy=self.log_policy,
+			)
+
+	def log_error(self, method, endpoint, data, params, result=None):
+		if frappe.flags.in_test:
+			return
+
+		buffer_woocommerce_request_log(
+			url=self.url,
+			endpoint=endpoint,
+			request_method=method,
+			params=params,
+			data=data,
+			res=result,
+			traceback="".join(traceback.format_stack(limit=8)),
+			error=frappe.get_traceback(),
+			log_policy=self.log_policy,
+		)
+
+	def _send_request(self, method, endpoint, data, params=None, **kwargs):
+		"""
+		Send the request over the pooled Session of this API's WooCommerce Server.
+
+		This mirrors woocommerce.API's own request handling, which opens a new connection for
+		every call. APIs that are not linked to a WooCommerce Server fall back to that behaviour.
+		"""
+		# Additional headers (e.g. for conditional requests) are only sent over the pooled Session
+		extra_headers = kwargs.pop("headers", None)
+
+		if not self.woocommerce_server:
+			return super()._API__request(method, endpoint, data, params, **kwargs)
+
+		url, auth, params, data, headers = self._prepare_request(
+			method, endpoint, data, params, extra_headers, **kwargs
+		)
+
+		circuit_breaker = self.circuit_breaker
+		is_probe = circuit_breaker.before_request()
+
+		rate_limiter = self.rate_limiter
+		rate_limiter.acquire()
+
+		session = get_pooled_session(
+			self.woocommerce_server,
+			self.pool_size,
+			connection_settings={
+				"url": self.url,
+				"consumer_key": self.consumer_key,
+				"consumer_secret": self.consumer_secret,
+				"verify_ssl": self.verify_ssl,
+			},
+		)
+		started_at = time.monotonic()
+		try:
+			response = session.request(
+				method=method,
+				url=url,
+				verify=self.verify_ssl,
+				auth=HTTPBasicAuth(*auth) if auth else None,
+				params=params,
+				data=data,
+				timeout=self.timeout,
+				headers=headers,
+				**kwargs,
+			)
+		except (requests.ConnectionError, requests.Timeout):
+			self._record_outcome(circuit_breaker, is_probe, rate_limiter, started_at)
+			raise
+
+		self._record_outcome(circuit_breaker, is_probe, rate_limiter, started_at, response)
+		return response
+
+	def _prepare_request(
+		self, method, endpoint, data, params=None, extra_headers: Optional[Dict] = None, **kwargs
+	) -> Tuple[str, Optional[Tuple[str, str]], Dict, Optional[bytes], Dict]:
+		"""
+		Returns the url, basic auth credentials, params, body and headers of a request, the same way as
+		woocommerce.API does
+		"""
+		if params is None:
+			params = {}
+		url = self._API__get_url(endpoint)
+		auth = None
+		headers = {"user-agent": f"{self.user_agent}", "accept": "application/json"}
+		if extra_headers:
+			headers.update(extra_headers)
+
+		if self.is_ssl is True and self.query_string_auth is False:
+			auth = (self.consumer_key, self.consumer_secret)
+		elif self.is_ssl is True and self.query_string_auth is True:
+			params.update({"consumer_key": self.consumer_key, "consumer_secret": self.consumer_secret})
+		else:
+			url = f"{url}?{urlencode(params)}"
+			url = self._API__get_oauth_url(url, method, **kwargs)
+
+		if data is not None:
+			data = jsonencode(data, ensure_ascii=False).encode("utf-8")
+			headers["content-type"] = "application/json;charset=utf-8"
+
+		return url, auth, params, data, headers
+
+	@staticmethod
+	def _record_outcome(
+		circuit_breaker: Optional[CircuitBreaker],
+		is_probe: bool,
+		rate_limiter: Optional[RequestRateLimiter],
+		started_at: float,
+		response=None,
+	):
+		"""
+		Let the rate limiter and circuit breaker know how a request went. A response of None means that
+		no response was received, e.g. because of a connection error or timeout
+		"""
+		status_code = response.status_code if response is not None else 0
+		if rate_limiter:
+			rate_limiter.record_response(
+				status_code=status_code,
+				elapsed=time.monotonic() - started_at,
+				retry_after=response.headers.get("retry-after") if response is not None else None,
+			)
+		if circuit_breaker:
+			if response is None or status_code in CIRCUIT_BREAKER_FAILURE_STATUS_CODES:
+				circuit_breaker.record_failure(is_probe)
+			else:
+				circuit_breaker.record_success(is_probe)
+
+
+def get_api_kwargs(server) -> Dict[str, Any]:
+	"""
+	Returns the keyword arguments for an APIWithRequestLogging for a WooCommerce Server document
+	"""
+	return dict(
+		url=server.woocommerce_server_url,
+		consumer_key=server.api_consumer_key,
+		consumer_secret=server.api_consumer_secret,
+		version="wc/v3",
+		timeout=40,
+		woocommerce_server=server.name,
+		pool_size=server.http_pool_size,
+		log_policy=RequestLogPolicy.from_server(server),
+		max_requests_per_second=server.max_requests_per_second,
+		slow_response_time=server.slow_response_time,
+		max_retries=server.max_retries,
+		retry_backoff=server.retry_backoff,
+		circuit_breaker_threshold=server.circuit_breaker_threshold,
+		circuit_breaker_cooldown=server.circuit_breaker_cooldown,
+	)
+
 
 def log_woocommerce_request(
 	url: str,
@@ -52,18 +589,123 @@ def log_woocommerce_request(
 	request_log = frappe.get_doc(
 		{
 			"doctype": "WooCommerce Request Log",
-			"user": frappe.session.user if frappe.session.user else None,
-			"url": url,
-			"endpoint": endpoint,
-			"method": request_method,
-			"params": frappe.as_json(params) if params else None,
-			"data": frappe.as_json(data) if data else None,
-			"response": f"{str(res)}\n{res.text}" if res is not None else None,
-			"error": frappe.get_traceback(),
-			"status": "Success" if res and res.status_code in [200, 201] else "Error",
-			"traceback": traceback,
-			"time_elapsed": res.elapsed.total_seconds() if res is not None else None,
+			**get_woocommerce_request_log_values(
+				url, endpoint, request_method, params, data, res, traceback, error=frappe.get_traceback()
+			),
 		}
 	)
 
 	request_log.save(ignore_permissions=True)
+
+
+def get_woocommerce_request_log_values(
+	url: str,
+	endpoint: str,
+	request_method: str,
+	params: dict,
+	data: dict,
+	res: requests.Response | None = None,
+	traceback: str = None,
+	error: str = None,
+	log_policy: Optional[RequestLogPolicy] = None,
+) -> Dict:
+	"""
+	Returns the field values of a 'WooCommerce Request Log' as plain strings and numbers
+	"""
+	log_policy = log_policy or RequestLogPolicy()
+	return {
+		"user": frappe.session.user if frappe.session.user else None,
+		"url": url,
+		"endpoint": endpoint,
+		"method": request_method,
+		"params": frappe.as_json(params) if params else None,
+		"data": log_policy.truncate(frappe.as_json(data)) if data else None,
+		"response": log_policy.truncate(f"{str(res)}\n{res.text}") if res is not None else None,
+		"error": error,
+		"status": "Success" if res is not None and res.status_code in [200, 201] else "Error",
+		"traceback": traceback,
+		"time_elapsed": res.elapsed.total_seconds() if res is not None else None,
+	}
+
+
+def buffer_woocommerce_request_log(**kwargs):
+	"""
+	Add a 'WooCommerce Request Log' to the buffer of this site, and flush the buffer once it is full.
+
+	The buffer is also flushed after every web request (see hooks.py) and after every sync or stock
+	update job (see flush_request_logs_afterwards).
+	"""
+	values = get_woocommerce_request_log_values(**kwargs)
+	values["creation"] = now()
+
+	with _request_log_buffer_lock:
+		buffer = _request_log_buffer.setdefault(frappe.local.site, [])
+		buffer.append(values)
+		is_full = len(buffer) >= REQUEST_LOG_FLUSH_SIZE
+
+	if is_full:
+		flush_woocommerce_request_logs()
+
+
+def flush_woocommerce_request_logs():
+	"""
+	Enqueue a single job that inserts all buffered 'WooCommerce Request Log' records of this site
+	"""
+	if not getattr(frappe.local, "site", None):
+		return
+
+	with _request_log_buffer_lock:
+		logs = _request_log_buffer.pop(frappe.local.site, None)
+
+	if logs:
+		frappe.enqueue("woocommerce_fusion.tasks.utils.insert_woocommerce_request_logs", logs=logs)
+
+
+def flush_request_logs_afterwards(fn):
+	"""
+	Decorator that flushes the buffered 'WooCommerce Request Log' records once the outermost
+	decorated function returns or raises, as Frappe v14 has no 'after_job' hook
+	"""
+
+	@functools.wraps(fn)
+	def wrapper(*args, **kwargs):
+		# Nested calls, e.g. an item sync for each line item of an order, leave the flush to the caller
+		if getattr(frappe.local, "woocommerce_request_log_flush_pending", False):
+			return fn(*args, **kwargs)
+
+		frappe.local.woocommerce_request_log_flush_pending = True
+		try:
+			return fn(*args, **kwargs)
+		finally:
+			frappe.local.woocommerce_request_log_flush_pending = False
+			flush_woocommerce_request_logs()
+
+	return wrapper
+
+
+def insert_woocommerce_request_logs(logs: List[Dict]):
+	"""
+	Insert a list of 'WooCommerce Request Log' records with a single query
+	"""
+	fields = [
+		"name",
+		"owner",
+		"modified_by",
+		"creation",
+		"modified",
+		"docstatus",
+		*REQUEST_LOG_FIELDS,
+	]
+	values = [
+		(
+			frappe.generate_hash(length=10),
+			log.get("user") or "Administrator",
+			log.get("user") or "Administrator",
+			log["creation"],
+			log["creation"],
+			0,
+			*(log.get(fieldname) for fieldname in REQUEST_LOG_FIELDS),
+		)
+		for log in logs
+	]
+	frappe.db.bulk_insert("WooCommerce Request Log", fields=fields, values=values)
@@ -0,0 +1,545 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+from base64 import b64decode
+from collections import Counter
+from copy import deepcopy
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = "/wp-json/wc/v3/"
+DEFAULT_PER_PAGE = 10
+MAX_PER_PAGE = 100
+MAX_BATCH_SIZE = 100
+
+
+class FakeWooCommerceServer:
+	"""
+	A local stand-in for the wc/v3 REST API of a WooCommerce site, for tests and benchmarks that
+	should not depend on a real WooCommerce site or the network.
+
+	Implements the endpoints that this app uses: products, variations, orders, shipment trackings and
+	their batch endpoints, with pagination headers, the '_fields', 'include', 'status',
+	'modified_after' and 'after' parameters, and configurable latency and error injection.
+	Like WooCommerce, 'products/{id}' also returns variations:
+
+		with FakeWooCommerceServer(latency=0.05) as wc_server:
+			wc_server.add_product(name="T-Shirt", regular_price="10")
+			wc_server.fail_next_requests(2, status=503)
+			...  # point a WooCommerce Server at wc_server.url
+			wc_server.request_counts[("GET", "products")]
+	"""
+
+	def __init__(
+		self,
+		consumer_key: str = "ck_test",
+		consumer_secret: str = "cs_test",
+		latency: float = 0,
+		error_rate: float = 0,
+		error_status: int = 503,
+		seed: Optional[int] = None,
+	):
+		self.consumer_key = consumer_key
+		self.consumer_secret = consumer_secret
+		self.latency = latency
+		self.error_rate = error_rate
+		self.error_status = error_status
+		self.random = random.Random(seed)
+
+		self.products: Dict[int, Dict] = {}
+		self.variations: Dict[int, Dict[int, Dict]] = {}
+		self.orders: Dict[int, Dict] = {}
+		self.shipment_trackings: Dict[int, List[Dict]] = {}
+		self.request_counts: Counter = Counter()
+		self.requests: List[Tuple[str, str]] = []
+
+		self._next_id = 1
+		self._failures: List[Tuple[int, Optional[str]]] = []
+		self._lock = threading.RLock()
+		self._httpd: Optional[ThreadingHTTPServer] = None
+		self._thread: Optional[threading.Thread] = None
+
+	def __enter__(self) -> "FakeWooCommerceServer":
+		return self.start()
+
+	def __exit__(self, *exc_info):
+		self.stop()
+
+	@property
+	def url(self) -> str:
+		host, port = self._httpd.server_address[:2]
+		return f"http://{host}:{port}"
+
+	def start(self) -> "FakeWooCommerceServer":
+		self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeWooCommerceRequestHandler)
+		self._httpd.daemon_threads = True
+		self._httpd.fake_server = self
+		self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+		self._thread.start()
+		return self
+
+	def stop(self):
+		if self._httpd:
+			self._httpd.shutdown()
+			self._httpd.server_close()
+			self._thread.join()
+			self._httpd = self._thread = None
+
+	# Test data
+
+	def add_product(self, **fields) -> Dict:
+		with self._lock:
+			product = self._new_record(get_default_product(), fields)
+			self.products[product["id"]] = product
+			self.variations.setdefault(product["id"], {})
+			return deepcopy(product)
+
+	def add_variation(self, product_id: int, **fields) -> Dict:
+		with self._lock:
+			variation = self._new_record(
+				get_default_product(type="variation", parent_id=product_id), fields
+			)
+			self.variations.setdefault(product_id, {})[variation["id"]] = variation
+			self.products[product_id]["variations"].append(variation["id"])
+			return deepcopy(variation)
+
+	def add_order(self, **fields) -> Dict:
+		with self._lock:
+			order = self._new_record(get_default_order(), fields)
+			order["number"] = str(order["id"])
+			for line_item in order["line_items"]:
+				self._init_line_item(line_item)
+			self.orders[order["id"]] = order
+			return deepcopy(order)
+
+	def generate_catalog(self, products: int = 0, variations_per_product: int = 0, orders: int = 0):
+		"""
+		Add the given number of products (variable products if variations_per_product is set) and orders
+		"""
+		for i in range(products):
+			product = self.add_product(
+				name=f"Product {i}",
+				sku=f"SKU-{i}",
+				type="variable" if variations_per_product else "simple",
+				regular_price="10.00",
+			)
+			for j in range(variations_per_product):
+				self.add_variation(product["id"], sku=f"SKU-{i}-{j}", regular_price="10.00")
+		product_ids = list(self.products)
+		for i in range(orders):
+			self.add_order(
+				status="processing",
+				line_items=[{"product_id": product_ids[i % len(product_ids)], "quantity": 1}]
+				if product_ids
+				else [],
+			)
+
+	def fail_next_requests(
+		self, count: int = 1, status: int = 503, retry_after: Optional[str] = None
+	):
+		"""
+		Respond to the next count requests with the given error status
+		"""
+		with self._lock:
+			self._failures.extend([(status, retry_after)] * count)
+
+	def reset_request_counts(self):
+		with self._lock:
+			self.request_counts.clear()
+			self.requests.clear()
+
+	# Request handling
+
+	def handle(
+		self, method: str, path: str, query: Dict[str, List[str]], body: Optional[Dict]
+	) -> Tuple[int, Dict[str, str], object]:
+		"""
+		Returns the status, headers and JSON body of the response to a request
+		"""
+		route = path[len(API_PREFIX) :].strip("/")
+		with self._lock:
+			self.request_counts[(method, re.sub(r"\d+", "{id}", route))] += 1
+			self.requests.append((method, route))
+			failure = self._failures.pop(0) if self._failures else None
+
+		if self.latency:
+			time.sleep(self.latency)
+
+		if failure is None and self.error_rate and self.random.random() < self.error_rate:
+			failure = (self.error_status, None)
+		if failure:
+			status, retry_after = failure
+			headers = {"Retry-After": retry_after} if retry_after else {}
+			return status, headers, get_error("fake_error", "Injected error", status)
+
+		# Like PHP, use the last value of repeated parameters, except for lists of ids
+		params = {key: values[-1] for key, values in query.items()}
+		if include := query.get("include", []) + query.get("include[]", []):
+			params["include"] = ",".join(include)
+		with self._lock:
+			status, headers, response = self._route(method, route, params, body or {})
+
+		if fields := params.get("_fields"):
+			response = select_fields(response, fields.split(","))
+		return status, headers, response
+
+	def _route(self, method: str, route: str, params: Dict[str, str], body: Dict):
+		parts = route.split("/")
+		if parts[0] == "products":
+			if len(parts) >= 3 and parts[2] == "variations":
+				product_id = int(parts[1])
+				if product_id not in self.products:
+					return 404, {}, get_error("woocommerce_rest_product_invalid_id", "Invalid ID.", 404)
+				collection = self.variations.setdefault(product_id, {})
+				defaults = {"type": "variation", "parent_id": product_id}
+				return self._route_collection(method, parts[3:], params, body, collection, defaults)
+			if len(parts) == 2 and parts[1].isdigit() and method == "GET":
+				if variation := self._get_variation(int(parts[1])):
+					return 200, {}, deepcopy(variation)
+			return self._route_collection(method, parts[1:], params, body, self.products, {})
+
+		if parts[0] == "orders":
+			if len(parts) >= 3 and parts[2] == "shipment-trackings":
+				return self._route_shipment_trackings(method, parts, body)
+			return self._route_collection(method, parts[1:], params, body, self.orders, {})
+
+		return 404, {}, get_error("rest_no_route", "No route was found", 404)
+
+	def _get_variation(self, variation_id: int) -> Optional[Dict]:
+		return next(
+			(
+				variations[variation_id]
+				for variations in self.variations.values()
+				if variation_id in variations
+			),
+			None,
+		)
+
+	def _route_collection(
+		self, method: str, parts: List[str], params: Dict, body: Dict, collection: Dict, defaults: Dict
+	):
+		is_order = collection is self.orders
+		if not parts:
+			if method == "GET":
+				return self._list(collection, params)
+			if method == "POST":
+				return 201, {}, self._create(collection, body, defaults, is_order)
+		elif parts[0] == "batch" and method in ("POST", "PUT"):
+			return self._batch(collection, body, defaults, is_order)
+		elif parts[0].isdigit():
+			record_id = int(parts[0])
+			if record_id not in collection:
+				return 404, {}, get_error("woocommerce_rest_invalid_id", "Invalid ID.", 404)
+			if method == "GET":
+				return 200, {}, deepcopy(collection[record_id])
+			if method in ("PUT", "POST", "PATCH"):
+				return 200, {}, self._update(collection[record_id], body, is_order)
+			if method == "DELETE":
+				return 200, {}, self._delete(collection, record_id, params.get("force") == "true")
+		return 404, {}, get_error("rest_no_route", "No route was found", 404)
+
+	def _route_shipment_trackings(self, method: str, parts: List[str], body: Dict):
+		order_id = int(parts[1])
+		if order_id not in self.orders:
+			return 404, {}, get_error("woocommerce_rest_shop_order_invalid_id", "Invalid ID.", 404)
+		if len(parts) > 3 and parts[3] == "providers":
+			return 200, {}, {}
+		trackings = self.shipment_trackings.setdefault(order_id, [])
+		if method == "GET":
+			return 200, {}, deepcopy(trackings)
+		if method == "POST":
+			tracking = {"tracking_id": f"{order_id}-{len(trackings) + 1}", **body}
+			trackings.append(tracking)
+			return 201, {}, deepcopy(tracking)
+		return 404, {}, get_error("rest_no_route", "No route was found", 404)
+
+	def _list(self, collection: Dict, params: Dict):
+		records = [r for r in collection.values() if record_matches(r, params)]
+
+		orderby = params.get("orderby", "date")
+		sort_key = {"id": "id", "modified": "date_modified_gmt"}.get(orderby, "date_created_gmt")
+		records.sort(key=lambda r: (r[sort_key], r["id"]), reverse=params.get("order", "desc") == "desc")
+
+		per_page = min(int(params.get("per_page", DEFAULT_PER_PAGE)), MAX_PER_PAGE)
+		page = int(params.get("page", 1))
+		offset = int(params["offset"]) if "offset" in params else (page - 1) * per_page
+		headers = {
+			"X-WP-Total": str(len(records)),
+			"X-WP-TotalPages": str(math.ceil(len(records) / per_page) if per_page else 1),
+		}
+		return 200, headers, deepcopy(records[offset : offset + per_page])
+
+	def _create(self, collection: Dict, body: Dict, defaults: Dict, is_order: bool) -> Dict:
+		template = get_default_order() if is_order else get_default_product(**defaults)
+		record = self._new_record(template, body)
+		if is_order:
+			record["number"] = str(record["id"])
+			for line_item in record["line_items"]:
+				self._init_line_item(line_item)
+		collection[record["id"]] = record
+		if defaults.get("parent_id"):
+			self.products[defaults["parent_id"]]["variations"].append(record["id"])
+		return deepcopy(record)
+
+	def _update(self, record: Dict, body: Dict, is_order: bool) -> Dict:
+		for field, value in body.items():
+			if field in ("id", "date_created", "date_created_gmt"):
+				continue
+			if field == "meta_data" and isinstance(value, list):
+				merge_meta_data(record["meta_data"], value)
+			elif field == "line_items" and is_order and isinstance(value, list):
+				self._merge_line_items(record["line_items"], value)
+			elif isinstance(value, dict) and isinstance(record.get(field), dict):
+				record[field].update(value)
+			else:
+				record[field] = value
+		record["date_modified"] = record["date_modified_gmt"] = now()
+		return deepcopy(record)
+
+	def _delete(self, collection: Dict, record_id: int, force: bool) -> Dict:
+		if force:
+			return collection.pop(record_id)
+		collection[record_id]["status"] = "trash"
+		return deepcopy(collection[record_id])
+
+	def _batch(self, collection: Dict, body: Dict, defaults: Dict, is_order: bool):
+		batch_size = sum(len(body.get(action) or []) for action in ("create", "update", "delete"))
+		if batch_size > MAX_BATCH_SIZE:
+			message = f"Unable to accept more than {MAX_BATCH_SIZE} items for this request."
+			return 413, {}, get_error("rest_request_entity_too_large", message, 413)
+
+		response = {}
+		if "create" in body:
+			response["create"] = [
+				self._create(collection, data, defaults, is_order) for data in body["create"]
+			]
+		if "update" in body:
+			response["update"] = [
+				self._update(collection[int(data["id"])], data, is_order)
+				if int(data.get("id") or 0) in collection
+				else {
+					"id": data.get("id"),
+					"error": get_error("woocommerce_rest_invalid_id", "Invalid ID.", 400),
+				}
+				for data in body["update"]
+			]
+		if "delete" in body:
+			response["delete"] = [
+				self._delete(collection, int(record_id), force=True)
+				if int(record_id) in collection
+				else {"id": record_id, "error": get_error("woocommerce_rest_invalid_id", "Invalid ID.", 400)}
+				for record_id in body["delete"]
+			]
+		return 200, {}, response
+
+	def _new_record(self, template: Dict, fields: Dict) -> Dict:
+		record = {**template, **deepcopy(fields)}
+		record["id"] = self._take_id()
+		timestamp = now()
+		for field in ("date_created", "date_created_gmt", "date_modified", "date_modified_gmt"):
+			record[field] = fields.get(field) or timestamp
+		for meta in record.get("meta_data") or []:
+			meta.setdefault("id", self._take_id())
+		return record
+
+	def _init_line_item(self, line_item: Dict):
+		line_item.setdefault("id", self._take_id())
+		product = self.products.get(line_item.get("product_id"), {})
+		line_item.setdefault("name", product.get("name", ""))
+		line_item.setdefault("sku", product.get("sku", ""))
+		line_item.setdefault("variation_id", 0)
+		line_item.setdefault("quantity", 1)
+		line_item.setdefault("price", float(product.get("regular_price") or 0))
+		line_item.setdefault("subtotal", f"{line_item['price'] * line_item['quantity']:.2f}")
+		line_item.setdefault("total", line_item["subtotal"])
+		line_item.setdefault("taxes", [])
+		line_item.setdefault("meta_data", [])
+
+	def _merge_line_items(self, line_items: List[Dict], changes: List[Dict]):
+		"""
+		Update line items by id and add new ones. Line items with a product_id of None are removed
+		"""
+		for change in changes:
+			existing = next((li for li in line_items if li["id"] == change.get("id")), None)
+			if existing and "product_id" in change and change["product_id"] is None:
+				line_items.remove(existing)
+			elif existing:
+				existing.update(change)
+			elif change.get("product_id") is not None:
+				line_item = dict(change)
+				self._init_line_item(line_item)
+				line_items.append(line_item)
+
+	def _take_id(self) -> int:
+		self._next_id += 1
+		return self._next_id - 1
+
+	def is_authorised(self, headers, query: Dict[str, List[str]]) -> bool:
+		consumer_key = (query.get("consumer_key") or query.get("oauth_consumer_key") or [None])[0]
+		if not consumer_key and (auth := headers.get("Authorization", "")).startswith("Basic "):
+			consumer_key = b64decode(auth[6:]).decode().split(":")[0]
+		return consumer_key == self.consumer_key
+
+
+class FakeWooCommerceRequestHandler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+
+	def do_GET(self):
+		self.respond()
+
+	do_POST = do_PUT = do_PATCH = do_DELETE = do_GET
+
+	def respond(self):
+		fake_server: FakeWooCommerceServer = self.server.fake_server
+		url = urlparse(self.path)
+		query = parse_qs(url.query)
+		length = int(self.headers.get("Content-Length") or 0)
+		body = json.loads(self.rfile.read(length)) if length else None
+
+		if not url.path.startswith(API_PREFIX):
+			status, headers, response = 404, {}, get_error("rest_no_route", "No route was found", 404)
+		elif not fake_server.is_authorised(self.headers, query):
+			status, headers = 401, {}
+			response = get_error("woocommerce_rest_cannot_view", "Sorry, you cannot list resources.", 401)
+		else:
+			try:
+				status, headers, response = fake_server.handle(self.command, url.path, query, body)
+			except Exception as e:
+				status, headers, response = 500, {}, get_error("internal_server_error", repr(e), 500)
+
+		content = json.dumps(response).encode("utf-8")
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json; charset=UTF-8")
+		self.send_header("Content-Length", str(len(content)))
+		for header, value in headers.items():
+			self.send_header(header, value)
+		self.end_headers()
+		self.wfile.write(content)
+
+	def log_message(self, format, *args):
+		pass
+
+
+def get_default_product(**fields) -> Dict:
+	return {
+		"name": "",
+		"slug": "",
+		"type": "simple",
+		"status": "publish",
+		"description": "",
+		"short_description": "",
+		"sku": "",
+		"price": "",
+		"regular_price": "",
+		"sale_price": "",
+		"manage_stock": False,
+		"stock_quantity": None,
+		"weight": "",
+		"parent_id": 0,
+		"categories": [],
+		"images": [],
+		"attributes": [],
+		"variations": [],
+		"meta_data": [],
+		**fields,
+	}
+
+
+def get_default_order(**fields) -> Dict:
+	return {
+		"parent_id": 0,
+		"status": "pending",
+		"currency": "USD",
+		"discount_total": "0.00",
+		"shipping_total": "0.00",
+		"total": "0.00",
+		"customer_id": 0,
+		"customer_note": "",
+		"billing": {},
+		"shipping": {},
+		"payment_method": "",
+		"payment_method_title": "",
+		"date_paid": None,
+		"meta_data": [],
+		"line_items": [],
+		"tax_lines": [],
+		"shipping_lines": [],
+		"fee_lines": [],
+		"coupon_lines": [],
+		"refunds": [],
+		**fields,
+	}
+
+
+def record_matches(record: Dict, params: Dict[str, str]) -> bool:
+	status = params.get("status", "any")
+	if status == "any" and record["status"] == "trash":
+		return False
+	if status != "any" and record["status"] not in status.split(","):
+		return False
+	if (include := params.get("include")) and record["id"] not in {
+		int(i) for i in include.split(",") if i
+	}:
+		return False
+	if (sku := params.get("sku")) and record.get("sku") != sku:
+		return False
+	if (search := params.get("search")) and search.lower() not in str(record.get("name", "")).lower():
+		return False
+	for param, field, is_after in (
+		("after", "date_created_gmt", True),
+		("before", "date_created_gmt", False),
+		("modified_after", "date_modified_gmt", True),
+		("modified_before", "date_modified_gmt", False),
+	):
+		if value := params.get(param):
+			date, boundary = parse_date(record[field]), parse_date(value)
+			if (is_after and date <= boundary) or (not is_after and date >= boundary):
+				return False
+	return True
+
+
+def merge_meta_data(meta_data: List[Dict], changes: List[Dict]):
+	"""
+	Update meta data by id or key, and add new entries
+	"""
+	for change in changes:
+		existing = next(
+			(
+				meta
+				for meta in meta_data
+				if ("id" in change and meta.get("id") == change["id"]) or meta["key"] == change.get("key")
+			),
+			None,
+		)
+		if existing:
+			existing.update(change)
+		else:
+			meta_data.append({"id": max((m.get("id", 0) for m in meta_data), default=0) + 1, **change})
+
+
+def select_fields(response, fields: List[str]):
+	if isinstance(response, list):
+		return [select_fields(record, fields) for record in response]
+	if isinstance(response, dict):
+		return {field: value for field, value in response.items() if field in fields}
+	return response
+
+
+def get_error(code: str, message: str, status: int) -> Dict:
+	return {"code": code, "message": message, "data": {"status": status}}
+
+
+def now() -> str:
+	return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def parse_date(value: str) -> datetime:
+	date = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+	if date.tzinfo:
+		date = date.astimezone(timezone.utc).replace(tzinfo=None)
+	return date
@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+from frappe.tests.utils import FrappeTestCase
+
+from woocommerce_fusion.tasks.utils import APIWithRequestLogging
+from woocommerce_fusion.testing.fake_woocommerce_server import FakeWooCommerceServer
+
+
+class TestFakeWooCommerceServer(FrappeTestCase):
+	def setUp(self):
+		self.wc_server = FakeWooCommerceServer().start()
+		self.api = APIWithRequestLogging(
+			url=self.wc_server.url,
+			consumer_key=self.wc_server.consumer_key,
+			consumer_secret=self.wc_server.consumer_secret,
+			version="wc/v3",
+		)
+
+	def tearDown(self):
+		self.wc_server.stop()
+
+	def test_products_are_paginated_and_projected(self):
+		self.wc_server.generate_catalog(products=25)
+
+		response = self.api.get("products", params={"per_page": 10, "page": 3, "_fields": "id,sku"})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.headers["X-WP-Total"], "25")
+		self.assertEqual(response.headers["X-WP-TotalPages"], "3")
+		self.assertEqual(len(response.json()), 5)
+		self.assertEqual(set(response.json()[0]), {"id", "sku"})
+
+	def test_orders_are_filtered_and_batch_updated(self):
+		self.wc_server.generate_catalog(products=1, orders=3)
+		order_ids = list(self.wc_server.orders)
+		self.wc_server.orders[order_ids[0]]["date_modified_gmt"] = "2000-01-01T00:00:00"
+
+		response = self.api.get("orders", params={"modified_after": "2020-01-01T00:00:00"})
+		self.assertEqual({order["id"] for order in response.json()}, set(order_ids[1:]))
+
+		response = self.api.post(
+			"orders/batch",
+			data={
+				"update": [{"id": order_ids[0], "status": "completed"}, {"id": 999, "status": "completed"}]
+			},
+		)
+		self.assertEqual(response.json()["update"][0]["status"], "completed")
+		self.assertEqual(response.json()["update"][1]["error"]["code"], "woocommerce_rest_invalid_id")
+		self.assertEqual(self.wc_server.request_counts[("POST", "orders/batch")], 1)
+
+	def test_variations_are_retrieved_by_id_and_include(self):
+		product = self.wc_server.add_product(name="T-Shirt", type="variable")
+		variations = [
+			self.wc_server.add_variation(product["id"], sku=f"T-SHIRT-{size}") for size in "SML"
+		]
+
+		# Like WooCommerce, products/{id} also returns variations
+		response = self.api.get(f"products/{variations[0]['id']}")
+		self.assertEqual(response.json()["sku"], "T-SHIRT-S")
+		self.assertEqual(response.json()["parent_id"], product["id"])
+
+		response = self.api.get(
+			f"products/{product['id']}/variations",
+			params={"include": f"{variations[0]['id']},{variations[2]['id']}"},
+		)
+		self.assertEqual({v["sku"] for v in response.json()}, {"T-SHIRT-S", "T-SHIRT-L"})
+
+	@patch("woocommerce_fusion.tasks.utils.time.sleep")
+	def test_injected_errors_are_retried(self, mock_sleep):
+		product = self.wc_server.add_product(name="T-Shirt")
+		self.wc_server.fail_next_requests(2, status=503, retry_after="1")
+
+		response = self.api.get(f"products/{product['id']}")
+
+		self.assertEqual(response.json()["name"], "T-Shirt")
+		self.assertEqual(self.wc_server.request_counts[("GET", "products/{id}")], 3)
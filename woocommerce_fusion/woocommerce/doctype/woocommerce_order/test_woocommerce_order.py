@@ -16,8 +16,11 @@ from woocommerce_fusion.woocommerce.doctype.woocommerce_order.woocommerce_order
 	WooCommerceOrderAPI,
 )
 from woocommerce_fusion.woocommerce.woocommerce_api import (
+	clear_record_cache,
 	generate_woocommerce_record_name_from_domain_and_id,
 	get_domain_and_id_from_woocommerce_record_name,
+	get_update_patch,
+	get_validated_record_cache_key,
 )
 
 
@@ -156,6 +159,123 @@ class TestWooCommerceOrder(FrappeTestCase):
 					param.expected_order_counts,
 				)
 
+	def test_iter_records_requests_every_page_once(self, mock_init_api):
+		"""
+		Test that iter_records walks the pages of every server exactly once
+		"""
+		# Create mock API object list with 2 WooCommerce servers/API's
+		mock_api_list = [
+			WooCommerceOrderAPI(
+				api=Mock(),
+				woocommerce_server_url="http://site1.example.com",
+				woocommerce_server="site1.example.com",
+			),
+			WooCommerceOrderAPI(
+				api=Mock(),
+				woocommerce_server_url="http://site2.example.com",
+				woocommerce_server="site2.example.com",
+			),
+		]
+		mock_init_api.return_value = mock_api_list
+
+		# Server 1 has 2 full pages and one partial page, server 2 has one partial page
+		page_counts = [[2, 2, 1], [1]]
+		for woocommerce_api, counts in zip(mock_api_list, page_counts):
+			responses = []
+			for nr_of_orders in counts:
+				mock_get_response = Mock()
+				mock_get_response.status_code = 200
+				mock_get_response.json.return_value = wc_response_for_list_of_orders(
+					nr_of_orders, woocommerce_api.woocommerce_server_url
+				)
+				mock_get_response.headers = {"x-wp-total": sum(counts), "x-wp-totalpages": len(counts)}
+				responses.append(mock_get_response)
+			woocommerce_api.api.get.side_effect = responses
+
+		# Call the method to be tested
+		orders = list(WooCommerceOrder.iter_records(per_page=2))
+
+		# Verify that all orders were yielded
+		self.assertEqual(len(orders), 6)
+
+		# Verify that each page was requested once, using the 'page' parameter
+		self.assertEqual(mock_api_list[0].api.get.call_count, 3)
+		self.assertEqual(
+			[call.kwargs["params"]["page"] for call in mock_api_list[0].api.get.call_args_list], [1, 2, 3]
+		)
+		self.assertEqual(mock_api_list[1].api.get.call_count, 1)
+
+	def test_get_count_of_records_sums_totals_of_all_servers(self, mock_init_api):
+		"""
+		Test that get_count_of_records queries all servers and sums their 'x-wp-total' headers
+		"""
+		mock_api_list = [
+			WooCommerceOrderAPI(
+				api=Mock(),
+				woocommerce_server_url=f"http://site{x}.example.com",
+				woocommerce_server=f"site{x}.example.com",
+			)
+			for x in range(3)
+		]
+		mock_init_api.return_value = mock_api_list
+
+		for x, woocommerce_api in enumerate(mock_api_list):
+			mock_get_response = Mock()
+			mock_get_response.status_code = 200
+			mock_get_response.headers = {"x-wp-total": (x + 1) * 10}
+			woocommerce_api.api.get.return_value = mock_get_response
+
+		# Call the method to be tested
+		count = WooCommerceOrder.get_count_of_records({})
+
+		# Verify that every server was called once, and that the counts were summed
+		self.assertEqual(count, 60)
+		for woocommerce_api in mock_api_list:
+			woocommerce_api.api.get.assert_called_once_with("orders", params={"per_page": 1})
+
+	def test_get_wc_fields_parameter_maps_list_view_fields(self, mock_init_api):
+		"""
+		Test that Frappe fields are mapped to WooCommerce's '_fields' parameter
+		"""
+		self.assertEqual(
+			WooCommerceOrder.get_wc_fields_parameter(
+				["`tabWooCommerce Order`.`name`", "`tabWooCommerce Order`.`status`", "modified"]
+			),
+			"id,name,status,date_modified,date_created,date_created_gmt,date_modified_gmt",
+		)
+		self.assertIsNone(WooCommerceOrder.get_wc_fields_parameter(["count(*) as count"]))
+		self.assertIsNone(WooCommerceOrder.get_wc_fields_parameter(None))
+
+	def test_get_field_metadata_is_memoized(self, mock_init_api):
+		"""
+		Test that the field metadata of the DocType is only built once
+		"""
+		field_metadata = WooCommerceOrder.get_field_metadata()
+
+		self.assertIs(WooCommerceOrder.get_field_metadata(), field_metadata)
+		self.assertIn("line_items", field_metadata.json_fields)
+		self.assertIn("name", field_metadata.fieldnames)
+
+	@patch("woocommerce_fusion.woocommerce.woocommerce_api.json_codec.loads", side_effect=json.loads)
+	def test_get_json_parses_fields_once(self, mock_loads, mock_init_api):
+		"""
+		Test that JSON fields are only parsed again after they were changed
+		"""
+		woocommerce_order = frappe.get_doc({"doctype": "WooCommerce Order"})
+		woocommerce_order.line_items = json.dumps(dummy_wc_order["line_items"])
+
+		for x in range(3):
+			self.assertEqual(woocommerce_order.get_json("line_items"), dummy_wc_order["line_items"])
+		self.assertEqual(mock_loads.call_count, 1)
+
+		woocommerce_order.set_json("line_items", [{"id": 1, "product_id": None}])
+		self.assertEqual(woocommerce_order.get_json("line_items"), [{"id": 1, "product_id": None}])
+		self.assertEqual(json.loads(woocommerce_order.line_items), [{"id": 1, "product_id": None}])
+
+		woocommerce_order.line_items = "[]"
+		self.assertEqual(woocommerce_order.get_json("line_items"), [])
+		self.assertEqual(mock_loads.call_count, 2)
+
 	def test_load_from_db_initialises_doctype_with_all_values(self, mock_init_api):
 		"""
 		Test that load_from_db returns an Order
@@ -235,6 +355,144 @@ class TestWooCommerceOrder(FrappeTestCase):
 		# Verify that the orders endpoint is called
 		self.assertEqual(mock_api_list[0].api.get.call_args.args[0], f"orders/{order_id}")
 
+	@patch.object(WooCommerceOrder, "get_additional_order_attributes", side_effect=lambda x: x)
+	@patch.object(WooCommerceOrder, "call_super_init")
+	@patch.object(WooCommerceOrder, "__init__", return_value=None)
+	def test_load_from_db_serves_repeated_reads_from_cache(
+		self, mock_init, mocked_super_call, mock_get_additional_order_attributes, mock_init_api
+	):
+		"""
+		Test that load_from_db only retrieves a record once within the Record Cache Duration
+		"""
+		mock_api_list = [
+			WooCommerceOrderAPI(
+				api=Mock(),
+				woocommerce_server_url="http://site1.example.com",
+				woocommerce_server="site1.example.com",
+				record_cache_ttl=30,
+			)
+		]
+		mock_init_api.return_value = mock_api_list
+		mock_api_list[0].api.get.return_value.json.return_value = deepcopy(dummy_wc_order)
+
+		order_name = "site1.example.com" + WC_ORDER_DELIMITER + str(dummy_wc_order["id"])
+		clear_record_cache("WooCommerce Order", order_name)
+
+		for x in range(2):
+			woocommerce_order = WooCommerceOrder()
+			woocommerce_order.doctype = "WooCommerce Order"
+			woocommerce_order.name = order_name
+			woocommerce_order.load_from_db()
+
+		# Check that WooCommerce was only called once, but that both documents were initialised
+		mock_api_list[0].api.get.assert_called_once()
+		self.assertEqual(mocked_super_call.call_count, 2)
+		self.assertEqual(mocked_super_call.call_args_list[0], mocked_super_call.call_args_list[1])
+
+		# Check that the cache is bypassed when loading the record before saving it
+		woocommerce_order.load_from_db(use_cache=False)
+		self.assertEqual(mock_api_list[0].api.get.call_count, 2)
+
+		clear_record_cache("WooCommerce Order", order_name)
+
+	@patch.object(WooCommerceOrder, "get_additional_order_attributes", side_effect=lambda x: x)
+	@patch.object(WooCommerceOrder, "call_super_init")
+	@patch.object(WooCommerceOrder, "__init__", return_value=None)
+	def test_load_from_db_only_retrieves_modified_records_again(
+		self, mock_init, mocked_super_call, mock_get_additional_order_attributes, mock_init_api
+	):
+		"""
+		Test that load_from_db only requests the modification date of a record that was retrieved before
+		"""
+		mock_api_list = [
+			WooCommerceOrderAPI(
+				api=Mock(),
+				woocommerce_server_url="http://site1.example.com",
+				woocommerce_server="site1.example.com",
+				revalidation_cache_ttl=3600,
+			)
+		]
+		mock_init_api.return_value = mock_api_list
+		mock_api_list[0].api.get.return_value.headers = {}
+		mock_api_list[0].api.get.return_value.json.side_effect = [
+			deepcopy(dummy_wc_order),
+			{"id": dummy_wc_order["id"], "date_modified_gmt": dummy_wc_order["date_modified_gmt"]},
+		]
+
+		order_name = "site1.example.com" + WC_ORDER_DELIMITER + str(dummy_wc_order["id"])
+		frappe.cache().delete_value(get_validated_record_cache_key("WooCommerce Order", order_name))
+
+		for x in range(2):
+			woocommerce_order = WooCommerceOrder()
+			woocommerce_order.doctype = "WooCommerce Order"
+			woocommerce_order.name = order_name
+			woocommerce_order.load_from_db()
+
+		# Check that the second request only asked for the modification date
+		self.assertEqual(mock_api_list[0].api.get.call_count, 2)
+		self.assertEqual(
+			mock_api_list[0].api.get.call_args.kwargs["params"], {"_fields": "id,date_modified_gmt"}
+		)
+		self.assertEqual(mocked_super_call.call_args_list[0], mocked_super_call.call_args_list[1])
+
+		frappe.cache().delete_value(get_validated_record_cache_key("WooCommerce Order", order_name))
+
+	def test_clear_record_cache_clears_revalidation_cache(self, mock_init_api):
+		"""
+		Test that a changed record is removed from both the record cache and the revalidation cache
+		"""
+		order_name = "site1.example.com" + WC_ORDER_DELIMITER + str(dummy_wc_order["id"])
+		validated_record_cache_key = get_validated_record_cache_key("WooCommerce Order", order_name)
+		frappe.cache().set_value(validated_record_cache_key, {"record": deepcopy(dummy_wc_order)})
+
+		clear_record_cache("WooCommerce Order", order_name)
+
+		self.assertIsNone(frappe.cache().get_value(validated_record_cache_key))
+
+	@patch.object(WooCommerceOrder, "call_super_init")
+	@patch.object(WooCommerceOrder, "__init__", return_value=None)
+	def test_load_from_webhook_payload_only_retrieves_shipment_trackings(
+		self, mock_init, mocked_super_call, mock_init_api
+	):
+		"""
+		Test that an order is built from a kept webhook payload once, with only the additional
+		shipment trackings request, and that incomplete payloads are ignored
+		"""
+		mock_api_list = [
+			WooCommerceOrderAPI(
+				api=Mock(),
+				woocommerce_server_url="http://site1.example.com",
+				woocommerce_server="site1.example.com",
+				wc_plugin_advanced_shipment_tracking=1,
+			)
+		]
+		mock_init_api.return_value = mock_api_list
+		mock_api_list[0].api.get.return_value.json.return_value = []
+
+		order_name = "site1.example.com" + WC_ORDER_DELIMITER + str(dummy_wc_order["id"])
+		frappe.cache().delete_value(get_validated_record_cache_key("WooCommerce Order", order_name))
+		WooCommerceOrder.set_webhook_payload(order_name, deepcopy(dummy_wc_order))
+
+		woocommerce_order = WooCommerceOrder()
+		woocommerce_order.doctype = "WooCommerce Order"
+		woocommerce_order.name = order_name
+
+		# Check that the payload is used once, and that only the shipment trackings were requested
+		self.assertTrue(woocommerce_order.load_from_webhook_payload())
+		self.assertFalse(woocommerce_order.load_from_webhook_payload())
+		mock_api_list[0].api.get.assert_called_once_with(
+			f"orders/{dummy_wc_order['id']}/shipment-trackings"
+		)
+		record = mocked_super_call.call_args.args[0]
+		self.assertEqual(record["name"], order_name)
+		self.assertEqual(record["shipment_trackings"], "[]")
+
+		# Check that incomplete payloads are not used
+		incomplete_payload = deepcopy(dummy_wc_order)
+		incomplete_payload.pop("line_items")
+		WooCommerceOrder.set_webhook_payload(order_name, incomplete_payload)
+		self.assertFalse(woocommerce_order.load_from_webhook_payload())
+
 	def test_db_insert_makes_post_call(self, mock_init_api):
 		"""
 		Test that db_insert makes a POST call to the WooCommerce API
@@ -377,6 +635,34 @@ class TestWooCommerceOrder(FrappeTestCase):
 		self.assertTrue("status" in mock_api_list[0].api.put.call_args.kwargs["data"])
 		self.assertEqual(mock_api_list[0].api.put.call_args.kwargs["data"]["status"], "Hello World")
 
+	def test_get_update_patch_only_contains_changed_entries(self, mock_init_api):
+		"""
+		Test that the update payload only contains changed fields, keys and list entries
+		"""
+		before = deepcopy(dummy_wc_order)
+		after = deepcopy(dummy_wc_order)
+		after["status"] = "completed"
+		after["id"] = str(before["id"])
+		after["billing"]["city"] = "Cape Town"
+		after["line_items"][0]["quantity"] = 5
+		after["line_items"].append({"product_id": 99, "quantity": 1})
+		after["meta_data"] = [{"key": "new_key", "value": "new value"}]
+
+		patch = get_update_patch(before, after, WooCommerceOrder.keyed_list_fields)
+
+		self.assertEqual(
+			patch,
+			{
+				"status": "completed",
+				"billing": {"city": "Cape Town"},
+				"line_items": [
+					{"id": before["line_items"][0]["id"], "quantity": 5},
+					{"product_id": 99, "quantity": 1},
+				],
+				"meta_data": [{"key": "new_key", "value": "new value"}],
+			},
+		)
+
 	def test_get_additional_order_attributes_makes_api_get(self, mock_init_api):
 		"""
 		Test that the get_additional_order_attributes method makes an API call
@@ -635,12 +921,11 @@ class TestAPIWithRequestLogging(FrappeTestCase):
 	def setUp(self):
 		self.api = APIWithRequestLogging(url="foo", consumer_key="bar", consumer_secret="baz")
 
-	@patch(
-		"woocommerce_fusion.woocommerce.doctype.woocommerce_order.woocommerce_order.frappe.enqueue"
-	)
+	@patch("woocommerce_fusion.tasks.utils.frappe.enqueue")
 	def test_request_success(self, mock_enqueue):
 		# Mock the parent class's _API__request method
-		with patch.object(API, "_API__request", return_value="success_response") as mock_super:
+		success_response = Mock(status_code=200)
+		with patch.object(API, "_API__request", return_value=success_response) as mock_super:
 			# Make a request
 			response = self.api._API__request("GET", "test_endpoint", {"key": "value"})
 
@@ -648,4 +933,4 @@ class TestAPIWithRequestLogging(FrappeTestCase):
 			mock_super.assert_called_once_with("GET", "test_endpoint", {"key": "value"}, None)
 
 			# Verify the response is correct
-			self.assertEqual(response, "success_response")
+			self.assertEqual(response, success_response)
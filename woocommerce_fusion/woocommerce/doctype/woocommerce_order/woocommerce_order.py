@@ -6,13 +6,13 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, List
 
-import frappe
+from frappe.model.document import Document
 
-from woocommerce_fusion.tasks.utils import APIWithRequestLogging
 from woocommerce_fusion.woocommerce.woocommerce_api import (
 	WooCommerceAPI,
 	WooCommerceResource,
 	get_domain_and_id_from_woocommerce_record_name,
+	get_woocommerce_apis,
 	log_and_raise_error,
 )
 
@@ -44,6 +44,12 @@ class WooCommerceOrderAPI(WooCommerceAPI):
 
 	wc_plugin_advanced_shipment_tracking: bool = False
 
+	@classmethod
+	def from_server(cls, server: Document) -> "WooCommerceOrderAPI":
+		wc_api = super().from_server(server)
+		wc_api.wc_plugin_advanced_shipment_tracking = server.wc_plugin_advanced_shipment_tracking
+		return wc_api
+
 
 class WooCommerceOrder(WooCommerceResource):
 	"""
@@ -52,33 +58,27 @@ class WooCommerceOrder(WooCommerceResource):
 
 	doctype = "WooCommerce Order"
 	resource: str = "orders"
+	keyed_list_fields = {"meta_data": "key", "line_items": "id"}
+	webhook_payload_fields = [
+		"id",
+		"status",
+		"date_created",
+		"date_modified",
+		"date_modified_gmt",
+		"billing",
+		"shipping",
+		"line_items",
+		"shipping_lines",
+		"payment_method",
+		"total",
+	]
 
 	@staticmethod
 	def _init_api() -> List[WooCommerceAPI]:
 		"""
 		Initialise the WooCommerce API
 		"""
-		wc_servers = frappe.get_all("WooCommerce Server")
-		wc_servers = [frappe.get_doc("WooCommerce Server", server.name) for server in wc_servers]
-
-		wc_api_list = [
-			WooCommerceOrderAPI(
-				api=APIWithRequestLogging(
-					url=server.woocommerce_server_url,
-					consumer_key=server.api_consumer_key,
-					consumer_secret=server.api_consumer_secret,
-					version="wc/v3",
-					timeout=40,
-				),
-				woocommerce_server_url=server.woocommerce_server_url,
-				woocommerce_server=server.name,
-				wc_plugin_advanced_shipment_tracking=server.wc_plugin_advanced_shipment_tracking,
-			)
-			for server in wc_servers
-			if server.enable_sync == 1
-		]
-
-		return wc_api_list
+		return get_woocommerce_apis(WooCommerceOrderAPI)
 
 	# use "args" despite frappe-semgrep-rules.rules.overusing-args, following convention in ERPNext
 	# nosemgrep
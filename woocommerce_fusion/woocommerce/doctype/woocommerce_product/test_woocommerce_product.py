@@ -1,9 +1,106 @@
 # Copyright (c) 2024, Dirk van der Laarse and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import Mock, patch
+
 from frappe.tests.utils import FrappeTestCase
 
+from woocommerce_fusion.woocommerce.doctype.woocommerce_product.woocommerce_product import (
+	WooCommerceProduct,
+)
+from woocommerce_fusion.woocommerce.woocommerce_api import WooCommerceAPI, clear_record_cache
+
 
+@patch.object(WooCommerceProduct, "_init_api")
 class TestWooCommerceProduct(FrappeTestCase):
-	pass
+	def test_bulk_save_groups_records_per_batch_endpoint(self, mock_init_api):
+		"""
+		Test that bulk_save posts products and variations to their respective batch endpoints
+		"""
+		wc_api = WooCommerceAPI(
+			api=Mock(),
+			woocommerce_server_url="http://site1.example.com",
+			woocommerce_server="site1.example.com",
+		)
+		mock_init_api.return_value = [wc_api]
+
+		# Two new products, and one changed variation of product 3
+		new_products = [
+			Mock(
+				is_new=Mock(return_value=True),
+				parent_id=0,
+				woocommerce_server="site1.example.com",
+				get_insert_payload=Mock(return_value={"name": f"Product {x}"}),
+			)
+			for x in range(2)
+		]
+		variation = Mock(
+			is_new=Mock(return_value=False),
+			parent_id=3,
+			woocommerce_server="site1.example.com",
+			get_update_payload=Mock(return_value={"regular_price": "10"}),
+		)
+		variation.name = "site1.example.com~5"
+
+		def post(endpoint, data):
+			response = Mock()
+			response.status_code = 200
+			if endpoint == "products/batch":
+				response.json.return_value = {
+					"create": [
+						{"id": 11, "date_modified": "2024-01-01T00:00:00"},
+						{"id": 0, "error": {"message": "Invalid"}},
+					]
+				}
+			else:
+				response.json.return_value = {"update": [{"id": 5, "date_modified": "2024-01-01T00:00:00"}]}
+			return response
+
+		wc_api.api.post.side_effect = post
+
+		# Call the method to be tested
+		results = WooCommerceProduct.bulk_save(new_products + [variation])
+
+		# Verify that one request was made per batch endpoint
+		self.assertEqual(wc_api.api.post.call_count, 2)
+		wc_api.api.post.assert_any_call(
+			"products/batch", data={"create": [{"name": "Product 0"}, {"name": "Product 1"}]}
+		)
+		wc_api.api.post.assert_any_call(
+			"products/3/variations/batch", data={"update": [{"regular_price": "10", "id": 5}]}
+		)
+
+		# Verify the per-record results
+		self.assertEqual([result.success for result in results], [True, False, True])
+		self.assertEqual(results[0].record.woocommerce_id, 11)
+		self.assertEqual(results[1].error, "Invalid")
+
+	def test_revalidation_does_not_rely_on_modification_date(self, mock_init_api):
+		"""
+		Test that a cached product is retrieved again, as stock changes don't update its modification date
+		"""
+		wc_api = WooCommerceAPI(
+			api=Mock(),
+			woocommerce_server_url="http://site1.example.com",
+			woocommerce_server="site1.example.com",
+			revalidation_cache_ttl=3600,
+		)
+		wc_api.api.get.return_value.status_code = 200
+		wc_api.api.get.return_value.headers = {}
+		wc_api.api.get.return_value.json.side_effect = lambda: {
+			"id": 1,
+			"name": "T-Shirt",
+			"date_modified": "2024-01-01T00:00:00",
+			"date_modified_gmt": "2024-01-01T00:00:00",
+		}
+		name = "site1.example.com~1"
+		clear_record_cache("WooCommerce Product", name)
+
+		for x in range(2):
+			WooCommerceProduct.get_revalidated_record(wc_api, "products/1", name)
+
+		# Both requests retrieved the complete product
+		self.assertEqual(wc_api.api.get.call_count, 2)
+		self.assertNotIn("params", wc_api.api.get.call_args.kwargs)
+
+		clear_record_cache("WooCommerce Product", name)
@@ -3,9 +3,13 @@
 
 import json
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Iterator, List, Optional, Union
 
-from woocommerce_fusion.woocommerce.woocommerce_api import WooCommerceAPI, WooCommerceResource
+from woocommerce_fusion.woocommerce.woocommerce_api import (
+	WC_RECORDS_PER_PAGE_LIMIT,
+	WooCommerceAPI,
+	WooCommerceResource,
+)
 
 
 @dataclass
@@ -24,6 +28,10 @@ class WooCommerceProduct(WooCommerceResource):
 	resource: str = "products"
 	child_resource: str = "variations"
 	field_setter_map = {"woocommerce_name": "name", "woocommerce_id": "id"}
+	required_fields = ["id", "name", "sku", "type", "parent_id", "attributes"]
+	keyed_list_fields = {"meta_data": "key"}
+	# Stock and meta data changes don't update a product's 'date_modified_gmt'
+	revalidate_by_date_modified = False
 
 	# use "args" despite frappe-semgrep-rules.rules.overusing-args, following convention in ERPNext
 	# nosemgrep
@@ -45,6 +53,39 @@ class WooCommerceProduct(WooCommerceResource):
 
 		return products
 
+	@classmethod
+	def iter_records(
+		cls,
+		filters: Optional[List] = None,
+		servers: Optional[List[str]] = None,
+		endpoint: Optional[str] = None,
+		metadata: Optional[Dict] = None,
+		as_doc: bool = False,
+		per_page: int = WC_RECORDS_PER_PAGE_LIMIT,
+		fields: Optional[List[str]] = None,
+		revalidate: bool = False,
+		order_by: Optional[str] = None,
+	) -> Iterator[Union[Dict, "WooCommerceProduct"]]:
+		"""
+		Yields WooCommerce Products, with every variable product followed by its variations
+		"""
+		for product in super().iter_records(
+			filters, servers, endpoint, metadata, as_doc, per_page, fields, revalidate, order_by
+		):
+			yield product
+
+			if not endpoint and product.get("type") == "variable":
+				yield from super().iter_records(
+					filters,
+					servers=[product.get("woocommerce_server")],
+					endpoint=f"products/{product.get('id')}/variations",
+					metadata={"parent_woocommerce_name": product.get("woocommerce_name")},
+					as_doc=as_doc,
+					per_page=per_page,
+					fields=fields,
+					revalidate=revalidate,
+				)
+
 	def after_load_from_db(self, product: Dict):
 		product.pop("name")
 		product = self.set_title(product)
@@ -53,7 +94,7 @@ class WooCommerceProduct(WooCommerceResource):
 	@classmethod
 	def during_get_list_of_records(cls, product: Dict, args):
 		# In the case of variations
-		if product["parent_id"]:
+		if product.get("parent_id"):
 			# Woocommerce product variantions endpoint results doesn't return the type, so set it manually
 			product["type"] = "variation"
 
@@ -1,9 +1,42 @@
 # Copyright (c) 2023, Dirk van der Laarse and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from woocommerce_fusion.woocommerce.woocommerce_api import (
+	clear_woocommerce_api_registry,
+	get_woocommerce_apis,
+)
+
 
 class TestWooCommerceServer(FrappeTestCase):
-	pass
+	def tearDown(self):
+		clear_woocommerce_api_registry()
+
+	@patch("woocommerce_fusion.woocommerce.woocommerce_api.frappe.get_cached_doc")
+	@patch("woocommerce_fusion.woocommerce.woocommerce_api.frappe.get_all")
+	def test_api_registry_is_reused_until_cleared(self, mock_get_all, mock_get_cached_doc):
+		"""
+		Test that the WooCommerce API descriptors are only rebuilt after the registry is cleared
+		"""
+		mock_get_all.return_value = ["site1.example.com"]
+		mock_get_cached_doc.return_value = frappe._dict(
+			name="site1.example.com",
+			woocommerce_server_url="https://site1.example.com",
+			api_consumer_key="foo",
+			api_consumer_secret="bar",
+			http_pool_size=10,
+		)
+		clear_woocommerce_api_registry()
+
+		first_wc_api_list = get_woocommerce_apis()
+		second_wc_api_list = get_woocommerce_apis()
+		self.assertEqual(mock_get_all.call_count, 1)
+		self.assertIs(first_wc_api_list[0], second_wc_api_list[0])
+
+		clear_woocommerce_api_registry()
+		get_woocommerce_apis()
+		self.assertEqual(mock_get_all.call_count, 2)
@@ -50,6 +50,39 @@ frappe.ui.form.on('WooCommerce Server', {
 			`
 		frm.set_df_property('enable_so_status_sync_warning_html', 'options', warningHTML);
 		frm.refresh_field('enable_so_status_sync_warning_html');
+
+		if (!frm.is_new()) {
+			frm.trigger('show_circuit_breaker_status');
+		}
+	},
+	// Show a headline and a reset button while requests to this WooCommerce Server are stopped
+	show_circuit_breaker_status: function(frm) {
+		frappe.call({
+			method: "get_circuit_breaker_status",
+			doc: frm.doc,
+			callback: function(r) {
+				if (!r.message || r.message.state === "Closed") {
+					return;
+				}
+				let message = r.message.state === "Open"
+					? __("Requests to this WooCommerce Server are stopped for {0} seconds after {1} consecutive failures",
+						[r.message.retry_in, r.message.failures])
+					: __("Requests to this WooCommerce Server failed {0} times in a row. The next request will test whether it has recovered",
+						[r.message.failures]);
+				frm.dashboard.set_headline_alert(message, r.message.state === "Open" ? "red" : "orange");
+
+				frm.add_custom_button(__("Reset Circuit Breaker"), function() {
+					frappe.call({
+						method: "reset_circuit_breaker",
+						doc: frm.doc,
+						callback: function() {
+							frm.dashboard.clear_headline();
+							frm.remove_custom_button(__("Reset Circuit Breaker"));
+						}
+					});
+				});
+			}
+		});
 	},
 	// Handle click of 'Keep the Status of ERPNext Sales Orders and WooCommerce Orders in sync'
 	enable_so_status_sync: function(frm){
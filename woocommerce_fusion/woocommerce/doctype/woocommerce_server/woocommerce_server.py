@@ -1,7 +1,7 @@
 # Copyright (c) 2023, Dirk van der Laarse and contributors
 # For license information, please see license.txt
 
-from typing import List
+from typing import Dict, List
 from urllib.parse import urlparse
 
 import frappe
@@ -11,10 +11,14 @@ from frappe.utils.caching import redis_cache
 from jsonpath_ng.ext import parse
 from woocommerce import API
 
+from woocommerce_fusion.tasks.utils import CircuitBreaker, evict_pooled_session
 from woocommerce_fusion.woocommerce.doctype.woocommerce_order.woocommerce_order import (
 	WC_ORDER_STATUS_MAPPING,
 )
-from woocommerce_fusion.woocommerce.woocommerce_api import parse_domain_from_url
+from woocommerce_fusion.woocommerce.woocommerce_api import (
+	clear_woocommerce_api_registry,
+	parse_domain_from_url,
+)
 
 
 class WooCommerceServer(Document):
@@ -41,6 +45,25 @@ class WooCommerceServer(Document):
 		self.validate_item_map()
 		self.validate_reserved_stock_setting()
 
+	def on_update(self):
+		self.clear_api_caches()
+
+	def on_trash(self):
+		self.clear_api_caches()
+
+	def clear_api_caches(self):
+		"""
+		Connection settings may have changed, so drop this server's pooled HTTP session and the
+		cached API descriptors of all WooCommerce Servers
+		"""
+		evict_pooled_session(self.name)
+		clear_woocommerce_api_registry()
+
+		# Clear again after commit, in case another worker rebuilt the registry in the meantime.
+		# Commit callbacks only exist from v15 onwards, on v14 the clear above has to suffice
+		if hasattr(frappe.db, "after_commit"):
+			frappe.db.after_commit.add(clear_woocommerce_api_registry)
+
 	def validate_so_status_map(self):
 		"""
 		Validate Sales Order Status Map to have unique mappings
@@ -139,6 +162,24 @@ class WooCommerceServer(Document):
 		)
 		return docfields + custom_fields
 
+	def get_circuit_breaker(self) -> CircuitBreaker:
+		return CircuitBreaker(self.name, self.circuit_breaker_threshold, self.circuit_breaker_cooldown)
+
+	@frappe.whitelist()
+	def get_circuit_breaker_status(self) -> Dict:
+		"""
+		Returns the state of the circuit breaker of this WooCommerce Server
+		"""
+		return self.get_circuit_breaker().get_status()
+
+	@frappe.whitelist()
+	def reset_circuit_breaker(self):
+		"""
+		Close the circuit breaker of this WooCommerce Server, allowing requests again
+		"""
+		frappe.only_for("System Manager")
+		self.get_circuit_breaker().reset()
+
 	@frappe.whitelist()
 	@redis_cache(ttl=86400)
 	def get_woocommerce_order_status_list(self) -> List[str]:
@@ -0,0 +1,56 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+
+@dataclass(frozen=True)
+class JSONCodec:
+	"""A pair of functions used to (de)serialize the JSON fields of WooCommerce records."""
+
+	name: str
+	dumps: Callable[[Any], str]
+	loads: Callable[[str], Any]
+
+
+def _orjson_dumps(obj: Any) -> str:
+	try:
+		return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+	except TypeError:
+		# orjson does not support e.g. integers larger than 64 bits
+		return json.dumps(obj)
+
+
+STDLIB_CODEC = JSONCodec(name="json", dumps=json.dumps, loads=json.loads)
+ORJSON_CODEC = (
+	JSONCodec(name="orjson", dumps=_orjson_dumps, loads=orjson.loads) if orjson else None
+)
+
+codecs: Dict[str, JSONCodec] = {c.name: c for c in (STDLIB_CODEC, ORJSON_CODEC) if c}
+
+_codec: JSONCodec = ORJSON_CODEC or STDLIB_CODEC
+
+
+def get_codec() -> JSONCodec:
+	return _codec
+
+
+def set_codec(name: Optional[str] = None) -> JSONCodec:
+	"""
+	Select the codec by name, or the fastest available codec if no name is given
+	"""
+	global _codec
+	_codec = codecs[name] if name else ORJSON_CODEC or STDLIB_CODEC
+	return _codec
+
+
+def dumps(obj: Any) -> str:
+	return _codec.dumps(obj)
+
+
+def loads(s: str) -> Any:
+	return _codec.loads(s)
@@ -0,0 +1,27 @@
+import json
+
+from frappe.tests.utils import FrappeTestCase
+
+from woocommerce_fusion.woocommerce import json_codec
+
+
+class TestJSONCodec(FrappeTestCase):
+	def test_codecs_round_trip_woocommerce_values(self):
+		"""
+		Test that all available codecs produce JSON that the standard library reads back identically
+		"""
+		value = {
+			"line_items": [{"id": 1, "name": "Café ☕", "price": 5.5, "taxes": []}],
+			"meta_data": [{"key": "_big", "value": 2**70}],
+			"billing": {"first_name": "John", "phone": None},
+		}
+		original_codec = json_codec.get_codec()
+		try:
+			for codec_name in json_codec.codecs:
+				with self.subTest(codec=codec_name):
+					json_codec.set_codec(codec_name)
+					serialized = json_codec.dumps(value)
+					self.assertEqual(json.loads(serialized), value)
+					self.assertEqual(json_codec.loads(serialized), value)
+		finally:
+			json_codec.set_codec(original_codec.name)
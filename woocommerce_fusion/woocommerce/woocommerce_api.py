@@ -1,16 +1,36 @@
-import json
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import deepcopy
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Union
+from typing import (
+	Callable,
+	Dict,
+	FrozenSet,
+	Iterable,
+	Iterator,
+	List,
+	Optional,
+	Tuple,
+	Type,
+	Union,
+)
 from urllib.parse import urlparse
 
 import frappe
 from frappe import _
 from frappe.model.document import Document
 
-from woocommerce_fusion.exceptions import SyncDisabledError
-from woocommerce_fusion.tasks.utils import APIWithRequestLogging
+from woocommerce_fusion.exceptions import CircuitOpenError, SyncDisabledError
+from woocommerce_fusion.tasks.utils import APIWithRequestLogging, get_api_kwargs
+from woocommerce_fusion.woocommerce import json_codec
 
 WC_RESOURCE_DELIMITER = "~"
+WC_RECORDS_PER_PAGE_LIMIT = 100
+WC_BATCH_LIMIT = 100
+WC_MAX_CONCURRENT_REQUESTS = 5
+WC_API_REGISTRY_VERSION_KEY = "woocommerce_api_registry_version"
+# Seconds after which the payload of a webhook is considered stale
+WC_WEBHOOK_PAYLOAD_TTL = 600
 
 
 @dataclass
@@ -20,6 +40,57 @@ class WooCommerceAPI:
 	api: APIWithRequestLogging
 	woocommerce_server_url: str
 	woocommerce_server: str
+	record_cache_ttl: int = 0
+	revalidation_cache_ttl: int = 0
+
+	@classmethod
+	def from_server(cls, server: Document) -> "WooCommerceAPI":
+		"""
+		Create an API descriptor from a WooCommerce Server document
+		"""
+		return cls(
+			api=APIWithRequestLogging(**get_api_kwargs(server)),
+			woocommerce_server_url=server.woocommerce_server_url,
+			woocommerce_server=server.name,
+			record_cache_ttl=server.record_cache_ttl or 0,
+			revalidation_cache_ttl=server.revalidation_cache_ttl or 0,
+		)
+
+
+# Process-wide registry of API descriptors, keyed by (site, descriptor class)
+_api_registry: Dict[
+	Tuple[str, Type[WooCommerceAPI]], Tuple[Optional[str], List[WooCommerceAPI]]
+] = {}
+
+
+def get_woocommerce_apis(api_class: Type[WooCommerceAPI] = WooCommerceAPI) -> List[WooCommerceAPI]:
+	"""
+	Returns API descriptors for all enabled WooCommerce Servers.
+
+	The descriptors are built once per worker process and reused until any WooCommerce Server is
+	changed, which is tracked by a version token in the Redis cache so that all workers notice.
+	"""
+	version = frappe.cache().get_value(WC_API_REGISTRY_VERSION_KEY)
+	key = (frappe.local.site, api_class)
+	if (cached := _api_registry.get(key)) and cached[0] == version:
+		return list(cached[1])
+
+	server_names = frappe.get_all("WooCommerce Server", filters={"enable_sync": 1}, pluck="name")
+	wc_api_list = [
+		api_class.from_server(frappe.get_cached_doc("WooCommerce Server", server_name))
+		for server_name in server_names
+	]
+	_api_registry[key] = (version, wc_api_list)
+	return list(wc_api_list)
+
+
+def clear_woocommerce_api_registry():
+	"""
+	Invalidate the API descriptors of all worker processes
+	"""
+	for key in [key for key in _api_registry if key[0] == frappe.local.site]:
+		_api_registry.pop(key, None)
+	frappe.cache().set_value(WC_API_REGISTRY_VERSION_KEY, frappe.generate_hash(length=10))
 
 
 class WooCommerceResource(Document):
@@ -30,30 +101,22 @@ class WooCommerceResource(Document):
 	resource: str = None
 	child_resource: str = None
 	field_setter_map: Dict = None
+	# WooCommerce fields that are always requested when a projection is used
+	required_fields: List[str] = ["id"]
+	# List fields of which only changed entries are sent when updating, matched by the given key
+	keyed_list_fields: Dict[str, str] = {}
+	# WooCommerce fields that a webhook payload needs, to be used instead of retrieving the record
+	webhook_payload_fields: List[str] = ["id", "date_modified_gmt"]
+	# Whether every change to a record updates its 'date_modified_gmt', so that cached records can be
+	# revalidated by only requesting their modification date
+	revalidate_by_date_modified: bool = True
 
 	@staticmethod
 	def _init_api() -> List[WooCommerceAPI]:
 		"""
 		Initialise the WooCommerce API
 		"""
-		wc_servers = frappe.get_all("WooCommerce Server")
-		wc_servers = [frappe.get_doc("WooCommerce Server", server.name) for server in wc_servers]
-
-		wc_api_list = [
-			WooCommerceAPI(
-				api=APIWithRequestLogging(
-					url=server.woocommerce_server_url,
-					consumer_key=server.api_consumer_key,
-					consumer_secret=server.api_consumer_secret,
-					version="wc/v3",
-					timeout=40,
-				),
-				woocommerce_server_url=server.woocommerce_server_url,
-				woocommerce_server=server.name,
-			)
-			for server in wc_servers
-			if server.enable_sync == 1
-		]
+		wc_api_list = get_woocommerce_apis(WooCommerceAPI)
 
 		if len(wc_api_list) == 0:
 			frappe.throw(_("At least one WooCommerce Server should be Enabled"), SyncDisabledError)
@@ -76,9 +139,7 @@ class WooCommerceResource(Document):
 		"""
 		Allow for dict-like behaviour when using jsonpath-ng
 		"""
-		fields = [field.fieldname for field in self.meta.fields]
-		fields.append("name")
-		return key in fields
+		return key in self.get_field_metadata().fieldnames
 
 	def init_api(self):
 		"""
@@ -86,9 +147,12 @@ class WooCommerceResource(Document):
 		"""
 		self.wc_api_list = self._init_api()
 
-	def load_from_db(self):
+	def load_from_db(self, fields: Optional[List[str]] = None, use_cache: bool = True):
 		"""
 		Returns a single WooCommerce Record (Form view)
+
+		If fields are specified, only those fields (and required_fields) are retrieved from WooCommerce.
+		If use_cache is not set, the record is always retrieved from WooCommerce
 		"""
 		# Verify that the WC API has been initialised
 		if not self.wc_api_list:
@@ -98,30 +162,224 @@ class WooCommerceResource(Document):
 		wc_server_domain, record_id = get_domain_and_id_from_woocommerce_record_name(self.name)
 
 		# Select the relevant WooCommerce server
-		self.current_wc_api = next(
+		self.current_wc_api = self.get_wc_api_for_domain(wc_server_domain)
+
+		# Serve repeated reads of complete records from the cache
+		cache_key = get_record_cache_key(self.doctype, self.name)
+		cache_record = not fields and self.current_wc_api.record_cache_ttl
+		if use_cache and cache_record and (record := frappe.cache().get_value(cache_key)):
+			self.call_super_init(deepcopy(record))
+			return
+
+		# Get WooCommerce Record
+		if use_cache and not fields and self.current_wc_api.revalidation_cache_ttl:
+			record = self.get_revalidated_record(
+				self.current_wc_api, f"{self.resource}/{record_id}", self.name
+			)
+		else:
+			params = {"_fields": self.get_wc_fields_parameter(fields)} if fields else None
+			try:
+				record = self.current_wc_api.api.get(f"{self.resource}/{record_id}", params=params).json()
+			except CircuitOpenError:
+				raise
+			except Exception as err:
+				error_text = (
+					f"load_from_db failed (WooCommerce {self.resource} #{record_id})\n\n{frappe.get_traceback()}"
+				)
+				log_and_raise_error(error_text)
+
+			if "id" not in record:
+				log_and_raise_error(
+					error_text=f"load_from_db failed (WooCommerce {self.resource} #{record_id})\nOrder:\n{str(record)}"
+				)
+
+			record = self.pre_init_document(
+				record, woocommerce_server_url=self.current_wc_api.woocommerce_server_url
+			)
+		record = self.after_load_from_db(record)
+
+		if cache_record:
+			frappe.cache().set_value(
+				cache_key, deepcopy(record), expires_in_sec=self.current_wc_api.record_cache_ttl
+			)
+
+		self.call_super_init(record)
+
+	def get_wc_api_for_domain(self, wc_server_domain: str) -> Optional[WooCommerceAPI]:
+		return next(
 			(api for api in self.wc_api_list if wc_server_domain in api.woocommerce_server_url), None
 		)
 
-		# Get WooCommerce Record
+	@classmethod
+	def set_webhook_payload(cls, name: str, payload: Dict):
+		"""
+		Keep the payload of a verified webhook, so that the record doesn't have to be retrieved again
+		"""
+		frappe.cache().set_value(
+			get_webhook_payload_cache_key(cls.doctype, name),
+			payload,
+			expires_in_sec=WC_WEBHOOK_PAYLOAD_TTL,
+		)
+
+	def load_from_webhook_payload(self) -> bool:
+		"""
+		Initialise the record from the payload of a verified webhook, if one was kept for it.
+
+		Returns False if there is no such payload, or if it is incomplete or older than the cached
+		record, in which case the record should be retrieved with load_from_db instead
+		"""
+		cache_key = get_webhook_payload_cache_key(self.doctype, self.name)
+		payload = frappe.cache().get_value(cache_key)
+		if not payload:
+			return False
+		frappe.cache().delete_value(cache_key)
+
+		# Verify that the WC API has been initialised
+		if not self.wc_api_list:
+			self.init_api()
+
+		wc_server_domain, record_id = get_domain_and_id_from_woocommerce_record_name(self.name)
+		self.current_wc_api = self.get_wc_api_for_domain(wc_server_domain)
+		if not self.current_wc_api:
+			return False
+
+		# Ignore incomplete payloads, and payloads that were superseded by a more recent version
+		if any(field not in payload for field in self.webhook_payload_fields):
+			return False
+		if str(payload["id"]) != str(record_id):
+			return False
+		cached = frappe.cache().get_value(get_validated_record_cache_key(self.doctype, self.name))
+		if cached and (cached.get("date_modified_gmt") or "") > (payload["date_modified_gmt"] or ""):
+			return False
+
+		record = self.pre_init_document(
+			payload, woocommerce_server_url=self.current_wc_api.woocommerce_server_url
+		)
+		if self.current_wc_api.revalidation_cache_ttl:
+			self.set_validated_record(self.current_wc_api, record)
+		record = self.after_load_from_db(record)
+
+		self.call_super_init(record)
+		return True
+
+	@classmethod
+	def get_revalidated_record(cls, wc_api: WooCommerceAPI, endpoint: str, name: str) -> Dict:
+		"""
+		Returns a single WooCommerce Record, only retrieving it again if it was modified since it was cached.
+
+		Records are revalidated with a conditional request if WooCommerce returned an ETag or Last-Modified
+		header for them. Otherwise only their 'date_modified_gmt' is requested and compared, if
+		revalidate_by_date_modified is set.
+		"""
+		cache_key = get_validated_record_cache_key(cls.doctype, name)
+		cached = frappe.cache().get_value(cache_key)
+
+		headers = {}
+		if cached:
+			if cached.get("etag"):
+				headers["If-None-Match"] = cached["etag"]
+			if cached.get("last_modified"):
+				headers["If-Modified-Since"] = cached["last_modified"]
+
 		try:
-			record = self.current_wc_api.api.get(f"{self.resource}/{record_id}").json()
+			if (
+				cached
+				and not headers
+				and cls.revalidate_by_date_modified
+				and cached.get("date_modified_gmt")
+			):
+				probe = wc_api.api.get(endpoint, params={"_fields": "id,date_modified_gmt"}).json()
+				if probe.get("date_modified_gmt") == cached["date_modified_gmt"]:
+					return deepcopy(cached["record"])
+
+			response = wc_api.api.get(endpoint, **({"headers": headers} if headers else {}))
+			if cached and response.status_code == 304:
+				return deepcopy(cached["record"])
+			record = response.json()
+		except CircuitOpenError:
+			raise
 		except Exception as err:
-			error_text = (
-				f"load_from_db failed (WooCommerce {self.resource} #{record_id})\n\n{frappe.get_traceback()}"
-			)
-			log_and_raise_error(error_text)
+			log_and_raise_error(err, error_text=f"load_from_db failed (WooCommerce {endpoint})")
 
 		if "id" not in record:
 			log_and_raise_error(
-				error_text=f"load_from_db failed (WooCommerce {self.resource} #{record_id})\nOrder:\n{str(record)}"
+				error_text=f"load_from_db failed (WooCommerce {endpoint})\nOrder:\n{str(record)}"
 			)
 
-		record = self.pre_init_document(
-			record, woocommerce_server_url=self.current_wc_api.woocommerce_server_url
+		record = cls.pre_init_document(record, woocommerce_server_url=wc_api.woocommerce_server_url)
+		cls.set_validated_record(
+			wc_api,
+			record,
+			etag=response.headers.get("etag"),
+			last_modified=response.headers.get("last-modified"),
 		)
-		record = self.after_load_from_db(record)
+		return record
 
-		self.call_super_init(record)
+	@classmethod
+	def get_revalidated_records(
+		cls, wc_api: WooCommerceAPI, endpoint: str, params: Dict, probes: List[Dict]
+	) -> List[Dict]:
+		"""
+		Returns the WooCommerce Records for a page of {id, date_modified_gmt} probes. Records whose
+		'date_modified_gmt' changed since they were cached are retrieved in a single request.
+		"""
+		server_domain = parse_domain_from_url(wc_api.woocommerce_server_url)
+		cached_records = {}
+		changed_ids = []
+		for probe in probes:
+			name = generate_woocommerce_record_name_from_domain_and_id(server_domain, probe["id"])
+			cached = frappe.cache().get_value(get_validated_record_cache_key(cls.doctype, name))
+			if (
+				cached
+				and probe.get("date_modified_gmt")
+				and probe["date_modified_gmt"] == cached.get("date_modified_gmt")
+			):
+				cached_records[probe["id"]] = cached["record"]
+			else:
+				changed_ids.append(probe["id"])
+
+		if changed_ids:
+			changed_params = {k: v for k, v in params.items() if k not in ("_fields", "page")}
+			changed_params.update(
+				{"include": ",".join(map(str, changed_ids)), "per_page": len(changed_ids)}
+			)
+			try:
+				response = wc_api.api.get(endpoint, params=changed_params)
+			except CircuitOpenError:
+				raise
+			except Exception as err:
+				log_and_raise_error(err, error_text="iter_records failed")
+			if response.status_code != 200:
+				log_and_raise_error(error_text="iter_records failed", response=response)
+
+			for record in response.json():
+				record = cls.pre_init_document(record, woocommerce_server_url=wc_api.woocommerce_server_url)
+				cls.set_validated_record(wc_api, record)
+				cached_records[record["id"]] = record
+
+		# Keep the order of the page, skipping records that were deleted in the meantime
+		return [
+			deepcopy(cached_records[probe["id"]]) for probe in probes if probe["id"] in cached_records
+		]
+
+	@classmethod
+	def set_validated_record(
+		cls,
+		wc_api: WooCommerceAPI,
+		record: Dict,
+		etag: Optional[str] = None,
+		last_modified: Optional[str] = None,
+	):
+		frappe.cache().set_value(
+			get_validated_record_cache_key(cls.doctype, record["name"]),
+			{
+				"etag": etag,
+				"last_modified": last_modified,
+				"date_modified_gmt": record.get("date_modified_gmt"),
+				"record": deepcopy(record),
+			},
+			expires_in_sec=wc_api.revalidation_cache_ttl,
+		)
 
 	def call_super_init(self, record: Dict):
 		super(Document, self).__init__(record)
@@ -142,7 +400,7 @@ class WooCommerceResource(Document):
 		wc_api_list = cls._init_api()
 
 		if len(wc_api_list) > 0:
-			wc_records_per_page_limit = 100
+			wc_records_per_page_limit = WC_RECORDS_PER_PAGE_LIMIT
 
 			# Map Frappe query parameters to WooCommerce query parameters
 			params = {}
@@ -159,23 +417,36 @@ class WooCommerceResource(Document):
 				updated_params = get_wc_parameters_from_filters(args["filters"])
 				params.update(updated_params)
 
+			# Only retrieve the requested fields
+			if wc_fields := cls.get_wc_fields_parameter(args.get("fields")):
+				params["_fields"] = wc_fields
+
+			# Skip APIs if one or more servers were specified
+			if args.get("servers", None):
+				wc_api_list = [
+					wc_server for wc_server in wc_api_list if wc_server.woocommerce_server in args["servers"]
+				]
+
+			# Get the first page of WooCommerce Records from all APIs at once
+			endpoint = args["endpoint"] if "endpoint" in args else cls.resource
+			first_page_params = {**params, "offset": 0}
+			first_pages = run_concurrently(
+				lambda wc_server: wc_server.api.get(endpoint, params=first_page_params), wc_api_list
+			)
+
 			# Initialse required variables
 			all_results = []
 			total_processed = 0
 
-			for wc_server in wc_api_list:
-				# Skip this API call if one or more servers were specified
-				if args.get("servers", None):
-					if wc_server.woocommerce_server not in args["servers"]:
-						continue
-
+			for wc_server, first_page in zip(wc_api_list, first_pages):
 				current_offset = 0
+				params["offset"] = current_offset
 
 				# Get WooCommerce Records
-				params["offset"] = current_offset
 				try:
-					endpoint = args["endpoint"] if "endpoint" in args else cls.resource
-					response = wc_server.api.get(endpoint, params=params)
+					response = first_page.result()
+				except CircuitOpenError:
+					raise
 				except Exception as err:
 					log_and_raise_error(err, error_text="get_list failed")
 				if response.status_code != 200:
@@ -229,7 +500,9 @@ class WooCommerceResource(Document):
 					# Get WooCommerce Records
 					params["offset"] = current_offset
 					try:
-						response = wc_server.api.get(cls.resource, params=params)
+						response = wc_server.api.get(endpoint, params=params)
+					except CircuitOpenError:
+						raise
 					except Exception as err:
 						log_and_raise_error(err, error_text="get_list failed")
 					if response.status_code != 200:
@@ -245,6 +518,126 @@ class WooCommerceResource(Document):
 	def during_get_list_of_records(cls, record: Document, args):
 		return record
 
+	@classmethod
+	def iter_records(
+		cls,
+		filters: Optional[List] = None,
+		servers: Optional[List[str]] = None,
+		endpoint: Optional[str] = None,
+		metadata: Optional[Dict] = None,
+		as_doc: bool = False,
+		per_page: int = WC_RECORDS_PER_PAGE_LIMIT,
+		fields: Optional[List[str]] = None,
+		revalidate: bool = False,
+		order_by: Optional[str] = None,
+	) -> Iterator[Union[Dict, "WooCommerceResource"]]:
+		"""
+		Yields WooCommerce Records one at a time, across all (or the specified) WooCommerce Servers.
+
+		Each server's pages are requested exactly once using WooCommerce's 'page' parameter, until
+		the page count in the 'X-WP-TotalPages' header is reached. Endpoints that do not return this
+		header are paged until a page that is not full is returned.
+
+		If fields are specified, only those fields (and required_fields) are retrieved from WooCommerce.
+		If order_by is specified, e.g. "date_modified asc", each server's records are listed in that
+		order.
+
+		If revalidate is set, only the id and modification date of each record are listed, and records that
+		are in the revalidation cache and were not modified since are not retrieved again.
+		"""
+		wc_api_list = cls._init_api()
+		endpoint = endpoint or cls.resource
+		args = {"filters": filters, "servers": servers, "endpoint": endpoint, "metadata": metadata}
+
+		# Map Frappe filters to WooCommerce parameters
+		params = {"per_page": min(per_page, WC_RECORDS_PER_PAGE_LIMIT)}
+		if filters:
+			params.update(get_wc_parameters_from_filters(filters))
+		if order_by:
+			params.update(get_wc_parameters_from_order_by(order_by))
+		if wc_fields := cls.get_wc_fields_parameter(fields):
+			params["_fields"] = wc_fields
+
+		for wc_server in wc_api_list:
+			# Skip this API if one or more servers were specified
+			if servers and wc_server.woocommerce_server not in servers:
+				continue
+
+			use_revalidation = (
+				revalidate
+				and not fields
+				and wc_server.revalidation_cache_ttl
+				and cls.revalidate_by_date_modified
+			)
+			page_params = dict(params)
+			if use_revalidation:
+				page_params["_fields"] = "id,date_modified_gmt"
+
+			page = 1
+			total_pages = 1
+			while page <= total_pages:
+				try:
+					response = wc_server.api.get(endpoint, params={**page_params, "page": page})
+				except CircuitOpenError:
+					raise
+				except Exception as err:
+					log_and_raise_error(err, error_text="iter_records failed")
+				if response.status_code != 200:
+					log_and_raise_error(error_text="iter_records failed", response=response)
+
+				results = response.json()
+				if "x-wp-totalpages" in response.headers:
+					total_pages = int(response.headers["x-wp-totalpages"])
+				elif len(results) == params["per_page"]:
+					total_pages = page + 1
+
+				if use_revalidation:
+					results = cls.get_revalidated_records(wc_server, endpoint, params, results)
+				else:
+					for record in results:
+						cls.pre_init_document(record=record, woocommerce_server_url=wc_server.woocommerce_server_url)
+
+				for record in results:
+					cls.during_get_list_of_records(record, args)
+					yield frappe.get_doc(record) if as_doc else record
+
+				page += 1
+
+	@classmethod
+	def get_wc_fields_parameter(cls, fields: Optional[List[str]]) -> Optional[str]:
+		"""
+		Map a list of Frappe fieldnames to a value for WooCommerce's '_fields' parameter.
+
+		Accepts list view fields such as "`tabWooCommerce Order`.`status`". Returns None if no projection
+		should be used, e.g. when all fields or aggregates are requested.
+		"""
+		if not fields:
+			return None
+
+		wc_field_map = dict(cls.field_setter_map or {})
+		wc_field_map.update({"modified": "date_modified", "creation": "date_created"})
+
+		wc_fields = list(cls.required_fields)
+		for field in fields:
+			if "*" in field or "(" in field:
+				return None
+			fieldname = field.split(" as ")[0].split(".")[-1].strip("` ")
+			if fieldname.startswith("woocommerce_date_"):
+				fieldname = fieldname.removeprefix("woocommerce_")
+			wc_field = wc_field_map.get(fieldname, fieldname)
+			if wc_field not in wc_fields:
+				wc_fields.append(wc_field)
+
+		# date_modified is mapped together with the other dates in pre_init_document
+		if "date_modified" in wc_fields:
+			wc_fields.extend(
+				field
+				for field in ("date_created", "date_created_gmt", "date_modified_gmt")
+				if field not in wc_fields
+			)
+
+		return ",".join(wc_fields)
+
 	# use "args" despite frappe-semgrep-rules.rules.overusing-args, following convention in ERPNext
 	# nosemgrep
 	@classmethod
@@ -256,10 +649,17 @@ class WooCommerceResource(Document):
 		wc_api_list = cls._init_api()
 		total_count = 0
 
-		for wc_server in wc_api_list:
+		# Only the 'X-WP-Total' header is needed, so request the smallest page from all APIs at once
+		responses = run_concurrently(
+			lambda wc_server: wc_server.api.get(cls.resource, params={"per_page": 1}), wc_api_list
+		)
+
+		for response_future in responses:
 			# Get WooCommerce Records
 			try:
-				response = wc_server.api.get(cls.resource)
+				response = response_future.result()
+			except CircuitOpenError:
+				raise
 			except Exception as err:
 				log_and_raise_error(err, error_text="get_count failed")
 			if response.status_code != 200:
@@ -291,10 +691,7 @@ class WooCommerceResource(Document):
 		)
 
 		# Prepare data
-		record_data = self.to_dict()
-		record = self.deserialize_attributes_of_type_dict_or_list(record_data)
-
-		record = self.before_db_insert(record)
+		record = self.get_insert_payload()
 
 		endpoint = (
 			f"{self.resource}/{self.parent_id}/{self.child_resource}"
@@ -303,25 +700,35 @@ class WooCommerceResource(Document):
 		)
 		try:
 			response = self.current_wc_api.api.post(endpoint, data=record)
+		except CircuitOpenError:
+			raise
 		except Exception as err:
 			log_and_raise_error(err, error_text="db_insert failed")
 		if response.status_code != 201:
 			log_and_raise_error(error_text="db_insert failed", response=response)
 		self.woocommerce_id = response.json()["id"]
 		self.woocommerce_date_modified = response.json()["date_modified"]
+		clear_record_cache(
+			self.doctype,
+			generate_woocommerce_record_name_from_domain_and_id(self.woocommerce_server, self.woocommerce_id),
+		)
 
 	def before_db_insert(self, record: Dict):
 		return record
 
-	def db_update(self, *args, **kwargs):
+	def get_insert_payload(self) -> Dict:
 		"""
-		Updates a WooCommerce Record
+		Returns the data to be posted to WooCommerce when creating this record
 		"""
-		# Verify that the WC API has been initialised
-		if not self.wc_api_list:
-			self.init_api()
+		record_data = self.to_dict()
+		record = self.deserialize_attributes_of_type_dict_or_list(record_data)
 
-		# Prepare data
+		return self.before_db_insert(record)
+
+	def get_update_payload(self) -> Dict:
+		"""
+		Returns the data to be put to WooCommerce when updating this record, i.e. only changed fields
+		"""
 		record_data = self.to_dict()
 		record = self.deserialize_attributes_of_type_dict_or_list(record_data)
 
@@ -333,13 +740,38 @@ class WooCommerceResource(Document):
 		if self.field_setter_map:
 			for new_key, old_key in self.field_setter_map.items():
 				record_before_save[old_key] = record_before_save[new_key]
-		keys_to_pop = [
-			key
-			for key, value in record.items()
-			if record_before_save.get(key) == value or str(record_before_save.get(key)) == str(value)
-		]
-		for key in keys_to_pop:
-			record.pop(key)
+
+		return get_update_patch(record_before_save, record, self.keyed_list_fields)
+
+	def load_doc_before_save(self, *args, **kwargs):
+		"""
+		Retrieve the record from WooCommerce again, bypassing the record cache, so that changes are
+		determined against its current values and changes made in WooCommerce are not overwritten
+		"""
+		self._doc_before_save = None
+		if self.is_new():
+			return
+		doc_before_save = frappe.get_doc({"doctype": self.doctype, "name": self.name})
+		doc_before_save.load_from_db(use_cache=False)
+		self._doc_before_save = doc_before_save
+
+	def set_doc_before_save(self):
+		"""
+		Keep a copy of the current values, against which changes are determined when saving.
+		Use this instead of load_doc_before_save(), which retrieves the record from WooCommerce again
+		"""
+		self._doc_before_save = frappe.get_doc({**self.to_dict(), "doctype": self.doctype})
+
+	def db_update(self, *args, **kwargs):
+		"""
+		Updates a WooCommerce Record
+		"""
+		# Verify that the WC API has been initialised
+		if not self.wc_api_list:
+			self.init_api()
+
+		# Prepare data
+		record = self.get_update_payload()
 
 		# Parse the server domain and id from the Document name
 		wc_server_domain, id = get_domain_and_id_from_woocommerce_record_name(self.name)
@@ -357,14 +789,123 @@ class WooCommerceResource(Document):
 		)
 		try:
 			response = self.current_wc_api.api.put(endpoint, data=record)
+		except CircuitOpenError:
+			raise
 		except Exception as err:
 			log_and_raise_error(err, error_text="db_update failed")
 		if response.status_code != 200:
 			log_and_raise_error(error_text="db_update failed", response=response)
 
 		self.woocommerce_date_modified = response.json()["date_modified"]
+		clear_record_cache(self.doctype, self.name)
 		self.after_db_update()
 
+	@classmethod
+	def bulk_save(cls, records: List["WooCommerceResource"]) -> List["BulkSaveResult"]:
+		"""
+		Creates new records and updates existing records using WooCommerce's batch endpoints.
+
+		Records are grouped per server and per endpoint (e.g. 'products' and 'products/{id}/variations')
+		and sent in batches of up to WC_BATCH_LIMIT. Existing records are compared against
+		_doc_before_save, see set_doc_before_save(). Document controller hooks are not run.
+
+		Returns a result for every record, in the same order. Errors are logged, not raised.
+		"""
+		wc_api_list = cls._init_api()
+		results = [BulkSaveResult(record=record) for record in records]
+
+		# Group operations by WooCommerce server and endpoint
+		batches: Dict[Tuple[str, str], List[Tuple[str, BulkSaveResult, Dict]]] = {}
+		for result in results:
+			record = result.record
+			try:
+				if record.is_new() or not record.name:
+					operation = "create"
+					data = record.get_insert_payload()
+				else:
+					operation = "update"
+					data = record.get_update_payload()
+					data["id"] = get_domain_and_id_from_woocommerce_record_name(record.name)[1]
+
+				endpoint = (
+					f"{cls.resource}/{record.parent_id}/{cls.child_resource}/batch"
+					if record.parent_id and cls.child_resource
+					else f"{cls.resource}/batch"
+				)
+			except Exception as err:
+				result.error = str(err)
+				frappe.log_error("WooCommerce Error: Bulk Save", frappe.get_traceback())
+				continue
+
+			batches.setdefault((record.woocommerce_server, endpoint), []).append(
+				(operation, result, data)
+			)
+
+		for (woocommerce_server, endpoint), operations in batches.items():
+			wc_api = next(
+				(api for api in wc_api_list if api.woocommerce_server == woocommerce_server), None
+			)
+			for i in range(0, len(operations), WC_BATCH_LIMIT):
+				chunk = operations[i : i + WC_BATCH_LIMIT]
+				if not wc_api:
+					for _operation, result, _data in chunk:
+						result.error = f"WooCommerce Server {woocommerce_server} is not enabled"
+					continue
+				cls.post_batch(wc_api, endpoint, chunk)
+
+		return results
+
+	@classmethod
+	def post_batch(
+		cls, wc_api: WooCommerceAPI, endpoint: str, chunk: List[Tuple[str, "BulkSaveResult", Dict]]
+	):
+		"""
+		Post a single batch request and set the result of every record in it
+		"""
+		data = {"create": [], "update": []}
+		for operation, _result, record_data in chunk:
+			data[operation].append(record_data)
+
+		try:
+			response = wc_api.api.post(endpoint, data={key: value for key, value in data.items() if value})
+			if response.status_code not in (200, 201):
+				raise ValueError(
+					f"Response Code: {response.status_code}\nResponse Text: {response.text}\nRequest URL: {endpoint}"
+				)
+			response_data = response.json()
+		except Exception as err:
+			frappe.log_error("WooCommerce Error: Bulk Save", frappe.get_traceback())
+			for _operation, result, _record_data in chunk:
+				result.error = str(err)
+			return
+
+		# WooCommerce returns the created/updated records in the order in which they were sent
+		responses = {operation: iter(response_data.get(operation) or []) for operation in data}
+		for operation, result, _record_data in chunk:
+			record_response = next(responses[operation], None)
+			if not record_response:
+				result.error = _("No response received from WooCommerce")
+			elif "error" in record_response:
+				result.error = record_response["error"].get("message") or str(record_response["error"])
+			else:
+				result.success = True
+				result.response = record_response
+				result.record.woocommerce_id = record_response.get("id")
+				result.record.woocommerce_date_modified = record_response.get("date_modified")
+				clear_record_cache(
+					cls.doctype,
+					generate_woocommerce_record_name_from_domain_and_id(
+						wc_api.woocommerce_server, record_response.get("id")
+					),
+				)
+				if operation == "update":
+					result.record.current_wc_api = wc_api
+					try:
+						result.record.after_db_update()
+					except Exception as err:
+						result.success = False
+						result.error = str(err)
+
 	@classmethod
 	def pre_init_document(cls, record: Dict, woocommerce_server_url: str):
 		"""
@@ -383,11 +924,11 @@ class WooCommerceResource(Document):
 		if "date_modified" in record:
 			record["modified"] = record["date_modified"]
 
-			# Set WooCommerce fields
-			record["woocommerce_date_created"] = record["date_created"]
-			record["woocommerce_date_created_gmt"] = record["date_created_gmt"]
+			# Set WooCommerce fields, which may be missing from partial records
+			record["woocommerce_date_created"] = record.get("date_created")
+			record["woocommerce_date_created_gmt"] = record.get("date_created_gmt")
 			record["woocommerce_date_modified"] = record["date_modified"]
-			record["woocommerce_date_modified_gmt"] = record["date_modified_gmt"]
+			record["woocommerce_date_modified_gmt"] = record.get("date_modified_gmt")
 
 		# Define woocommerce_server_url
 		server_domain = parse_domain_from_url(woocommerce_server_url)
@@ -419,10 +960,37 @@ class WooCommerceResource(Document):
 		"""
 		Convert this Document to a dict
 		"""
-		doc_dict = {field.fieldname: self.get(field.fieldname) for field in self.meta.fields}
+		doc_dict = {fieldname: self.get(fieldname) for fieldname in self.get_field_metadata().fields}
 		doc_dict["name"] = self.name  # name field is not in meta.fields
 		return doc_dict
 
+	def get_json(self, fieldname: str):
+		"""
+		Returns the parsed value of a JSON field.
+
+		The value is parsed once and reused for as long as the field is not set to another value, so it
+		should not be modified in place. Use set_json to change it.
+		"""
+		value = self.get(fieldname)
+		if not isinstance(value, str):
+			return value
+
+		json_values = self.__dict__.setdefault("_json_values", {})
+		if (cached := json_values.get(fieldname)) and cached[0] is value:
+			return cached[1]
+
+		parsed = json_codec.loads(value) if value else None
+		json_values[fieldname] = (value, parsed)
+		return parsed
+
+	def set_json(self, fieldname: str, value):
+		"""
+		Sets a JSON field to the serialized value, and keeps the value for get_json
+		"""
+		serialized = json_codec.dumps(value)
+		self.set(fieldname, serialized)
+		self.__dict__.setdefault("_json_values", {})[fieldname] = (serialized, value)
+
 	@classmethod
 	def serialize_attributes_of_type_dict_or_list(cls, obj):
 		"""
@@ -431,10 +999,9 @@ class WooCommerceResource(Document):
 		This function iterates over the fields of the input object that are expected to be in JSON format,
 		and if the field is present in the object, it transforms the field's value into a JSON-formatted string.
 		"""
-		json_fields = cls.get_json_fields()
-		for field in json_fields:
-			if field.fieldname in obj:
-				obj[field.fieldname] = json.dumps(obj[field.fieldname])
+		for fieldname in cls.get_field_metadata().json_fields:
+			if fieldname in obj:
+				obj[fieldname] = json_codec.dumps(obj[fieldname])
 		return obj
 
 	@classmethod
@@ -445,10 +1012,9 @@ class WooCommerceResource(Document):
 		This function iterates over the fields of the input object that are expected to be in JSON format,
 		and if the field is present in the object, it transforms the field's value from a JSON-formatted string.
 		"""
-		json_fields = cls.get_json_fields()
-		for field in json_fields:
-			if field.fieldname in obj and obj[field.fieldname]:
-				obj[field.fieldname] = json.loads(obj[field.fieldname])
+		for fieldname in cls.get_field_metadata().json_fields:
+			if fieldname in obj and obj[fieldname]:
+				obj[fieldname] = json_codec.loads(obj[fieldname])
 		return obj
 
 	@classmethod
@@ -456,13 +1022,131 @@ class WooCommerceResource(Document):
 		"""
 		Returns a list of fields that have been defined with type "JSON"
 		"""
-		fields = frappe.db.get_all(
-			"DocField",
-			{"parent": cls.doctype, "fieldtype": "JSON"},
-			["name", "fieldname", "fieldtype"],
-		)
+		meta = frappe.get_meta(cls.doctype)
+		return [meta.get_field(fieldname) for fieldname in cls.get_field_metadata().json_fields]
+
+	@classmethod
+	def get_field_metadata(cls) -> "DocTypeFieldMetadata":
+		"""
+		Returns the (memoized) fieldnames of this DocType. Rebuilt when the DocType is migrated
+		"""
+		meta = frappe.get_meta(cls.doctype)
+		key = (frappe.local.site, cls.doctype)
+		field_metadata = _field_metadata_cache.get(key)
+		if not field_metadata or field_metadata.modified != str(meta.modified):
+			fields = tuple(field.fieldname for field in meta.fields)
+			field_metadata = DocTypeFieldMetadata(
+				modified=str(meta.modified),
+				fields=fields,
+				fieldnames=frozenset(fields + ("name",)),
+				json_fields=tuple(field.fieldname for field in meta.fields if field.fieldtype == "JSON"),
+			)
+			_field_metadata_cache[key] = field_metadata
+		return field_metadata
+
+
+@dataclass
+class BulkSaveResult:
+	"""Outcome of saving a single record with WooCommerceResource.bulk_save"""
+
+	record: WooCommerceResource
+	success: bool = False
+	response: Optional[Dict] = None
+	error: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class DocTypeFieldMetadata:
+	"""Fieldnames of a WooCommerce virtual DocType, as used when (de)serialising records"""
+
+	modified: str
+	fields: Tuple[str, ...]
+	fieldnames: FrozenSet[str]
+	json_fields: Tuple[str, ...]
+
+
+# Field metadata per (site, DocType)
+_field_metadata_cache: Dict[Tuple[str, str], DocTypeFieldMetadata] = {}
+
 
-		return fields
+def get_record_cache_key(doctype: str, name: str) -> str:
+	return f"woocommerce_record|{doctype}|{name}"
+
+
+def get_webhook_payload_cache_key(doctype: str, name: str) -> str:
+	return f"woocommerce_webhook_payload|{doctype}|{name}"
+
+
+def clear_record_cache(doctype: str, name: str):
+	"""
+	Remove a record from the record cache and the revalidation cache, e.g. after it was changed
+	"""
+	frappe.cache().delete_value(
+		[get_record_cache_key(doctype, name), get_validated_record_cache_key(doctype, name)]
+	)
+
+
+def get_update_patch(before: Dict, after: Dict, keyed_list_fields: Dict[str, str]) -> Dict:
+	"""
+	Returns the fields of a record that changed, for a PUT request to WooCommerce.
+
+	Dictionaries are reduced to their changed keys, and the lists in keyed_list_fields to their changed
+	or added entries. WooCommerce leaves entries that are not sent unchanged.
+	"""
+	patch = {}
+	for field, value in after.items():
+		value_before = before.get(field)
+		if field in keyed_list_fields and isinstance(value, list) and isinstance(value_before, list):
+			if changes := get_keyed_list_patch(value_before, value, keyed_list_fields[field]):
+				patch[field] = changes
+		elif isinstance(value, dict) and isinstance(value_before, dict) and value:
+			if changes := get_dict_patch(value_before, value):
+				patch[field] = changes
+		elif not values_are_equal(value_before, value):
+			patch[field] = value
+	return patch
+
+
+def get_keyed_list_patch(before: List[Dict], after: List[Dict], key: str) -> List[Dict]:
+	"""
+	Returns the entries of a list that were added or changed, matching entries by key. Changed entries
+	only contain their identifying fields and the fields that changed.
+	"""
+	entries_before = {
+		entry[key]: entry for entry in before if isinstance(entry, dict) and key in entry
+	}
+	changes = []
+	for entry in after:
+		entry_before = entries_before.get(entry.get(key)) if isinstance(entry, dict) else None
+		if entry_before is None:
+			changes.append(entry)
+		elif entry_changes := get_dict_patch(entry_before, entry):
+			identity = {field: entry[field] for field in (key, "id") if field in entry}
+			changes.append({**identity, **entry_changes})
+	return changes
+
+
+def get_dict_patch(before: Dict, after: Dict) -> Dict:
+	return {
+		field: value
+		for field, value in after.items()
+		if not values_are_equal(before.get(field), value)
+	}
+
+
+def values_are_equal(a, b) -> bool:
+	"""
+	Compare values, treating scalars with the same string representation (e.g. 10 and "10") as equal
+	"""
+	if a == b:
+		return True
+	if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+		return False
+	return str(a) == str(b)
+
+
+def get_validated_record_cache_key(doctype: str, name: str) -> str:
+	return f"woocommerce_validated_record|{doctype}|{name}"
 
 
 def generate_woocommerce_record_name_from_domain_and_id(
@@ -534,6 +1218,37 @@ def get_wc_parameters_from_filters(filters):
 	return params
 
 
+def get_wc_parameters_from_order_by(order_by: str) -> Dict[str, str]:
+	"""
+	Map an order_by clause such as "date_modified asc" to WooCommerce's 'orderby' and 'order'
+	parameters
+	"""
+	supported_order_by_fields = {"date_created": "date", "date_modified": "modified", "id": "id"}
+
+	field, _sep, order = order_by.strip().partition(" ")
+	order = order.strip().lower() or "desc"
+	if field not in supported_order_by_fields or order not in ("asc", "desc"):
+		frappe.throw(f"Unsupported order_by: {order_by}")
+
+	return {"orderby": supported_order_by_fields[field], "order": order}
+
+
+def run_concurrently(
+	fn: Callable, items: Iterable, max_workers: int = WC_MAX_CONCURRENT_REQUESTS
+) -> List[Future]:
+	"""
+	Call fn for each item in a bounded thread pool and return the completed futures in the order of items.
+
+	Every call runs in a copy of the current context, so that frappe.local stays available. Exceptions
+	are only raised when calling result() on the future, i.e. on the calling thread.
+	"""
+	items = list(items)
+	if not items:
+		return []
+	with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+		return [executor.submit(contextvars.copy_context().run, fn, item) for item in items]
+
+
 def log_and_raise_error(exception=None, error_text=None, response=None):
 	"""
 	Create an "Error Log" and raise error
@@ -10,8 +10,12 @@ from frappe import _
 from werkzeug.wrappers import Response
 
 from woocommerce_fusion.tasks.sync_sales_orders import run_sales_order_sync
+from woocommerce_fusion.woocommerce.doctype.woocommerce_order.woocommerce_order import (
+	WooCommerceOrder,
+)
 from woocommerce_fusion.woocommerce.woocommerce_api import (
 	WC_RESOURCE_DELIMITER,
+	clear_record_cache,
 	parse_domain_from_url,
 )
 
@@ -25,19 +29,26 @@ def validate_request() -> Tuple[bool, Optional[HTTPStatus], Optional[str]]:
 		return False, HTTPStatus.BAD_REQUEST, _("Missing Header")
 
 	# Validate secret
-	sig = base64.b64encode(
-		hmac.new(wc_server.secret.encode("utf8"), frappe.request.data, hashlib.sha256).digest()
-	)
-	# if (
-	# 	frappe.request.data
-	# 	and not sig == frappe.get_request_header("x-wc-webhook-signature", "").encode()
-	# ):
+	frappe.flags.woocommerce_webhook_verified = is_signature_valid(wc_server)
+	# if frappe.request.data and not frappe.flags.woocommerce_webhook_verified:
 	# 	return False, HTTPStatus.UNAUTHORIZED, _("Unauthorized")
 
 	frappe.set_user(wc_server.creation_user)
 	return True, None, None
 
 
+def is_signature_valid(wc_server) -> bool:
+	"""
+	Returns True if the request data was signed with the WooCommerce Server's webhook secret
+	"""
+	if not wc_server.secret:
+		return False
+	sig = base64.b64encode(
+		hmac.new(wc_server.secret.encode("utf8"), frappe.request.data, hashlib.sha256).digest()
+	)
+	return hmac.compare_digest(sig, frappe.get_request_header("x-wc-webhook-signature", "").encode())
+
+
 @frappe.whitelist(allow_guest=True, methods=["POST"])
 def order_created(*args, **kwargs):
 	"""
@@ -62,6 +73,10 @@ def order_created(*args, **kwargs):
 		woocommerce_order_name = (
 			f"{parse_domain_from_url(webhook_source_url)}{WC_RESOURCE_DELIMITER}{order['id']}"
 		)
+		clear_record_cache("WooCommerce Order", woocommerce_order_name)
+		# Only a verified payload is used by the sync, instead of retrieving the order again
+		if frappe.flags.woocommerce_webhook_verified:
+			WooCommerceOrder.set_webhook_payload(woocommerce_order_name, order)
 		frappe.enqueue(run_sales_order_sync, queue="long", woocommerce_order_name=woocommerce_order_name)
 		return Response(status=HTTPStatus.OK)
 	else: